@@ -28,16 +28,17 @@ class ArxivHandler:
             r'arxiv.org/pdf/[a-zA-Z.-]+/(\d+)'     # Old PDF format
         ]
 
-    async def setup(self):
-        """Initialize aiohttp session"""
+    async def setup(self, connection_pool=None):
+        """Initialize aiohttp session, on the shared connection pool if given"""
         if not self.session:
             timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=10)
-            self.session = aiohttp.ClientSession(
-                timeout=timeout,
-                headers={
-                    'User-Agent': 'CrewZombitX64/1.0 (Scholarly Paper Analysis Tool; Contact: your@email.com)'
-                }
-            )
+            headers = {
+                'User-Agent': 'CrewZombitX64/1.0 (Scholarly Paper Analysis Tool; Contact: your@email.com)'
+            }
+            if connection_pool:
+                self.session = connection_pool.session(timeout=timeout, headers=headers)
+            else:
+                self.session = aiohttp.ClientSession(timeout=timeout, headers=headers)
 
     async def close(self):
         """Close the aiohttp session"""
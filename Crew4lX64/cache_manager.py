@@ -1,9 +1,363 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from Crew4lX64.url_canonicalizer import canonicalize_url
+
+class LRUCache:
+    """In-memory LRU cache with O(1) lookups, inserts and evictions.
+
+    Entries are bounded by count (``max_entries``) and by an approximate byte
+    budget (``max_bytes``); the least recently used entries are evicted as
+    soon as either limit is exceeded. Entries older than ``ttl`` seconds are
+    treated as missing.
+    """
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (expires, size, value)
+        self._data: 'OrderedDict[str, Tuple[float, int, Any]]' = OrderedDict()
+        self.total_bytes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] >= time.time()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return default
+        if entry[0] < time.time():
+            self.pop(key)
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return default
+        self._data.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry[2]
+
+    def peek(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires) without checking expiry or touching stats."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        return entry[2], entry[0]
+
+    def peek_size(self, key: str) -> int:
+        entry = self._data.get(key)
+        return entry[1] if entry is not None else 0
+
+    def set(self, key: str, value: Any, size: int = 0, ttl: Optional[float] = None,
+            expires: Optional[float] = None) -> None:
+        """Insert or replace an entry; size is the caller's estimate in bytes."""
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.pop(key)
+            return
+        if expires is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires = time.time() + ttl if ttl is not None else float('inf')
+        self.pop(key)
+        self._data[key] = (expires, size, value)
+        self.total_bytes += size
+        while self._data and (
+            (self.max_entries is not None and len(self._data) > self.max_entries) or
+            (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            _, (_, evicted_size, _) = self._data.popitem(last=False)
+            self.total_bytes -= evicted_size
+            self.stats['evictions'] += 1
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self.total_bytes -= entry[1]
+        return entry[2]
+
+    def purge_expired(self) -> int:
+        """Drop all expired entries. Runs in O(n); lookups expire lazily anyway."""
+        now = time.time()
+        expired = [key for key, entry in self._data.items() if entry[0] < now]
+        for key in expired:
+            self.pop(key)
+        self.stats['expired'] += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(self._data),
+            'bytes': self.total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes
+        }
+
 class CacheManager:
-    def __init__(self):
-        pass  # Placeholder for initialization
+    """Two-tier HTTP response cache.
+
+    Recently used entries live in an in-memory LRU bounded by their
+    uncompressed size; every entry is also written, compressed, to a SQLite
+    database in ``cache_dir`` so later runs can reuse it. Entries expire after
+    their TTL and the disk tier evicts the least recently accessed rows once
+    it exceeds ``disk_limit``. Access times of disk hits are buffered and
+    written in batches of ``access_batch`` rows.
+    """
+    def __init__(self, cache_dir: str = '.crawler_cache',
+                 memory_limit: int = 64 * 1024 * 1024,
+                 disk_limit: int = 1024 * 1024 * 1024,
+                 default_ttl: float = 3600,
+                 access_batch: int = 100):
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.default_ttl = default_ttl
+        self._memory = LRUCache(max_bytes=memory_limit)
+        self._disk_bytes = 0
+        self.access_batch = access_batch
+        self._pending_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'expired': 0,
+            'disk_evictions': 0,
+            'bytes_served': 0,
+            'bytes_written': 0
+        }
+
+        self._db = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(cache_dir, 'cache.db'), check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value BLOB, size INTEGER, '
+                'expires REAL, last_access REAL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS idx_last_access ON entries (last_access)')
+            self._db.commit()
+            row = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+            self._disk_bytes = row[0]
+        except sqlite3.Error as e:
+            logging.error(f"Failed to open disk cache in {cache_dir}: {e}. Using memory only.")
+            self._db = None
+
+    @staticmethod
+    def normalize_key(url: str) -> str:
+        """Normalize a URL into a cache key; see URLCanonicalizer."""
+        return canonicalize_url(url)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached value for a URL, or None if missing or expired."""
+        return self._lookup(key, allow_stale=False)
+
+    def get_stale(self, key: str) -> Optional[Dict]:
+        """Return a cached value even if it has expired.
+
+        Expired entries that carry ``etag`` or ``last_modified`` validators are
+        kept, in memory as well as on disk, so the crawler can revalidate them
+        with a conditional request.
+        """
+        return self._lookup(key, allow_stale=True)
+
+    def _lookup(self, key: str, allow_stale: bool) -> Optional[Dict]:
+        key = self.normalize_key(key)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.peek(key)
+            if entry is not None:
+                value, expires = entry
+                if allow_stale:
+                    return value
+                if expires >= now:
+                    self._memory.get(key)
+                    self.stats['memory_hits'] += 1
+                    self.stats['bytes_served'] += self._memory.peek_size(key)
+                    return value
+                # Both tiers hold the same expiry, so the disk copy is stale too
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                if not self._has_validators(value):
+                    self._memory.pop(key)
+                    self._delete_disk_key(key)
+                return None
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        'SELECT value, size, expires FROM entries WHERE key = ?', (key,)
+                    ).fetchone()
+                    if row is not None:
+                        blob, size, expires = row
+                        raw = zlib.decompress(blob)
+                        value = json.loads(raw)
+                        if expires >= now or allow_stale:
+                            self._touch(key, now)
+                            if not allow_stale:
+                                self._memory.set(key, value, size=len(raw), expires=expires)
+                                self.stats['disk_hits'] += 1
+                                self.stats['bytes_served'] += len(raw)
+                            return value
+                        self.stats['expired'] += 1
+                        if self._has_validators(value):
+                            self._memory.set(key, value, size=len(raw), expires=expires)
+                        else:
+                            self._delete_disk(key, size)
+                except (sqlite3.Error, zlib.error, ValueError) as e:
+                    logging.warning(f"Disk cache read failed for {key}: {e}")
+
+            if not allow_stale:
+                self.stats['misses'] += 1
+            return None
+
+    @staticmethod
+    def _has_validators(value: Dict) -> bool:
+        return bool(value.get('etag') or value.get('last_modified'))
+
+    def set(self, key: str, value: Dict, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable value for a URL in both tiers."""
+        key = self.normalize_key(key)
+        now = time.time()
+        expires = now + (self.default_ttl if ttl is None else ttl)
+        try:
+            raw = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            logging.warning(f"Value for {key} is not cacheable: {e}")
+            return
+        blob = zlib.compress(raw, 1)
+        size = len(blob)
+
+        with self._lock:
+            self.stats['sets'] += 1
+            self.stats['bytes_written'] += size
+            self._memory.set(key, value, size=len(raw), expires=expires)
+            self._pending_access.pop(key, None)
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+                    if row is not None:
+                        self._disk_bytes -= row[0]
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO entries (key, value, size, expires, last_access) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (key, blob, size, expires, now)
+                    )
+                    self._disk_bytes += size
+                    self._evict_disk()
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logging.warning(f"Disk cache write failed for {key}: {e}")
+
+    def delete(self, key: str) -> None:
+        key = self.normalize_key(key)
+        with self._lock:
+            self._memory.pop(key)
+            self._delete_disk_key(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': (lookups - self.stats['misses']) / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory.total_bytes,
+            'memory_evictions': self._memory.stats['evictions'],
+            'disk_bytes': self._disk_bytes
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._flush_access()
+                    self._db.commit()
+                    self._db.close()
+                except sqlite3.Error as e:
+                    logging.error(f"Error closing disk cache: {e}")
+                self._db = None
+
+    def _touch(self, key: str, now: float) -> None:
+        """Buffer a disk hit's access time; written once a batch has built up."""
+        self._pending_access[key] = now
+        if len(self._pending_access) >= self.access_batch:
+            self._flush_access()
+
+    def _flush_access(self) -> None:
+        if not self._pending_access:
+            return
+        self._db.executemany(
+            'UPDATE entries SET last_access = ? WHERE key = ?',
+            [(accessed, key) for key, accessed in self._pending_access.items()]
+        )
+        self._db.commit()
+        self._pending_access.clear()
+
+    def _delete_disk(self, key: str, size: int) -> None:
+        self._pending_access.pop(key, None)
+        self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        self._db.commit()
+        self._disk_bytes -= size
+
+    def _delete_disk_key(self, key: str) -> None:
+        if self._db is None:
+            return
+        try:
+            row = self._db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self._delete_disk(key, row[0])
+        except sqlite3.Error as e:
+            logging.warning(f"Disk cache delete failed for {key}: {e}")
 
-    def get(self, key):
-        pass  # Placeholder
+    def _evict_disk(self) -> None:
+        """Drop expired rows, then least recently used rows, until under the limit.
 
-    def set(self, key, value):
-        pass  # Placeholder
+        Under disk pressure expired rows go first, even those kept for
+        revalidation.
+        """
+        if self._disk_bytes <= self.disk_limit:
+            return
+        self._flush_access()
+        self._db.execute('DELETE FROM entries WHERE expires < ?', (time.time(),))
+        row = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+        self._disk_bytes = row[0]
+        target = self.disk_limit * 0.9
+        while self._disk_bytes > target:
+            rows = self._db.execute(
+                'SELECT key, size FROM entries ORDER BY last_access LIMIT 100'
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._disk_bytes -= size
+                self.stats['disk_evictions'] += 1
+                if self._disk_bytes <= target:
+                    break
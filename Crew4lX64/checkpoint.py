@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterator, Optional
+
+class CrawlCheckpoint:
+    """Persist crawl progress to a state directory so a crawl can be resumed.
+
+    ``checkpoint.json`` holds the frontier, visited URLs and stats and is
+    rewritten atomically on every save. Finished pages are appended to
+    ``pages.jsonl`` as they complete, so saving a checkpoint never has to
+    serialize the results gathered so far. ``write_state`` may run in a
+    worker thread; it never touches the pages file and is serialized with
+    other writes and with ``clear``.
+    """
+    def __init__(self, state_dir: str):
+        self.state_dir = state_dir
+        self.checkpoint_file = os.path.join(state_dir, 'checkpoint.json')
+        self.pages_file = os.path.join(state_dir, 'pages.jsonl')
+        self._pages = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.checkpoint_file)
+
+    def start(self, resume: bool = False) -> None:
+        """Open the state directory, discarding old state unless resuming."""
+        if not resume:
+            self.clear()
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._pages = open(self.pages_file, 'a', encoding='utf-8')
+
+    def save(self, state: Dict) -> None:
+        """Flush the finished pages and atomically replace the checkpoint with state."""
+        self.flush_pages()
+        self.write_state(state)
+
+    def flush_pages(self) -> None:
+        """Flush appended pages; call from the thread that appends them."""
+        try:
+            if self._pages:
+                self._pages.flush()
+        except Exception as e:
+            logging.error(f"Failed to flush checkpoint pages: {e}")
+
+    def write_state(self, state: Dict) -> None:
+        """Atomically replace the checkpoint with state, leaving the pages file alone."""
+        tmp_file = self.checkpoint_file + '.tmp'
+        with self._lock:
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.replace(tmp_file, self.checkpoint_file)
+            except Exception as e:
+                logging.error(f"Failed to save checkpoint: {e}")
+
+    def load(self) -> Optional[Dict]:
+        if not self.exists():
+            return None
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Failed to load checkpoint: {e}")
+            return None
+
+    def append_page(self, record: Dict) -> None:
+        """Record a finished page; call start() first."""
+        try:
+            self._pages.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logging.error(f"Failed to record page in checkpoint: {e}")
+
+    def iter_pages(self) -> Iterator[Dict]:
+        """Yield page records written by previous runs, skipping a torn last line."""
+        if not os.path.exists(self.pages_file):
+            return
+        with open(self.pages_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning("Skipping incomplete page record in checkpoint")
+
+    def close(self) -> None:
+        if self._pages:
+            self._pages.close()
+            self._pages = None
+
+    def clear(self) -> None:
+        """Remove all saved state, e.g. after a crawl completes."""
+        with self._lock:
+            self.close()
+            for path in (self.checkpoint_file, self.pages_file):
+                if os.path.exists(path):
+                    os.remove(path)
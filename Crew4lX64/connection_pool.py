@@ -0,0 +1,101 @@
+import ssl
+import time
+from typing import Dict, Optional
+import aiohttp
+
+class ConnectionPool:
+    """A keep-alive connection pool shared by every component that talks HTTP.
+
+    All sessions handed out by ``session`` share one ``TCPConnector``, so
+    connections (and their TLS handshakes) are reused across the crawler, the
+    arXiv client, the exporter and proxy checks, subject to one global and
+    one per-host limit. Sessions only borrow the connector: closing them
+    leaves the pool open until ``close`` is called.
+    """
+    def __init__(self, limit: int = 100, limit_per_host: int = 10,
+                 keepalive_timeout: float = 30.0, ttl_dns_cache: int = 300,
+                 verify_ssl: bool = True):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        # One context for every connection instead of one per session
+        self.ssl_context = ssl.create_default_context() if verify_ssl else False
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._trace = aiohttp.TraceConfig()
+        self._trace.on_request_start.append(self._on_request_start)
+        self._trace.on_connection_queued_start.append(self._on_queued_start)
+        self._trace.on_connection_queued_end.append(self._on_queued_end)
+        self._trace.on_connection_create_start.append(self._on_create_start)
+        self._trace.on_connection_create_end.append(self._on_create_end)
+        self._trace.on_connection_reuseconn.append(self._on_reuse)
+        self.stats = {
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'queued': 0,
+            'wait_time': 0.0,  # Seconds spent waiting for a free connection slot
+            'connect_time': 0.0  # Seconds spent opening new connections
+        }
+
+    @property
+    def connector(self) -> aiohttp.TCPConnector:
+        """The shared connector, created on first use (needs a running loop)."""
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+                ssl=self.ssl_context
+            )
+        return self._connector
+
+    def session(self, **kwargs) -> aiohttp.ClientSession:
+        """A ClientSession on the shared connector; kwargs go to ClientSession."""
+        trace_configs = list(kwargs.pop('trace_configs', None) or []) + [self._trace]
+        return aiohttp.ClientSession(
+            connector=self.connector,
+            connector_owner=False,
+            trace_configs=trace_configs,
+            **kwargs
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._connector is None or self._connector.closed
+
+    async def close(self) -> None:
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+        self._connector = None
+
+    def get_stats(self) -> Dict:
+        opened = self.stats['connections_created'] + self.stats['connections_reused']
+        return {
+            **self.stats,
+            'reuse_ratio': self.stats['connections_reused'] / opened if opened else 0.0,
+            'avg_wait_time': self.stats['wait_time'] / self.stats['queued'] if self.stats['queued'] else 0.0,
+            'avg_connect_time': (self.stats['connect_time'] / self.stats['connections_created']
+                                 if self.stats['connections_created'] else 0.0)
+        }
+
+    async def _on_request_start(self, session, ctx, params) -> None:
+        self.stats['requests'] += 1
+
+    async def _on_queued_start(self, session, ctx, params) -> None:
+        ctx.queued_at = time.monotonic()
+
+    async def _on_queued_end(self, session, ctx, params) -> None:
+        self.stats['queued'] += 1
+        self.stats['wait_time'] += time.monotonic() - getattr(ctx, 'queued_at', time.monotonic())
+
+    async def _on_create_start(self, session, ctx, params) -> None:
+        ctx.connect_at = time.monotonic()
+
+    async def _on_create_end(self, session, ctx, params) -> None:
+        self.stats['connections_created'] += 1
+        self.stats['connect_time'] += time.monotonic() - getattr(ctx, 'connect_at', time.monotonic())
+
+    async def _on_reuse(self, session, ctx, params) -> None:
+        self.stats['connections_reused'] += 1
@@ -1,15 +1,11 @@
 import re
 import json
 import logging
-import concurrent.futures
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from lxml import html
+from typing import Dict, List, Optional, Union
 from jsonpath_ng import parse as jsonpath_parse
 from Crew4lX64.schema_generator import SchemaGenerator
 from Crew4lX64.security_manager import SecurityManager
+from Crew4lX64.parsed_document import ParsedDocument
 
 logger = logging.getLogger(__name__)
 
@@ -42,18 +38,23 @@ class ContentExtractor:
             'topics': '[data-ga-click="Topic, repository page"]',
             'language_stats': '.Progress.float-left.bg-gray-dark'
         }
-        self.vectorizer = TfidfVectorizer()
         self.schema_generator = SchemaGenerator()
 
     def is_pdf_content(self, content: str) -> bool:
         """Check if content appears to be PDF"""
         return content.startswith('%PDF-') or '.pdf' in content.lower()[:1024]
 
-    def extract_main_content(self, html_content, url: Optional[str] = None):
+    def extract_main_content(self, html_content: Union[str, ParsedDocument], url: Optional[str] = None):
+        """Find the main content block of a page.
+
+        Boilerplate elements are removed from the shared tree in place, so when
+        a ParsedDocument is passed this should be the last extractor to run.
+        """
+        document = ParsedDocument.ensure(html_content, url)
         # Check for PDF content
-        if self.is_pdf_content(html_content):
+        if self.is_pdf_content(document.html):
             self.security_manager.show_warning('pdf')
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = document.soup
 
         # Check if it's an arXiv page
         if url and 'arxiv.org' in url:
@@ -250,35 +251,41 @@ class ContentExtractor:
         text = re.sub(r'\s+', ' ', text)
         return text.strip()
 
-    async def extract_all(self, html_content: str, data_type: str = None) -> Dict:
-        schema = await self.schema_generator.generate_schema(html_content, data_type) if data_type else {}
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(self._extract_structured_data, html_content, schema),
-                executor.submit(self._extract_json_ld, html_content),
-                executor.submit(self._extract_microdata, html_content)
-            ]
+    async def extract_all(self, html_content: Union[str, ParsedDocument], data_type: str = None) -> Dict:
+        document = ParsedDocument.ensure(html_content)
+        schema = await self.schema_generator.generate_schema(document.html, data_type) if data_type else {}
+        return self.extract_document(document, schema)
+
+    def extract_document(self, html_content: Union[str, ParsedDocument], schema: Optional[Dict] = None) -> Dict:
+        """Synchronous part of extract_all, safe to run in a worker process."""
+        document = ParsedDocument.ensure(html_content)
+        schema = schema or {}
+
+        # The extractors share one parsed tree, so they run back to back
+        # rather than re-parsing the page in separate threads.
+        extractors = [
+            lambda: self._extract_structured_data(document, schema),
+            lambda: self._extract_json_ld(document),
+            lambda: self._extract_microdata(document)
+        ]
 
-            results = {}
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    results.update(future.result())
-                except Exception as e:
-                    logging.error(f"Error in extraction task: {str(e)}")
-                    continue
+        results = {}
+        for extractor in extractors:
+            try:
+                results.update(extractor())
+            except Exception as e:
+                logging.error(f"Error in extraction task: {str(e)}")
+                continue
 
         return results
 
-    def _extract_structured_data(self, html_content: str, schema: Dict) -> Dict:
+    def _extract_structured_data(self, html_content: Union[str, ParsedDocument], schema: Dict) -> Dict:
         result = {}
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        try:
-            tree = html.fromstring(html_content.encode('utf-8'))
-        except Exception as e:
-            logging.error(f"Failed to parse HTML with lxml: {str(e)}")
-            tree = None
+        document = ParsedDocument.ensure(html_content)
+        if not schema:
+            return {'structured': result}
+        soup = document.soup
+        tree = document.tree if 'xpath' in schema else None
 
         if 'selectors' in schema:
             for key, selector in schema['selectors'].items():
@@ -302,8 +309,8 @@ class ContentExtractor:
 
         return {'structured': result}
 
-    def _extract_json_ld(self, html_content: str) -> Dict:
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def _extract_json_ld(self, html_content: Union[str, ParsedDocument]) -> Dict:
+        soup = ParsedDocument.ensure(html_content).soup
         json_ld_data = []
 
         for script in soup.find_all('script', type='application/ld+json'):
@@ -317,8 +324,8 @@ class ContentExtractor:
 
         return {'json_ld': json_ld_data}
 
-    def _extract_microdata(self, html_content: str) -> Dict:
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def _extract_microdata(self, html_content: Union[str, ParsedDocument]) -> Dict:
+        soup = ParsedDocument.ensure(html_content).soup
         microdata = {}
 
         for element in soup.find_all(attrs={"itemscope": True}):
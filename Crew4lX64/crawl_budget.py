@@ -0,0 +1,158 @@
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+class DomainBudget:
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0  # Requests that have completed, failed or not
+        self.errors = 0
+        self.bytes = 0
+        self.cached = 0
+        self.started: Optional[float] = None  # First request to the domain
+        self.stopped: Optional[str] = None  # Why the domain gets no more requests
+
+class CrawlBudget:
+    """Page, byte and wall-clock limits for a crawl, overall and per domain.
+
+    ``acquire(url)`` reserves a request before it is made, so concurrent
+    workers cannot overshoot the page limits, and ``record`` adds its bytes
+    and outcome once it finishes; a page served from a cache gives its
+    reservation back. A domain stops once it has used its share of requests,
+    bytes or time, or once at least ``min_error_samples`` requests have
+    completed and its error rate exceeds ``max_error_rate``;
+    the whole crawl stops when a global limit runs out (see ``exhausted``).
+    Limits left as None are not enforced.
+    """
+    def __init__(self, max_pages: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_time: Optional[float] = None, max_pages_per_domain: Optional[int] = None,
+                 max_bytes_per_domain: Optional[int] = None, max_time_per_domain: Optional[float] = None,
+                 max_error_rate: Optional[float] = None, min_error_samples: int = 20):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.max_time = max_time
+        self.max_pages_per_domain = max_pages_per_domain
+        self.max_bytes_per_domain = max_bytes_per_domain
+        self.max_time_per_domain = max_time_per_domain
+        self.max_error_rate = max_error_rate
+        self.min_error_samples = min_error_samples
+        self.domains: Dict[str, DomainBudget] = {}
+        self.requests = 0
+        self.bytes = 0
+        self.started: Optional[float] = None
+        self.denied = 0
+        self.cached = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """True once a global limit has run out."""
+        return self._global_reason(time.monotonic()) is not None
+
+    def _global_reason(self, now: float) -> Optional[str]:
+        if self.max_pages is not None and self.requests >= self.max_pages:
+            return 'pages'
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return 'bytes'
+        if self.max_time is not None and self.started is not None and now - self.started >= self.max_time:
+            return 'time'
+        return None
+
+    def acquire(self, url: str) -> bool:
+        """Reserve a request to the URL; False if it does not fit in the budget."""
+        now = time.monotonic()
+        host = urlparse(url).netloc
+        domain = self.domains.get(host)
+        if self._global_reason(now) is not None or (domain is not None and self._stop(domain, now)):
+            self.denied += 1
+            return False
+        if domain is None:
+            domain = self.domains[host] = DomainBudget()
+        if self.started is None:
+            self.started = now
+        if domain.started is None:
+            domain.started = now
+        domain.requests += 1
+        self.requests += 1
+        return True
+
+    def domain_stopped(self, url: str) -> bool:
+        """Whether the URL's domain has been cut off, without counting a denial."""
+        domain = self.domains.get(urlparse(url).netloc)
+        return domain is not None and self._stop(domain, time.monotonic())
+
+    def record(self, url: str, size: int = 0, error: bool = False, cached: bool = False) -> None:
+        """Account for the outcome of a request reserved with ``acquire``.
+
+        size is the number of response bytes received. With cached=True no
+        request was made: the reservation is returned and only counted as a
+        cache hit.
+        """
+        domain = self.domains.get(urlparse(url).netloc)
+        if domain is None:
+            return
+        if cached:
+            domain.requests -= 1
+            self.requests -= 1
+            domain.cached += 1
+            self.cached += 1
+            return
+        domain.attempts += 1
+        domain.bytes += size
+        self.bytes += size
+        if error:
+            domain.errors += 1
+        self._stop(domain, time.monotonic())
+
+    def _stop(self, domain: DomainBudget, now: float) -> bool:
+        if domain.stopped is None:
+            domain.stopped = self._domain_reason(domain, now)
+        return domain.stopped is not None
+
+    def _domain_reason(self, domain: DomainBudget, now: float) -> Optional[str]:
+        if self.max_pages_per_domain is not None and domain.requests >= self.max_pages_per_domain:
+            return 'pages'
+        if self.max_bytes_per_domain is not None and domain.bytes >= self.max_bytes_per_domain:
+            return 'bytes'
+        if (self.max_time_per_domain is not None and domain.started is not None
+                and now - domain.started >= self.max_time_per_domain):
+            return 'time'
+        if (self.max_error_rate is not None and domain.attempts >= self.min_error_samples
+                and domain.errors / domain.attempts > self.max_error_rate):
+            return 'error_rate'
+        return None
+
+    @staticmethod
+    def _remaining(limit, used):
+        return None if limit is None else max(0, limit - used)
+
+    def get_stats(self) -> Dict:
+        """Usage and remaining budget (None where unlimited), overall and per domain."""
+        now = time.monotonic()
+        elapsed = now - self.started if self.started is not None else 0.0
+        domains = {}
+        for name, domain in self.domains.items():
+            self._stop(domain, now)
+            domain_elapsed = now - domain.started if domain.started is not None else 0.0
+            domains[name] = {
+                'requests': domain.requests,
+                'errors': domain.errors,
+                'cached': domain.cached,
+                'bytes': domain.bytes,
+                'remaining_pages': self._remaining(self.max_pages_per_domain, domain.requests),
+                'remaining_bytes': self._remaining(self.max_bytes_per_domain, domain.bytes),
+                'remaining_time': self._remaining(self.max_time_per_domain, domain_elapsed),
+                'stopped': domain.stopped
+            }
+        return {
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'elapsed': elapsed,
+            'remaining_pages': self._remaining(self.max_pages, self.requests),
+            'remaining_bytes': self._remaining(self.max_bytes, self.bytes),
+            'remaining_time': self._remaining(self.max_time, elapsed),
+            'exhausted': self._global_reason(now),
+            'denied': self.denied,
+            'cached': self.cached,
+            'stopped_domains': sorted(name for name, domain in domains.items() if domain['stopped']),
+            'domains': domains
+        }
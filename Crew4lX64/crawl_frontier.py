@@ -0,0 +1,298 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from Crew4lX64.rate_limiter import RateLimiter
+from Crew4lX64.visited_set import ExactVisitedSet, VisitedSet, load_visited_set
+
+@dataclass(order=True)
+class FrontierEntry:
+    """A URL waiting in the frontier, ordered by priority then insertion order."""
+    priority: float
+    seq: int
+    url: str = field(compare=False)
+    depth: int = field(compare=False)
+    parent: Optional[str] = field(default=None, compare=False)
+    link_index: Optional[int] = field(default=None, compare=False)
+    metadata: Optional[Dict] = field(default=None, compare=False)  # e.g. sitemap lastmod/priority
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc
+
+class CrawlFrontier:
+    """Priority queue of URLs shared by a fixed pool of crawl workers.
+
+    Workers call ``get`` to receive the next entry and ``task_done`` once the
+    page has been processed. ``get`` returns None when the frontier is empty
+    and no worker is still processing a page (nothing more can be discovered),
+    or after ``close`` has been called. Tasks that feed URLs in from outside
+    the workers (such as a sitemap reader) register with ``add_producer`` so
+    the frontier is not considered finished while they run.
+
+    Scheduled URLs are remembered in ``seen``, a VisitedSet whose backend
+    decides how much memory that takes on very large crawls. With a ``key``
+    function (such as ``URLCanonicalizer.canonicalize``) URLs are
+    deduplicated by their key but handed out in the form they were pushed.
+
+    URLs are kept in one queue per host, and a host is only served when it
+    is ready. With a ``rate_limiter``, handing out a URL reserves its rate
+    limit slot (so the fetch's ``RateLimiter.wait`` does not sleep again)
+    and the host becomes ready when ``rate_limiter.ready_in`` says its next
+    slot is free; at most ``max_per_host`` of a host's URLs are processed
+    at once. Ready hosts are kept in a heap ordered by the priority of their
+    best URL and waiting hosts in a heap ordered by the time they become
+    ready, so ``get`` serves the best URL among the hosts that are due
+    instead of a worker sitting in a rate limit sleep while other hosts
+    have work. Without ``rate_limiter`` and ``max_per_host`` URLs come out
+    in plain priority order.
+    """
+    def __init__(self, seen: Optional[VisitedSet] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_per_host: Optional[int] = None,
+                 key: Optional[Callable[[str], str]] = None):
+        self._queues: Dict[str, List[FrontierEntry]] = {}  # host -> heap of its entries
+        self._ready: List[Tuple[float, int, str]] = []  # (priority, seq) of a due host's best entry
+        self._waiting: List[Tuple[float, str]] = []  # (ready time, host)
+        self._ready_at: Dict[str, float] = {}  # host -> monotonic time of its next slot
+        self._busy: Dict[str, int] = {}  # host -> entries being processed
+        self._size = 0
+        self.rate_limiter = rate_limiter
+        self.key = key
+        self.max_per_host = max_per_host
+        self._seen = seen if seen is not None else ExactVisitedSet()
+        self._counter = itertools.count()
+        self._in_progress = 0
+        self._producers = 0
+        self._active: Dict[int, FrontierEntry] = {}  # seq -> entry being processed
+        self._closed = False
+        self._cond = asyncio.Condition()
+        self.stats = {
+            'enqueued': 0,
+            'dequeued': 0,
+            'duplicates': 0,
+            'max_size': 0,
+            'host_waits': 0  # Times get waited for a host's next slot
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, url: str) -> bool:
+        return (self.key(url) if self.key else url) in self._seen
+
+    @property
+    def in_progress(self) -> int:
+        return self._in_progress
+
+    def push(self, url: str, depth: int, priority: Optional[float] = None,
+             parent: Optional[str] = None, link_index: Optional[int] = None,
+             metadata: Optional[Dict] = None) -> bool:
+        """Add a URL to the frontier. Returns False if it was already scheduled.
+
+        Lower priorities are served first; by default shallower pages (higher
+        remaining depth) come first, giving breadth-first order.
+        """
+        key = self.key(url) if self.key else url
+        if self._closed or key in self._seen:
+            self.stats['duplicates'] += 1
+            return False
+        self._seen.add(key)
+        if priority is None:
+            priority = -depth
+        self._add(FrontierEntry(
+            priority=priority,
+            seq=next(self._counter),
+            url=url,
+            depth=depth,
+            parent=parent,
+            link_index=link_index,
+            metadata=metadata
+        ))
+        self.stats['enqueued'] += 1
+        self.stats['max_size'] = max(self.stats['max_size'], self._size)
+        return True
+
+    def _add(self, entry: FrontierEntry) -> None:
+        host = host_of(entry.url)
+        queue = self._queues.setdefault(host, [])
+        heapq.heappush(queue, entry)
+        self._size += 1
+        if queue[0] is entry:
+            self._schedule(host)
+
+    def _schedule(self, host: str) -> None:
+        """Put a host with pending entries into the ready or the waiting heap.
+
+        Both heaps may hold outdated items for a host; they are skipped when
+        popped instead of being searched for and removed here.
+        """
+        ready_at = self._ready_at.get(host, 0.0)
+        if ready_at and ready_at <= time.monotonic():
+            del self._ready_at[host]
+            ready_at = 0.0
+        queue = self._queues.get(host)
+        if not queue:
+            return
+        if self.max_per_host and self._busy.get(host, 0) >= self.max_per_host:
+            return  # Rescheduled by task_done
+        if not ready_at:
+            heapq.heappush(self._ready, (queue[0].priority, queue[0].seq, host))
+        else:
+            heapq.heappush(self._waiting, (ready_at, host))
+
+    def _next_host(self) -> Optional[str]:
+        """The due host with the best pending entry, if any."""
+        now = time.monotonic()
+        while self._waiting and self._waiting[0][0] <= now:
+            ready_at, host = heapq.heappop(self._waiting)
+            if self._ready_at.get(host) == ready_at:
+                self._schedule(host)
+        while self._ready:
+            _, seq, host = heapq.heappop(self._ready)
+            queue = self._queues.get(host)
+            if not queue or queue[0].seq != seq:
+                continue
+            if self.max_per_host and self._busy.get(host, 0) >= self.max_per_host:
+                continue
+            if self._ready_at.get(host, 0.0) > now:
+                # Queued while the host was due, but a better entry was pushed
+                # since and its slot has been taken: wait for the next one
+                self._schedule(host)
+                continue
+            return host
+        return None
+
+    def _delay_host(self, host: str, url: str) -> None:
+        if self.rate_limiter is None:
+            return
+        delay = self.rate_limiter.ready_in(url)
+        if delay > 0:
+            self._ready_at[host] = max(self._ready_at.get(host, 0.0), time.monotonic() + delay)
+
+    def _pop(self, host: str) -> FrontierEntry:
+        queue = self._queues[host]
+        entry = heapq.heappop(queue)
+        if not queue:
+            del self._queues[host]
+        self._size -= 1
+        self._busy[host] = self._busy.get(host, 0) + 1
+        if self.rate_limiter is not None:
+            # Count this URL's request now, not when its fetch starts, so the
+            # host is not handed to another worker for the same slot
+            self.rate_limiter.reserve(entry.url)
+        self._delay_host(host, entry.url)
+        self._schedule(host)
+        return entry
+
+    async def put(self, url: str, depth: int, **kwargs) -> bool:
+        """Async variant of ``push`` that wakes up idle workers."""
+        async with self._cond:
+            added = self.push(url, depth, **kwargs)
+            if added:
+                self._cond.notify()
+            return added
+
+    async def get(self) -> Optional[FrontierEntry]:
+        """Wait for the next entry, or return None once the crawl is finished."""
+        async with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                host = self._next_host()
+                if host is not None:
+                    break
+                if not self._size and self._in_progress == 0 and self._producers == 0:
+                    return None
+                if self._waiting:
+                    # Sleep until the next host's slot unless woken earlier
+                    self.stats['host_waits'] += 1
+                    timeout = max(0.0, self._waiting[0][0] - time.monotonic())
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._cond.wait()
+            entry = self._pop(host)
+            self._in_progress += 1
+            self._active[entry.seq] = entry
+            self.stats['dequeued'] += 1
+            return entry
+
+    async def task_done(self, entry: Optional[FrontierEntry] = None) -> None:
+        """Mark an entry returned by ``get`` as fully processed.
+
+        Pass the entry so its host is freed for the next one; without it
+        the host's slot stays taken.
+        """
+        async with self._cond:
+            self._in_progress -= 1
+            if entry is not None and self._active.pop(entry.seq, None) is not None:
+                host = host_of(entry.url)
+                self._busy[host] -= 1
+                if not self._busy[host]:
+                    del self._busy[host]
+                if self.rate_limiter is not None:
+                    # Unused if the page came from a cache or was skipped
+                    self.rate_limiter.release(entry.url)
+                self._delay_host(host, entry.url)
+                self._schedule(host)
+            self._cond.notify_all()
+
+    def add_producer(self) -> None:
+        """Keep ``get`` waiting for URLs until ``producer_done`` is called."""
+        self._producers += 1
+
+    async def producer_done(self) -> None:
+        async with self._cond:
+            self._producers -= 1
+            self._cond.notify_all()
+
+    async def close(self) -> None:
+        """Stop handing out entries; waiting workers return None."""
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def active_urls(self) -> List[str]:
+        """URLs handed to workers that have not been marked done yet."""
+        return [entry.url for entry in self._active.values()]
+
+    def snapshot(self) -> Dict:
+        """Serializable state: pending and in-progress entries plus seen URLs.
+
+        In-progress entries are saved as pending so a resumed crawl retries them.
+        """
+        entries = list(self._active.values())
+        for queue in self._queues.values():
+            entries.extend(queue)
+        return {
+            'entries': [
+                {k: v for k, v in asdict(entry).items() if k != 'seq'}
+                for entry in sorted(entries)
+            ],
+            'seen': self._seen.to_state()
+        }
+
+    def restore(self, state: Dict, visited: Iterable[str] = ()) -> None:
+        """Load a snapshot taken by ``snapshot`` into an empty frontier."""
+        if 'seen' in state:
+            self._seen = load_visited_set(state['seen'])
+        self._seen.update(visited)
+        for data in state.get('entries', []):
+            self._add(FrontierEntry(seq=next(self._counter), **data))
+        self.stats['max_size'] = max(self.stats['max_size'], self._size)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'pending': self._size,
+            'in_progress': self._in_progress,
+            'hosts': len(self._queues),
+            'waiting_hosts': sum(1 for host, ready_at in self._ready_at.items()
+                                 if host in self._queues and ready_at > time.monotonic()),
+            'seen': self._seen.get_stats()
+        }
@@ -1,9 +1,10 @@
 import json
 import csv
 import os
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 import time
-from security_manager import SecurityManager
+from Crew4lX64.security_manager import SecurityManager
+from Crew4lX64.jsonl_writer import JSONLWriter
 from urllib.parse import urlparse
 import aiohttp
 import asyncio
@@ -11,14 +12,18 @@ import re
 import logging
 
 class DataExporter:
-    def __init__(self):
+    def __init__(self, connection_pool=None):
         self.session = None
+        self.connection_pool = connection_pool  # Optional shared ConnectionPool
         self.security_manager = SecurityManager()
 
     async def _get_file_size(self, url: str) -> str:
         """Get file size in human readable format"""
         if not self.session:
-            self.session = aiohttp.ClientSession()
+            if self.connection_pool and not self.connection_pool.closed:
+                self.session = self.connection_pool.session()
+            else:
+                self.session = aiohttp.ClientSession()
             
         try:
             async with self.session.head(url, allow_redirects=True, timeout=5) as response:
@@ -31,6 +36,12 @@ class DataExporter:
         except:
             return "Unknown size"
 
+    async def close(self) -> None:
+        """Close the session used for file size lookups"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
     def _extract_metadata(self, data: Dict) -> Dict:
         """Extract metadata from JSON-LD"""
         metadata = {}
@@ -266,9 +277,8 @@ class DataExporter:
                 items.append((new_key, v))
         return dict(items)
 
-    async def export(self, data: Dict, config: Dict):
-        """Export data based on configuration"""
-        output_format = config.get('output_format', 'json')
+    def _base_filename(self, config: Dict) -> str:
+        """Output path without extension, named after the crawled URL and time"""
         output_dir = config.get('output_dir', 'scraped_output')
         url = config.get('url', 'default')
 
@@ -278,7 +288,38 @@ class DataExporter:
         if not sanitized_url:
           sanitized_url = 'default'
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        base_filename = f"{output_dir}/{sanitized_url}_{timestamp}"
+        return f"{output_dir}/{sanitized_url}_{timestamp}"
+
+    async def export_stream(self, records: AsyncIterator[Dict], config: Dict) -> List[str]:
+        """Write page records from WebCrawler.crawl_stream to JSON Lines files as they arrive
+
+        Files rotate every ``rotate_mb`` megabytes or ``rotate_records``
+        records and are compressed with ``compress`` ('gzip' or 'zstd').
+        Returns the files written.
+        """
+        self._check_export_warnings()
+        rotate_mb = config.get('rotate_mb')
+        writer = JSONLWriter(
+            self._base_filename(config),
+            max_bytes=int(rotate_mb * 1024 * 1024) if rotate_mb else None,
+            max_records=config.get('rotate_records'),
+            compression=config.get('compress')
+        )
+        try:
+            async with writer:
+                async for record in records:
+                    await writer.write(record)
+        finally:
+            # Lets the crawl checkpoint itself if writing fails part way
+            if hasattr(records, 'aclose'):
+                await records.aclose()
+        logging.info(f"Exported {writer.stats['records']} pages to {', '.join(writer.files) or 'no files'}")
+        return writer.files
+
+    async def export(self, data: Dict, config: Dict):
+        """Export data based on configuration"""
+        output_format = config.get('output_format', 'json')
+        base_filename = self._base_filename(config)
 
         if output_format == 'json' or output_format == 'all':
             await self.export_to_json(data, f"{base_filename}.json")
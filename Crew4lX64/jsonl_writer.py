@@ -0,0 +1,152 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+def encode_record(record: Any) -> bytes:
+    """Encode a record as one UTF-8 JSON line, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(record, default=str, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # e.g. non-string dict keys; fall back to the json module
+    return (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+class JSONLWriter:
+    """Append records to JSON Lines files without holding them in memory.
+
+    Records are encoded as they arrive and written in batches by a single
+    background thread, so compression and disk I/O stay off the event loop
+    and files are written in order. Output rotates to a new part once a file
+    reaches ``max_bytes`` (uncompressed) or ``max_records``; parts are named
+    ``<base>-00001.jsonl`` and so on, or ``<base>.jsonl`` without rotation.
+    ``compression`` may be 'gzip' or 'zstd' (requires the zstandard package).
+    """
+    def __init__(self, base_path: str, max_bytes: Optional[int] = None,
+                 max_records: Optional[int] = None, compression: Optional[str] = None,
+                 compression_level: Optional[int] = None, batch_bytes: int = 1024 * 1024):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == 'zstd' and not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression requires the zstandard package")
+        self.base_path = base_path
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.compression = compression
+        self.compression_level = compression_level
+        self.batch_bytes = batch_bytes
+        self.files: List[str] = []
+        self.stats = {'records': 0, 'bytes': 0, 'files': 0}
+        self._file = None
+        self._raw_file = None
+        self._file_bytes = 0
+        self._file_records = 0
+        self._batch: List[bytes] = []
+        self._batch_size = 0
+        self._pending: Optional[asyncio.Future] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jsonl-writer')
+
+    async def __aenter__(self) -> 'JSONLWriter':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def write(self, record: Any) -> None:
+        line = encode_record(record)
+        self._batch.append(line)
+        self._batch_size += len(line)
+        if self._batch_size >= self.batch_bytes:
+            await self._submit_batch()
+
+    async def flush(self) -> None:
+        """Write out everything buffered so far."""
+        await self._submit_batch()
+        await self._wait_pending()
+
+    async def close(self) -> None:
+        try:
+            await self.flush()
+        finally:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._close_file)
+            self._executor.shutdown(wait=False)
+
+    async def _submit_batch(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch, self._batch_size = self._batch, [], 0
+        # One batch in flight: the next one fills up while this one is written
+        await self._wait_pending()
+        self._pending = asyncio.get_running_loop().run_in_executor(self._executor, self._write_lines, batch)
+
+    async def _wait_pending(self) -> None:
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await pending
+
+    def _write_lines(self, lines: List[bytes]) -> None:
+        """Runs on the writer thread."""
+        for line in lines:
+            if self._file is None or self._should_rotate():
+                self._open_next_file()
+            self._file.write(line)
+            self._file_bytes += len(line)
+            self._file_records += 1
+            self.stats['records'] += 1
+            self.stats['bytes'] += len(line)
+
+    def _should_rotate(self) -> bool:
+        return bool(
+            (self.max_bytes and self._file_bytes >= self.max_bytes) or
+            (self.max_records and self._file_records >= self.max_records)
+        )
+
+    def _open_next_file(self) -> None:
+        self._close_file()
+        rotating = self.max_bytes or self.max_records
+        stem = f"{self.base_path}-{len(self.files) + 1:05d}" if rotating else self.base_path
+        path = f"{stem}.jsonl{COMPRESSION_SUFFIXES[self.compression]}"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        if self.compression == 'gzip':
+            self._file = gzip.open(path, 'wb', compresslevel=self.compression_level or 6)
+        elif self.compression == 'zstd':
+            self._raw_file = open(path, 'wb')
+            compressor = zstandard.ZstdCompressor(level=self.compression_level or 3)
+            self._file = compressor.stream_writer(self._raw_file)
+        else:
+            self._file = open(path, 'wb')
+        self._file_bytes = 0
+        self._file_records = 0
+        self.files.append(path)
+        self.stats['files'] += 1
+        logging.debug(f"Writing records to {path}")
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._raw_file is not None:
+            if not self._raw_file.closed:
+                self._raw_file.close()
+            self._raw_file = None
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'current_file': self.files[-1] if self.files else None}
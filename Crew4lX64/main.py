@@ -134,9 +134,16 @@ def setup_argument_parser():
     basic_group.add_argument('--gui', action='store_true', help='Launch GUI mode')
     basic_group.add_argument('--preset', choices=['basic', 'aggressive', 'stealth', 'api', 'archive'])
     basic_group.add_argument('--depth', type=int, default=2)
-    basic_group.add_argument('--output-format', choices=['json', 'csv', 'md', 'html', 'all'], 
-                           default='json')
+    basic_group.add_argument('--output-format', choices=['json', 'jsonl', 'csv', 'md', 'html', 'all'], 
+                           default='json',
+                           help='jsonl streams one record per page to disk as pages finish')
     basic_group.add_argument('--output-dir', default='scraped_output')
+    basic_group.add_argument('--rotate-mb', type=float,
+                           help='Start a new jsonl file after this many megabytes')
+    basic_group.add_argument('--rotate-records', type=int,
+                           help='Start a new jsonl file after this many pages')
+    basic_group.add_argument('--compress', choices=['gzip', 'zstd'],
+                           help='Compress jsonl output (zstd needs the zstandard package)')
 
     # Advanced Options
     advanced_group = parser.add_argument_group('Advanced Options')
@@ -149,6 +156,71 @@ def setup_argument_parser():
     advanced_group.add_argument('--retry-delay', type=float, default=1.0)
     advanced_group.add_argument('--proxies', help='Proxy list file')
     advanced_group.add_argument('--respect-robots', action='store_true')
+    advanced_group.add_argument('--concurrency', type=int, default=10,
+                              help='Number of pages crawled in parallel')
+    advanced_group.add_argument('--max-per-host', type=int, default=4,
+                              help='Maximum simultaneous requests to a single host')
+    advanced_group.add_argument('--use-cache', action='store_true',
+                              help='Cache fetched pages on disk and reuse them on later runs')
+    advanced_group.add_argument('--cache-dir', default='.crawler_cache')
+    advanced_group.add_argument('--cache-ttl', type=float, default=3600,
+                              help='Seconds a cached page stays fresh')
+    advanced_group.add_argument('--state-dir',
+                              help='Directory for crawl checkpoints; checkpointing is off unless '
+                                   'this or --resume is given (default crawl_state)')
+    advanced_group.add_argument('--checkpoint-interval', type=int, default=50,
+                              help='Pages crawled between checkpoints')
+    advanced_group.add_argument('--resume', action='store_true',
+                              help='Continue the last interrupted crawl from its checkpoint')
+    advanced_group.add_argument('--max-file-size', type=int,
+                              help='Skip responses larger than this many bytes (default 10 MB)')
+    advanced_group.add_argument('--sitemaps', action='store_true',
+                              help='Also crawl the URLs listed in the site\'s sitemaps '
+                                   '(from robots.txt or /sitemap.xml; needs depth > 1)')
+    advanced_group.add_argument('--max-sitemap-urls', type=int, default=50000,
+                              help='Maximum sitemap URLs scheduled per seed')
+    advanced_group.add_argument('--detect-duplicates', action='store_true',
+                              help='Detect near-duplicate pages by the SimHash of their main text')
+    advanced_group.add_argument('--duplicate-distance', type=int, default=3,
+                              help='Maximum differing SimHash bits for two pages to count as duplicates')
+    advanced_group.add_argument('--duplicate-action', choices=['mark', 'skip'], default='mark',
+                              help='Mark near-duplicates with duplicate_of, or leave them out of the results')
+    advanced_group.add_argument('--no-follow-duplicates', action='store_true',
+                              help='Do not follow links found on near-duplicate pages')
+    advanced_group.add_argument('--focus', metavar='TOPIC',
+                              help='Focused crawl: follow the links most relevant to TOPIC first')
+    advanced_group.add_argument('--min-relevance', type=float, default=0.0,
+                              help='With --focus, skip links scoring below this relevance (0-1)')
+    advanced_group.add_argument('--honor-nofollow', action='store_true',
+                              help='Do not follow links marked rel=nofollow')
+    advanced_group.add_argument('--max-pages', type=int,
+                              help='Stop the crawl after this many page requests')
+    advanced_group.add_argument('--max-bytes', type=int,
+                              help='Stop the crawl after downloading this many bytes')
+    advanced_group.add_argument('--max-time', type=float,
+                              help='Stop the crawl after this many seconds')
+    advanced_group.add_argument('--max-requests-per-domain', type=int,
+                              help='Maximum page requests to any one domain')
+    advanced_group.add_argument('--max-bytes-per-domain', type=int,
+                              help='Maximum bytes downloaded from any one domain')
+    advanced_group.add_argument('--max-time-per-domain', type=float,
+                              help='Stop requesting a domain this many seconds after its first request')
+    advanced_group.add_argument('--max-error-rate', type=float,
+                              help='Stop crawling a domain once this fraction of its requests fail (0-1)')
+    advanced_group.add_argument('--keepalive-timeout', type=float, default=30.0,
+                              help='Seconds idle connections are kept open for reuse')
+    advanced_group.add_argument('--parse-workers', type=int, default=0,
+                              help='Processes used to parse and extract pages '
+                                   '(0 parses on the main thread)')
+    advanced_group.add_argument('--visited-backend', choices=['exact', 'fingerprint', 'bloom'],
+                              default='exact',
+                              help='How visited URLs are stored: exact strings, 64-bit '
+                                   'fingerprints, or a Bloom filter (smallest, never expires)')
+    advanced_group.add_argument('--bloom-error-rate', type=float, default=0.001,
+                              help='False-positive rate for --visited-backend bloom')
+    advanced_group.add_argument('--robots-cache',
+                              help='File to persist robots.txt rules between runs '
+                                   '(defaults to the cache directory with --use-cache)')
 
     # Display Options
     display_group = parser.add_argument_group('Display Options')
@@ -204,6 +276,11 @@ def run_crawler_sync(crawler, data_exporter, config):
                 use_browser=config.get('browser', False),
                 respect_robots=config.get('respect_robots', True),
                 rate_limit=config.get('rate_limit', 1.0),
+                burst_size=config.get('burst_size', 3),
+                domain_delays=config.get('domain_specific_delays'),
+                adaptive_rate_limiting=config.get('adaptive_rate_limiting', False),
+                backoff_factor=config.get('backoff_factor', 1.5),
+                max_backoff=config.get('max_backoff', 300),
                 use_proxies=config.get('use_proxies', False),
                 headless=config.get('headless', True),
                 wait_time=config.get('wait_time', 2.0),
@@ -211,11 +288,55 @@ def run_crawler_sync(crawler, data_exporter, config):
                 retry_count=config.get('retry_count', 3),
                 retry_delay=config.get('retry_delay', 1.0),
                 memory_limit=config.get('memory_limit', 0),
-                cache_manager=config.get('cache_manager')
+                max_concurrency=config.get('concurrency', 10),
+                max_per_host=config.get('max_per_host', 4),
+                cache_manager=config.get('cache_manager'),
+                robots_cache_file=config.get('robots_cache'),
+                checkpoint_dir=config.get('state_dir') or ('crawl_state' if config.get('resume') else None),
+                checkpoint_interval=config.get('checkpoint_interval', 50),
+                visited_backend=config.get('visited_backend', 'exact'),
+                visited_error_rate=config.get('bloom_error_rate', 0.001),
+                parse_workers=config.get('parse_workers', 0),
+                max_file_size=config.get('max_file_size'),
+                blocked_extensions=config.get('blocked_extensions'),
+                keepalive_timeout=config.get('keepalive_timeout', 30.0),
+                use_sitemaps=config.get('sitemaps', False),
+                max_sitemap_urls=config.get('max_sitemap_urls'),
+                detect_duplicates=config.get('detect_duplicates', False),
+                duplicate_distance=config.get('duplicate_distance', 3),
+                duplicate_action=config.get('duplicate_action', 'mark'),
+                follow_duplicate_links=not config.get('no_follow_duplicates', False),
+                honor_nofollow=config.get('honor_nofollow', False),
+                focus_topic=config.get('focus'),
+                min_relevance=config.get('min_relevance'),
+                max_depth=config.get('max_depth'),
+                max_pages=config.get('max_pages'),
+                max_bytes=config.get('max_bytes'),
+                max_time=config.get('max_time'),
+                max_requests_per_domain=config.get('max_requests_per_domain'),
+                max_bytes_per_domain=config.get('max_bytes_per_domain'),
+                max_time_per_domain=config.get('max_time_per_domain'),
+                max_error_rate=config.get('max_error_rate')
             )
+            # Exporter HEAD requests reuse the crawler's connections
+            data_exporter.connection_pool = crawler.connection_pool
 
             if config.get('url'):
-                results = await crawler.crawl(config['url'], depth=config.get('depth', 2))
+                if config.get('output_format') == 'jsonl':
+                    # Write pages as they finish instead of building the whole tree
+                    return await data_exporter.export_stream(
+                        crawler.crawl_stream(
+                            config['url'],
+                            depth=config.get('depth', 2),
+                            resume=config.get('resume', False)
+                        ),
+                        config
+                    )
+                results = await crawler.crawl(
+                    config['url'],
+                    depth=config.get('depth', 2),
+                    resume=config.get('resume', False)
+                )
                 await data_exporter.export(results, config)
                 return results
             return None
@@ -232,6 +353,8 @@ def run_crawler_sync(crawler, data_exporter, config):
                 
                 # Clean up tasks first
                 await cleanup_tasks(loop)
+
+                await data_exporter.close()
                 
                 # Then close the crawler (which handles session cleanup)
                 await crawler.close()
@@ -248,8 +371,15 @@ def run_crawler_sync(crawler, data_exporter, config):
                     except Exception:
                         pass
 
+    main_task = loop.create_task(run_crawler())
     try:
-        return loop.run_until_complete(run_crawler())
+        return loop.run_until_complete(main_task)
+    except KeyboardInterrupt:
+        # Stop the workers and let the crawl save its checkpoint
+        crawler.terminate_crawl = True
+        main_task.cancel()
+        loop.run_until_complete(asyncio.gather(main_task, return_exceptions=True))
+        raise
     except Exception as e:
         logging.exception("Error during crawl operation")
         raise
@@ -325,8 +455,13 @@ def main(config=None, log_function=None):
 
         crawler = WebCrawler()
         data_exporter = DataExporter()
-        cache_manager = CacheManager() if config.get('use_cache', False) else None
+        cache_manager = CacheManager(
+            cache_dir=config.get('cache_dir', '.crawler_cache'),
+            default_ttl=config.get('cache_ttl', 3600)
+        ) if config.get('use_cache', False) else None
         config['cache_manager'] = cache_manager
+        if cache_manager and not config.get('robots_cache'):
+            config['robots_cache'] = os.path.join(cache_manager.cache_dir, 'robots_cache.json')
 
         # Show configuration summary
         if spinner:
@@ -0,0 +1,90 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def simhash(text: str, shingle_size: int = 3, min_tokens: int = 30) -> Optional[int]:
+    """64-bit SimHash of a text's word shingles, or None if it is too short.
+
+    Texts that share most of their shingles get fingerprints that differ in
+    only a few bits, so near-duplicates can be found by Hamming distance.
+    Very short texts (navigation-only pages) are not fingerprinted because
+    they would all look alike.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < max(min_tokens, shingle_size):
+        return None
+    shingles = Counter(
+        ' '.join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)
+    )
+    digests = b''.join(
+        hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles
+    )
+    # One row of 64 bits per shingle; each bit votes with the shingle's count
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    weights = np.fromiter(shingles.values(), dtype=np.int64, count=len(shingles))
+    mask = 2 * (weights @ bits) > weights.sum()
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+class NearDuplicateIndex:
+    """Finds pages whose SimHash is within max_distance bits of an earlier page.
+
+    The 64-bit fingerprint is split into max_distance + 1 bands; two
+    fingerprints that differ in at most max_distance bits must agree exactly
+    on at least one band, so each band is a hash table lookup and only the
+    fingerprints sharing a band are compared bit by bit.
+    """
+    def __init__(self, max_distance: int = 3):
+        if not 0 <= max_distance < 64:
+            raise ValueError("max_distance must be between 0 and 63")
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        edges = [64 * i // bands for i in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._bands]
+        self._fingerprints: List[int] = []
+        self._urls: List[str] = []
+        self.stats = {'checked': 0, 'duplicates': 0}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """URL of an indexed page within max_distance bits, if any."""
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            for entry in table.get((fingerprint >> shift) & mask, ()):
+                if hamming_distance(fingerprint, self._fingerprints[entry]) <= self.max_distance:
+                    return self._urls[entry]
+        return None
+
+    def add(self, url: str, fingerprint: int) -> Optional[str]:
+        """Index a page, or return the URL of the page it duplicates.
+
+        Duplicates are not indexed, so every match points at the first copy.
+        """
+        self.stats['checked'] += 1
+        original = self.find(fingerprint)
+        if original is not None:
+            self.stats['duplicates'] += 1
+            return original
+        entry = len(self._fingerprints)
+        self._fingerprints.append(fingerprint)
+        self._urls.append(url)
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            table.setdefault((fingerprint >> shift) & mask, []).append(entry)
+        return None
+
+    def get_stats(self) -> Dict:
+        checked = self.stats['checked']
+        return {
+            **self.stats,
+            'indexed': len(self),
+            'max_distance': self.max_distance,
+            'dedup_ratio': self.stats['duplicates'] / checked if checked else 0.0
+        }
@@ -0,0 +1,282 @@
+import re
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlparse, urlsplit
+from Crew4lX64.content_extractor import ContentExtractor
+from Crew4lX64.near_duplicates import simhash
+from Crew4lX64.parsed_document import ParsedDocument
+from Crew4lX64.url_canonicalizer import URLCanonicalizer
+from Crew4lX64.url_filter import GitHubPaths, split_http_url
+
+class LinkResolver:
+    """Resolves hrefs against one base URL, which is split only once.
+
+    Absolute, scheme-relative, root-relative, query-only and plain relative
+    hrefs are joined by string concatenation. Hrefs with dot segments, and
+    anything else, go through urljoin.
+    """
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        path = parts.path or '/'
+        self.path = self.origin + path
+        self.directory = self.origin + path[:path.rfind('/') + 1]
+        self.simple = parts.scheme in ('http', 'https') and bool(parts.netloc)
+
+    def resolve(self, href: str) -> Optional[str]:
+        try:
+            if href.startswith(('http://', 'https://')):
+                return href
+            if self.simple and not _has_scheme(href) and '/.' not in href:
+                if href.startswith('//'):
+                    return f"{self.scheme}:{href}"
+                if href.startswith('/'):
+                    return self.origin + href
+                if href.startswith('?'):
+                    return self.path + href
+                if href and not href.startswith(('#', '.')):
+                    return self.directory + href
+            return urljoin(self.base_url, href)
+        except ValueError:
+            # e.g. an invalid IPv6 host in the href
+            return None
+
+_SCHEME_RE = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:')
+
+def _has_scheme(href: str) -> bool:
+    return _SCHEME_RE.match(href) is not None
+
+class PageProcessor:
+    """CPU-bound part of crawling a page: parse it once and run every extractor.
+
+    It holds only picklable settings, so the crawler can run ``process`` in
+    worker processes (see ``process_in_worker``); the ContentExtractor is
+    created lazily in each process unless one is passed in. The main text's
+    SimHash is only computed with ``detect_duplicates``.
+    """
+    def __init__(self, canonicalizer: Optional[URLCanonicalizer] = None,
+                 github_base_paths: Optional[Dict[str, str]] = None,
+                 extractor: Optional[ContentExtractor] = None,
+                 detect_duplicates: bool = False):
+        self.canonicalizer = canonicalizer or URLCanonicalizer()
+        self.detect_duplicates = detect_duplicates
+        self.github_base_paths = github_base_paths or {}
+        self.github = GitHubPaths(self.github_base_paths)
+        self._extractor = extractor
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_extractor'] = None
+        return state
+
+    @property
+    def extractor(self) -> ContentExtractor:
+        if self._extractor is None:
+            self._extractor = ContentExtractor()
+        return self._extractor
+
+    def process(self, html_content: str, url: str) -> Dict:
+        """Return the content, media, links, rel=canonical URL and text SimHash of a page."""
+        # Parse once and share the tree across all extractors
+        document = ParsedDocument(html_content, url)
+        content = self.extractor.extract_document(document)
+        media = self.extract_media(document, url)
+        links = self.extract_links(document, url)
+        canonical_url = self.find_canonical_url(document, url)
+
+        # Main content extraction strips boilerplate from the shared tree,
+        # so it has to run after media and link extraction
+        main_content = self.extractor.extract_main_content(document)
+        if main_content:
+            content['text'] = main_content.get('text', '')
+            content['html'] = main_content.get('html', '')
+
+        return {
+            'content': content,
+            'media': media,
+            'links': links,
+            'canonical_url': canonical_url,
+            # Fingerprint of the main text for near-duplicate detection
+            'simhash': simhash(content.get('text') or '') if self.detect_duplicates else None
+        }
+
+    def extract_media(self, html: Union[str, ParsedDocument], base_url: str) -> Dict:
+        """Extract media elements from HTML"""
+        soup = ParsedDocument.ensure(html, base_url).soup
+        media = {
+            'images': [],
+            'videos': [],
+            'documents': []
+        }
+
+        # Extract images
+        for img in soup.find_all('img', src=True):
+            if any(x in img['src'].lower() for x in ['tracking', 'analytics', 'pixel', 'facebook.com/tr']):
+                continue
+            media['images'].append({
+                'url': urljoin(base_url, img['src']),
+                'alt': img.get('alt', ''),
+                'title': img.get('title', '')
+            })
+
+        # Extract videos
+        video_patterns = [
+            ('youtube', r'(?:youtube\.com|youtu\.be)'),
+            ('vimeo', r'vimeo\.com'),
+            ('default', r'\.(?:mp4|webm|ogg)$')
+        ]
+
+        for video in soup.find_all(['video', 'iframe', 'source']):
+            src = video.get('src', '')
+            if not src or any(x in src.lower() for x in ['gtm', 'analytics', 'tracking', 'pixel']):
+                continue
+                
+            video_type = 'default'
+            for vtype, pattern in video_patterns:
+                if re.search(pattern, src, re.I):
+                    video_type = vtype
+                    break
+
+            media['videos'].append({
+                'url': urljoin(base_url, src),
+                'type': video_type,
+                'title': video.get('title', '')
+            })
+
+        # Extract documents
+        doc_extensions = ['.pdf', '.doc', '.docx', '.xls', '.xlsx']
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            if any(href.lower().endswith(ext) for ext in doc_extensions):
+                media['documents'].append({
+                    'url': urljoin(base_url, href),
+                    'text': link.get_text(strip=True),
+                    'type': href.split('.')[-1].lower()
+                })
+
+        return media
+
+    def extract_links(self, html: Union[str, ParsedDocument], base_url: str) -> List[Dict]:
+        """Extract links from HTML with special handling for GitHub pages and arXiv links
+
+        Anchors are read from the lxml tree rather than the soup, relative
+        hrefs are resolved against the page's <base href> (parsed once per
+        page), and links marked rel=nofollow, or on pages whose robots meta
+        tag says nofollow, get 'nofollow': True.
+        """
+        document = ParsedDocument.ensure(html, base_url)
+        anchors, base_href, page_nofollow = self._read_anchors(document)
+        resolver = LinkResolver(base_url)
+        if base_href:
+            base = resolver.resolve(base_href)
+            if base and base.startswith(('http://', 'https://')):
+                resolver = LinkResolver(base)
+
+        links = []
+        base_domain = urlparse(base_url).netloc
+        is_github = 'github.com' in base_domain
+
+        for href, text, title, rel in anchors:
+            if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                continue
+
+            abs_url = resolver.resolve(href)
+            if not abs_url or not abs_url.startswith(('http://', 'https://')):
+                continue
+            # Links keep the form they were found in (fragments are never
+            # requested); the crawler canonicalizes them only as dedup keys
+            abs_url = abs_url.partition('#')[0]
+            parts = split_http_url(abs_url)
+            if parts is None:
+                continue
+
+            domain, path = parts
+            link_type = 'internal' if domain == base_domain else 'external'
+
+            # Handle arXiv-specific links
+            if 'arxiv.org' in domain:
+                link_type = 'arxiv'
+
+            # Special handling for GitHub links
+            if is_github:
+                # Skip certain GitHub links
+                if self.github.skip(path):
+                    continue
+
+                # Determine GitHub-specific link type
+                path_type = self.github.path_type(path)
+                if path_type:
+                    link_type = f'github_{path_type}'
+
+            link = {
+                'url': abs_url,
+                'text': text,
+                'type': link_type,
+                'title': title
+            }
+            if page_nofollow or (rel and 'nofollow' in rel.lower().split()):
+                link['nofollow'] = True
+            links.append(link)
+
+        return links
+
+    @staticmethod
+    def _read_anchors(document: ParsedDocument) -> Tuple[List[Tuple[str, str, str, str]], Optional[str], bool]:
+        """(href, text, title, rel) of every <a href>, the first <base href>,
+        and whether a robots meta tag says nofollow, in one pass over the tree.
+
+        Falls back to the soup if lxml could not parse the page.
+        """
+        anchors = []
+        base_href = None
+        nofollow = False
+        tree = document.tree
+        if tree is not None:
+            for element in tree.iter('a', 'base', 'meta'):
+                tag = element.tag
+                if tag == 'a':
+                    href = element.get('href')
+                    if href is not None:
+                        text = ''.join(part.strip() for part in element.itertext())
+                        anchors.append((href.strip(), text, element.get('title', ''), element.get('rel')))
+                elif tag == 'base':
+                    if base_href is None and element.get('href'):
+                        base_href = element.get('href').strip()
+                elif (element.get('name') or '').lower() == 'robots':
+                    nofollow = nofollow or 'nofollow' in (element.get('content') or '').lower()
+            return anchors, base_href, nofollow
+
+        soup = document.soup
+        for a in soup.find_all('a', href=True):
+            rel = a.get('rel')
+            anchors.append((a['href'].strip(), a.get_text(strip=True), a.get('title', ''),
+                            ' '.join(rel) if isinstance(rel, list) else rel))
+        base = soup.find('base', href=True)
+        base_href = base['href'].strip() if base else None
+        robots = soup.find('meta', attrs={'name': re.compile('^robots$', re.I)})
+        nofollow = bool(robots and 'nofollow' in (robots.get('content') or '').lower())
+        return anchors, base_href, nofollow
+
+    def find_canonical_url(self, document: ParsedDocument, url: str) -> Optional[str]:
+        """Return the page's rel=canonical URL if it names a different page on the same host."""
+        link = document.soup.find('link', rel='canonical', href=True)
+        if link is None:
+            return None
+        canonical_url = urljoin(url, link['href'].strip()).partition('#')[0]
+        canonicalize = self.canonicalizer.canonicalize
+        if (canonicalize(canonical_url) == canonicalize(url)
+                or urlparse(canonical_url).netloc.lower() != urlparse(url).netloc.lower()):
+            return None
+        return canonical_url
+
+# Set in each worker process by init_worker
+_worker_processor: Optional[PageProcessor] = None
+
+def init_worker(processor: PageProcessor) -> None:
+    global _worker_processor
+    _worker_processor = processor
+
+def process_in_worker(html_content: str, url: str) -> Dict:
+    """ProcessPoolExecutor entry point; requires init_worker as the initializer."""
+    return _worker_processor.process(html_content, url)
@@ -0,0 +1,46 @@
+import logging
+from typing import Optional, Union
+from bs4 import BeautifulSoup
+from lxml import html
+
+# The text is re-encoded as UTF-8 for lxml, so tell it the encoding instead of
+# letting it guess (it assumes Latin-1 when the page declares no charset)
+_UTF8_PARSER = html.HTMLParser(encoding='utf-8')
+
+class ParsedDocument:
+    """HTML page parsed at most once and shared by all extractors.
+
+    The BeautifulSoup tree (built with the lxml parser) and the raw lxml tree
+    are both created lazily on first access, so callers that only need one of
+    them never pay for the other.
+    """
+    def __init__(self, html_content: str, url: Optional[str] = None):
+        self.html = html_content
+        self.url = url
+        self._soup = None
+        self._tree = None
+        self._tree_failed = False
+
+    @classmethod
+    def ensure(cls, document: Union[str, 'ParsedDocument'], url: Optional[str] = None) -> 'ParsedDocument':
+        """Wrap raw HTML in a ParsedDocument, passing existing documents through."""
+        if isinstance(document, ParsedDocument):
+            return document
+        return cls(document, url)
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, 'lxml')
+        return self._soup
+
+    @property
+    def tree(self):
+        """lxml element tree, or None if the page could not be parsed."""
+        if self._tree is None and not self._tree_failed:
+            try:
+                self._tree = html.fromstring(self.html.encode('utf-8'), parser=_UTF8_PARSER)
+            except Exception as e:
+                logging.error(f"Failed to parse HTML with lxml: {str(e)}")
+                self._tree_failed = True
+        return self._tree
@@ -36,7 +36,8 @@ class ProxyManager:
     """Advanced proxy manager with health monitoring and rotation strategies."""
     def __init__(self, proxies: Optional[List[str]] = None, 
                  min_proxy_score: float = 0.7,
-                 rotation_strategy: ProxyRotationStrategy = ProxyRotationStrategy.WEIGHTED_RANDOM):
+                 rotation_strategy: ProxyRotationStrategy = ProxyRotationStrategy.WEIGHTED_RANDOM,
+                 timeout: float = 10, connection_pool=None):
         self.proxies: List[str] = []
         self.proxy_stats: Dict[str, ProxyStats] = {}
         self.current_index: int = 0
@@ -45,7 +46,8 @@ class ProxyManager:
         self.rotation_strategy = rotation_strategy
         self.health_check_interval = 300  # 5 minutes
         self.max_consecutive_failures = 3
-        self.verification_timeout = 10
+        self.verification_timeout = timeout
+        self.connection_pool = connection_pool  # Optional shared ConnectionPool
         
         if proxies:
             self.add_proxies(proxies)
@@ -206,7 +208,11 @@ class ProxyManager:
             start_time = time.time()
             timeout = aiohttp.ClientTimeout(total=self.verification_timeout)
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            if self.connection_pool:
+                session = self.connection_pool.session(timeout=timeout)
+            else:
+                session = aiohttp.ClientSession(timeout=timeout)
+            async with session:
                 try:
                     async with session.get('https://httpbin.org/ip', proxy=proxy) as response:
                         if response.status == 200:
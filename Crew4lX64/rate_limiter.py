@@ -1,67 +1,313 @@
 import asyncio
+import logging
+import re
 import time
-from collections import defaultdict
-from typing import Dict
+from collections import defaultdict, deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+# URL categories that can be given their own delay in domain_specific_delays
+CATEGORY_PATTERNS = {
+    'api_endpoints': re.compile(r'^api\.|/api(/|$)|/v\d+/|\.json$'),
+    'search_pages': re.compile(r'/search|[?&](q|query|search)=')
+}
 
 class DomainStats:
     def __init__(self):
         self.last_request = 0
         self.total_requests = 0
-        self.request_times = []
+        self.request_times: Deque[float] = deque()  # Request times in the last minute
         self.error_count = 0
+        # Token bucket state; tokens go negative while requests are queued
+        self.tokens: Optional[float] = None
+        self.updated = 0.0
+        self.interval = 0.0  # Spacing used for the last request
+        # Adaptive (AIMD) state: request rate relative to the configured one
+        self.rate_scale = 1.0
+        self.latency_ewma: Optional[float] = None
+        self.latency_baseline: Optional[float] = None
+        self.last_decrease = 0.0
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
 
 class RateLimiter:
-    def __init__(self, requests_per_second: float = 1.0, burst_size: int = 3):
+    def __init__(self, requests_per_second: float = 1.0, burst_size: int = 3,
+                 domain_delays: Optional[Dict[str, float]] = None,
+                 adaptive: bool = False, backoff_factor: float = 1.5,
+                 max_backoff: float = 300, max_speedup: float = 2.0):
         self.rate = requests_per_second
         self.burst_size = burst_size
+        # AIMD controller: while latency is stable each success raises a
+        # domain's rate by increase_step (up to max_speedup times the
+        # configured rate); 429/503 or rising latency divides it by
+        # backoff_factor, never spacing requests more than max_backoff apart.
+        self.adaptive = adaptive
+        self.backoff_factor = max(1.0, backoff_factor)
+        self.max_backoff = max_backoff
+        self.max_speedup = max(1.0, max_speedup)
+        self.increase_step = 0.05
+        self.latency_threshold = 2.0  # Back off when latency doubles
         self.domains: Dict[str, DomainStats] = defaultdict(DomainStats)
         self.last_cleanup = time.time()
         self.cleanup_interval = 3600  # 1 hour
+        self.default_delay: Optional[float] = None
+        self.domain_delays: Dict[str, float] = {}  # domain -> seconds between requests
+        self.category_delays: Dict[str, float] = {}  # category -> seconds between requests
+        self.crawl_delays: Dict[str, float] = {}  # domain -> robots.txt Crawl-delay
+        # URL -> monotonic time of a slot taken by reserve() and not yet used by wait()
+        self._reservations: Dict[str, float] = {}
+        if domain_delays:
+            self.set_domain_delays(domain_delays)
+
+    def set_domain_delays(self, delays: Dict[str, float]) -> None:
+        """Apply delays in the format of the ``domain_specific_delays`` config.
+
+        Keys are domain names (which also cover their subdomains), ``default``
+        (replaces the global rate) or a category from CATEGORY_PATTERNS such
+        as ``api_endpoints`` or ``search_pages``.
+        """
+        for key, delay in delays.items():
+            if key == 'default':
+                self.default_delay = float(delay)
+            elif key in CATEGORY_PATTERNS:
+                self.category_delays[key] = float(delay)
+            else:
+                self.domain_delays[key.lower()] = float(delay)
+
+    def set_crawl_delay(self, domain: str, delay: Optional[float]) -> None:
+        """Record a robots.txt Crawl-delay; it acts as a floor for the domain."""
+        if delay:
+            self.crawl_delays[domain.lower()] = float(delay)
+        else:
+            self.crawl_delays.pop(domain.lower(), None)
+
+    def get_delay(self, url: str) -> float:
+        """Minimum number of seconds between requests for the URL's domain."""
+        parsed = urlparse(url)
+        domain = parsed.netloc.lower()
+
+        delay = None
+        if self.domain_delays:
+            host = domain.split(':')[0]
+            while host:
+                if host in self.domain_delays:
+                    delay = self.domain_delays[host]
+                    break
+                host = host.partition('.')[2]
+        if delay is None:
+            delay = self.default_delay if self.default_delay is not None else 1.0 / self.rate
+
+        if self.category_delays:
+            target = domain + parsed.path + ('?' + parsed.query if parsed.query else '')
+            for category, category_delay in self.category_delays.items():
+                if category_delay > delay and CATEGORY_PATTERNS[category].search(target):
+                    delay = category_delay
+
+        return max(delay, self.crawl_delays.get(domain, 0.0))
 
     async def wait(self, url: str) -> None:
-        """Wait appropriate time before making request to respect rate limits."""
-        try:
-            from urllib.parse import urlparse
-            domain = urlparse(url).netloc
-            
-            # Cleanup old domain stats periodically
-            current_time = time.time()
-            if current_time - self.last_cleanup > self.cleanup_interval:
-                self._cleanup_old_domains()
-                self.last_cleanup = current_time
-
-            stats = self.domains[domain]
-            time_since_last = current_time - stats.last_request
-
-            # Calculate required delay
-            if time_since_last < (1.0 / self.rate):
-                delay = (1.0 / self.rate) - time_since_last
-                
-                # Apply burst allowance
-                if stats.total_requests < self.burst_size:
-                    delay = delay / 2
-                
-                await asyncio.sleep(delay)
+        """Wait appropriate time before making request to respect rate limits.
 
-            # Update stats
-            stats.last_request = time.time()
-            stats.total_requests += 1
-            stats.request_times.append(current_time)
-            
-            # Keep only recent request times
-            cutoff = current_time - 60  # Last minute
-            stats.request_times = [t for t in stats.request_times if t > cutoff]
+        Each domain has a token bucket holding up to ``burst_size`` requests
+        that refills at one token per ``get_delay(url)`` seconds. A caller
+        reserves its slot before sleeping, so concurrent callers for the same
+        domain queue up one interval apart instead of all firing together.
+        If the URL's slot was already taken with ``reserve``, only the rest
+        of that slot's delay (usually none) is waited.
+        """
+        slot = self._reservations.pop(url, None)
+        if slot is not None:
+            delay = slot - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return
 
+        try:
+            stats, delay = self._take_slot(url)
         except Exception as e:
             print(f"Rate limiting error: {str(e)}")
             await asyncio.sleep(1.0 / self.rate)  # Default delay on error
+            return
+
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Give the reserved slot back to the next waiter
+                stats.tokens += 1
+                raise
+
+    def reserve(self, url: str) -> float:
+        """Take the URL's next slot now without sleeping; returns its delay.
+
+        The following ``wait(url)`` uses this slot instead of taking another,
+        so a crawl frontier can claim a slot when it hands a URL out. Call
+        ``release`` if the request is never made.
+        """
+        _, delay = self._take_slot(url)
+        self._reservations[url] = time.monotonic() + delay
+        return delay
+
+    def release(self, url: str) -> None:
+        """Give back a slot taken by ``reserve`` that ``wait`` has not used."""
+        if self._reservations.pop(url, None) is not None:
+            stats = self.domains.get(urlparse(url).netloc)
+            if stats is not None and stats.tokens is not None:
+                stats.tokens += 1
+
+    def _take_slot(self, url: str) -> Tuple[DomainStats, float]:
+        domain = urlparse(url).netloc
+        interval = self.get_delay(url)
+
+        # Cleanup old domain stats periodically
+        current_time = time.time()
+        if current_time - self.last_cleanup > self.cleanup_interval:
+            self._cleanup_old_domains()
+            self.last_cleanup = current_time
+
+        stats = self.domains[domain]
+        if self.adaptive:
+            interval = self._adaptive_interval(url, stats, interval)
+        stats.interval = interval
+        delay = self._reserve(stats, interval, time.monotonic())
+
+        # Update stats
+        stats.last_request = current_time + delay
+        stats.total_requests += 1
+        stats.request_times.append(current_time + delay)
+
+        # Keep only recent request times
+        cutoff = current_time - 60  # Last minute
+        while stats.request_times and stats.request_times[0] <= cutoff:
+            stats.request_times.popleft()
+        return stats, delay
+
+    def ready_in(self, url: str) -> float:
+        """Seconds until a request to the URL's domain would go out without waiting.
+
+        Unlike ``wait`` this reserves nothing; a crawl frontier uses it to
+        hand out URLs only for domains whose next slot is due.
+        """
+        stats = self.domains.get(urlparse(url).netloc)
+        if stats is None or stats.tokens is None:
+            return 0.0
+        now = time.monotonic()
+        interval = stats.interval
+        if interval <= 0:
+            return max(0.0, stats.updated - now)
+        tokens = min(max(1, self.burst_size), stats.tokens + (now - stats.updated) / interval)
+        return max(0.0, (1 - tokens) * interval)
+
+    def _reserve(self, stats: DomainStats, interval: float, now: float) -> float:
+        """Take a token from the domain's bucket and return how long to wait for it."""
+        capacity = max(1, self.burst_size)
+        if stats.tokens is None:
+            stats.tokens = float(capacity)
+        elif interval > 0:
+            stats.tokens = min(capacity, stats.tokens + (now - stats.updated) / interval)
+        else:
+            stats.tokens = float(capacity)
+        stats.updated = now
+        stats.tokens -= 1
+        if stats.tokens >= 0:
+            return 0.0
+        return -stats.tokens * interval
+
+    def _adaptive_interval(self, url: str, stats: DomainStats, interval: float) -> float:
+        """Scale the configured interval by the domain's AIMD rate, within limits."""
+        adjusted = min(interval / stats.rate_scale, max(self.max_backoff, interval))
+        return max(adjusted, self.crawl_delays.get(urlparse(url).netloc.lower(), 0.0))
+
+    def record_response(self, url: str, status: int, latency: Optional[float] = None,
+                        retry_after: Union[str, float, None] = None) -> None:
+        """Feed a response back into the limiter.
+
+        A Retry-After header always pauses the domain. With ``adaptive`` on,
+        429/503 or latency rising past ``latency_threshold`` times the baseline
+        back off multiplicatively, and other successes speed up additively.
+        """
+        domain = urlparse(url).netloc
+        stats = self.domains[domain]
+        now = time.monotonic()
+
+        if isinstance(retry_after, str):
+            retry_after = parse_retry_after(retry_after)
+        if retry_after:
+            self._pause(stats, min(retry_after, self.max_backoff), now)
+
+        if status in (429, 503):
+            stats.error_count += 1
+            self._decrease(domain, stats, now, force=True)
+            return
+        if status >= 500:
+            stats.error_count += 1
+        if not self.adaptive or latency is None or status >= 400:
+            return
+
+        if stats.latency_ewma is None:
+            stats.latency_ewma = latency
+        else:
+            stats.latency_ewma = 0.8 * stats.latency_ewma + 0.2 * latency
+        if stats.latency_baseline is None or stats.latency_ewma < stats.latency_baseline:
+            stats.latency_baseline = stats.latency_ewma
+
+        if stats.latency_ewma > stats.latency_baseline * self.latency_threshold:
+            self._decrease(domain, stats, now)
+        else:
+            stats.rate_scale = min(self.max_speedup, stats.rate_scale + self.increase_step)
+
+    def _decrease(self, domain: str, stats: DomainStats, now: float, force: bool = False) -> None:
+        if not self.adaptive:
+            return
+        # Latency-driven backoff at most once per interval so one slow burst
+        # does not collapse the rate
+        if not force and now - stats.last_decrease < max(1.0, stats.interval):
+            return
+        stats.last_decrease = now
+        min_scale = (1.0 / self.rate) / self.max_backoff if self.max_backoff else 0.0
+        stats.rate_scale = max(min_scale, stats.rate_scale / self.backoff_factor)
+        # Let latency settle at the new rate before judging it again
+        stats.latency_baseline = stats.latency_ewma
+        logging.info(f"Backing off {domain}: rate scaled to {stats.rate_scale:.2f}x")
+
+    def _pause(self, stats: DomainStats, seconds: float, now: float) -> None:
+        """Hold back the domain's next request for the given number of seconds."""
+        if stats.tokens is None:
+            stats.tokens = float(max(1, self.burst_size))
+        stats.tokens = min(stats.tokens, 1.0)
+        stats.updated = max(stats.updated, now + seconds)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-domain request counts and current spacing."""
+        cutoff = time.time() - 60
+        return {
+            domain: {
+                'total_requests': stats.total_requests,
+                'requests_last_minute': sum(1 for t in stats.request_times if t > cutoff),
+                'errors': stats.error_count,
+                'interval': stats.interval,
+                'rate_scale': stats.rate_scale,
+                'latency_ewma': stats.latency_ewma
+            }
+            for domain, stats in self.domains.items()
+        }
 
     def _cleanup_old_domains(self) -> None:
         """Remove stats for domains not accessed recently."""
         current_time = time.time()
         cutoff = current_time - self.cleanup_interval
-        self.domains = {
-            domain: stats
-            for domain, stats in self.domains.items()
-            if stats.last_request > cutoff
-        }
+        for domain in [d for d, stats in self.domains.items() if stats.last_request <= cutoff]:
+            del self.domains[domain]
@@ -0,0 +1,103 @@
+import re
+from typing import Dict, List
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+_URL_WORD_SPLIT = re.compile(r'[^0-9A-Za-z]+')
+
+def url_words(url: str) -> str:
+    """Words in a URL's path and query, e.g. '/ml/deep-learning?p=2' -> 'ml deep learning p 2'."""
+    path = url.split('://', 1)[-1]
+    path = path[path.find('/'):] if '/' in path else ''
+    return ' '.join(word for word in _URL_WORD_SPLIT.split(path) if word)
+
+class RelevanceScorer:
+    """Scores candidate links by their relevance to a topic query.
+
+    Each link gets a weighted sum of three cosine similarities to the topic:
+    its anchor text and title, the words in its URL, and the text of the
+    page it was found on. Texts are hashed into a fixed feature space (no
+    vocabulary to fit), weighted by sublinear TF and an IDF learned from
+    the pages seen so far, and a page's whole link list is compared to the
+    topic in one sparse matrix product.
+    """
+    def __init__(self, topic: str, anchor_weight: float = 0.5, url_weight: float = 0.2,
+                 parent_weight: float = 0.3, n_features: int = 2 ** 18):
+        if not topic or not topic.strip():
+            raise ValueError("A focused crawl needs a non-empty topic")
+        self.topic = topic
+        total = anchor_weight + url_weight + parent_weight
+        self.weights = (anchor_weight / total, url_weight / total, parent_weight / total)
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features, ngram_range=(1, 2), stop_words='english',
+            alternate_sign=False, norm=None
+        )
+        self._topic_counts = self._vectorizer.transform([topic]).tocsr()
+        if self._topic_counts.nnz == 0:
+            raise ValueError(f"Topic has no usable terms: {topic!r}")
+        # Document frequencies of the pages scored so far
+        self._df = np.zeros(n_features, dtype=np.float64)
+        self._documents = 0
+        self.stats = {'pages': 0, 'links_scored': 0}
+
+    def score_texts(self, texts: List[str]) -> np.ndarray:
+        """Cosine similarity of each text to the topic, in [0, 1]."""
+        if not texts:
+            return np.zeros(0)
+        return self._similarities(self._vectorizer.transform(texts), self._idf())
+
+    def score_links(self, links: List[Dict], page_text: str = '') -> List[float]:
+        """Relevance in [0, 1] of each link ({'url', 'text', 'title'}) found on a page.
+
+        The page text also updates the IDF statistics.
+        """
+        self.stats['pages'] += 1
+        page_counts = self._vectorizer.transform([page_text or '']).tocsr()
+        self._df[page_counts.indices] += 1
+        self._documents += 1
+        if not links:
+            return []
+
+        texts = [f"{link.get('text') or ''} {link.get('title') or ''}" for link in links]
+        texts += [url_words(link['url']) for link in links]
+        idf = self._idf()
+        similarities = self._similarities(self._vectorizer.transform(texts), idf)
+
+        count = len(links)
+        anchor_weight, url_weight, parent_weight = self.weights
+        parent = self._similarities(page_counts, idf)[0] if page_counts.nnz else 0.0
+        scores = anchor_weight * similarities[:count] + url_weight * similarities[count:] + parent_weight * parent
+        self.stats['links_scored'] += count
+        return scores.tolist()
+
+    def score_urls(self, urls: List[str]) -> List[float]:
+        """Relevance in [0, 1] of URLs found without a linking page, e.g. in sitemaps.
+
+        The URL's words stand in for the missing anchor text too, and there is
+        no parent page, so scores are on the same scale as ``score_links``.
+        """
+        if not urls:
+            return []
+        anchor_weight, url_weight, _ = self.weights
+        similarities = self.score_texts([url_words(url) for url in urls])
+        self.stats['links_scored'] += len(urls)
+        return ((anchor_weight + url_weight) * similarities).tolist()
+
+    def _idf(self) -> np.ndarray:
+        # Smoothed like sklearn's TfidfTransformer
+        return np.log((1 + self._documents) / (1 + self._df)) + 1
+
+    def _similarities(self, counts, idf: np.ndarray) -> np.ndarray:
+        vectors = self._weight(counts, idf)
+        topic = self._weight(self._topic_counts, idf)
+        return np.asarray((vectors @ topic.T).todense()).ravel()
+
+    @staticmethod
+    def _weight(counts, idf: np.ndarray):
+        weighted = counts.tocsr(copy=True).astype(np.float64)
+        weighted.data = (1 + np.log(weighted.data)) * idf[weighted.indices]
+        return normalize(weighted)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'topic': self.topic}
@@ -0,0 +1,133 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+class _TrieNode:
+    __slots__ = ('children', 'allow', 'disallow')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.allow = False
+        self.disallow = False
+
+class RuleGroup:
+    """Allow/disallow rules for one user-agent group, compiled for fast lookups.
+
+    Plain prefix rules go into a character trie so a single walk over the path
+    finds the longest matching allow and disallow rule. Rules containing ``*``
+    or ending in ``$`` are compiled to regular expressions once. Precedence
+    follows Google's robots.txt spec: the longest matching rule wins and
+    allow wins ties.
+    """
+    def __init__(self, allow: List[str], disallow: List[str]):
+        self._root = _TrieNode()
+        self._patterns: List[Tuple[re.Pattern, int, bool]] = []
+        for pattern in allow:
+            self._add(pattern, True)
+        for pattern in disallow:
+            self._add(pattern, False)
+        # Longest patterns first so the first wildcard match is the best one
+        self._patterns.sort(key=lambda p: (-p[1], not p[2]))
+
+    def _add(self, pattern: str, allow: bool) -> None:
+        if not pattern:
+            return
+        if '*' in pattern or pattern.endswith('$'):
+            self._patterns.append((self._compile(pattern), len(pattern), allow))
+            return
+        node = self._root
+        for char in pattern:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        if allow:
+            node.allow = True
+        else:
+            node.disallow = True
+
+    @staticmethod
+    def _compile(pattern: str) -> re.Pattern:
+        anchored = pattern.endswith('$')
+        if anchored:
+            pattern = pattern[:-1]
+        regex = '.*'.join(re.escape(part) for part in pattern.split('*'))
+        return re.compile(regex + ('$' if anchored else ''), re.DOTALL)
+
+    def match(self, path: str) -> Optional[bool]:
+        """Return True/False for the winning rule, or None if no rule matches."""
+        allow_len = disallow_len = -1
+        node = self._root
+        for depth, char in enumerate(path, 1):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.allow:
+                allow_len = depth
+            if node.disallow:
+                disallow_len = depth
+
+        best = max(allow_len, disallow_len)
+        for regex, length, allow in self._patterns:
+            if length < best:
+                break
+            if regex.match(path):
+                if allow:
+                    allow_len = max(allow_len, length)
+                else:
+                    disallow_len = max(disallow_len, length)
+                break
+
+        if allow_len < 0 and disallow_len < 0:
+            return None
+        return allow_len >= disallow_len
+
+class RobotsRules:
+    """Compiled robots.txt rules for one host.
+
+    ``rules`` is the plain dict produced by ``WebCrawler._parse_robots_txt``
+    (agent -> {'allow': [...], 'disallow': [...], 'crawl-delay': float}) and is
+    kept as-is so it can be serialized; the compiled groups are built once here.
+    ``sitemaps`` lists the file's ``Sitemap:`` URLs, which apply to every agent.
+    """
+    def __init__(self, rules: Dict[str, Dict], sitemaps: Optional[List[str]] = None):
+        self.rules = rules
+        self.sitemaps = list(sitemaps or [])
+        self._groups = {
+            agent.lower(): RuleGroup(agent_rules.get('allow', []), agent_rules.get('disallow', []))
+            for agent, agent_rules in rules.items()
+        }
+        self._agent_cache: Dict[str, Optional[str]] = {}
+
+    def _group_key(self, user_agent: str) -> Optional[str]:
+        """Find the most specific group for a user agent, falling back to '*'."""
+        user_agent = user_agent.lower()
+        if user_agent not in self._agent_cache:
+            key = None
+            if user_agent in self._groups:
+                key = user_agent
+            else:
+                candidates = [agent for agent in self._groups if agent != '*' and user_agent.startswith(agent)]
+                if candidates:
+                    key = max(candidates, key=len)
+                elif '*' in self._groups:
+                    key = '*'
+            self._agent_cache[user_agent] = key
+        return self._agent_cache[user_agent]
+
+    def is_allowed(self, path: str, user_agent: str = '*') -> bool:
+        key = self._group_key(user_agent)
+        if key is None:
+            return True  # No applicable rules found
+        if not path:
+            path = '/'
+        verdict = self._groups[key].match(path)
+        return True if verdict is None else verdict
+
+    def crawl_delay(self, user_agent: str = '*') -> Optional[float]:
+        key = self._group_key(user_agent)
+        if key is None:
+            return None
+        for agent, agent_rules in self.rules.items():
+            if agent.lower() == key:
+                return agent_rules.get('crawl-delay')
+        return None
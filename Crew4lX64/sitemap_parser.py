@@ -0,0 +1,128 @@
+import zlib
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# The sitemaps protocol caps a sitemap at 50 MB uncompressed
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+
+@dataclass
+class SitemapEntry:
+    """A <url> of a sitemap, or a <sitemap> of a sitemap index (is_index)."""
+    loc: str
+    lastmod: Optional[str] = None
+    changefreq: Optional[str] = None
+    priority: Optional[float] = None
+    is_index: bool = False
+
+    def metadata(self) -> Dict:
+        """The entry's optional fields that are set, for frontier entries."""
+        return {
+            key: value for key, value in (
+                ('lastmod', self.lastmod),
+                ('changefreq', self.changefreq),
+                ('priority', self.priority)
+            ) if value is not None
+        }
+
+class SitemapParser:
+    """Incremental parser for sitemaps and sitemap indexes.
+
+    Bytes are fed as they arrive and complete entries are returned by each
+    ``feed`` call, so a sitemap never has to be held in memory; parsed
+    elements are dropped straight away. Gzipped sitemaps are detected by
+    their magic bytes and inflated on the fly. Input beyond ``max_bytes``
+    (after decompression) raises ValueError, which also guards against
+    compression bombs. Tags are matched by local name, so documents with
+    no or an unusual namespace parse too.
+    """
+    def __init__(self, max_bytes: int = SITEMAP_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes_parsed = 0
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._root: Optional[ET.Element] = None
+        self._inflater = None
+        self._started = False
+
+    def feed(self, data: bytes) -> List[SitemapEntry]:
+        if not self._started:
+            if not data:
+                return []
+            self._started = True
+            if data.startswith(GZIP_MAGIC):
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if self._inflater is None:
+            self._feed_xml(data)
+            return self._read_entries()
+
+        entries = []
+        while data:
+            # Inflate in bounded steps so one chunk cannot expand without limit
+            chunk = self._inflater.decompress(data, 64 * 1024)
+            data = self._inflater.unconsumed_tail
+            self._feed_xml(chunk)
+            entries.extend(self._read_entries())
+        return entries
+
+    def close(self) -> List[SitemapEntry]:
+        """Finish parsing; raises ET.ParseError if the document is incomplete."""
+        if self._inflater is not None:
+            self._feed_xml(self._inflater.flush())
+        self._parser.close()
+        return self._read_entries()
+
+    def _feed_xml(self, data: bytes) -> None:
+        self.bytes_parsed += len(data)
+        if self.bytes_parsed > self.max_bytes:
+            raise ValueError(f"Sitemap exceeds {self.max_bytes} bytes")
+        self._parser.feed(data)
+
+    def _read_entries(self) -> List[SitemapEntry]:
+        entries = []
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                continue
+            tag = _local_name(elem.tag)
+            if tag not in ('url', 'sitemap'):
+                continue
+            entry = self._make_entry(elem, is_index=tag == 'sitemap')
+            if entry is not None:
+                entries.append(entry)
+            # Entries are children of the root; drop the parsed ones
+            if self._root is not None:
+                self._root.clear()
+        return entries
+
+    @staticmethod
+    def _make_entry(elem: ET.Element, is_index: bool) -> Optional[SitemapEntry]:
+        fields = {}
+        for child in elem:
+            if child.text:
+                fields[_local_name(child.tag)] = child.text.strip()
+        if not fields.get('loc'):
+            return None
+        priority = None
+        if 'priority' in fields:
+            try:
+                priority = min(max(float(fields['priority']), 0.0), 1.0)
+            except ValueError:
+                pass
+        return SitemapEntry(
+            loc=fields['loc'],
+            lastmod=fields.get('lastmod'),
+            changefreq=fields.get('changefreq'),
+            priority=priority,
+            is_index=is_index
+        )
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+def parse_sitemap(data: bytes, max_bytes: int = SITEMAP_MAX_BYTES) -> List[SitemapEntry]:
+    """Parse a whole (optionally gzipped) sitemap document."""
+    parser = SitemapParser(max_bytes=max_bytes)
+    return parser.feed(data) + parser.close()
@@ -0,0 +1,137 @@
+import os
+import unittest
+import sqlite3
+import tempfile
+from unittest.mock import patch
+from Crew4lX64.cache_manager import CacheManager, LRUCache
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used_by_count(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_byte_budget(self):
+        cache = LRUCache(max_bytes=100)
+        cache.set('a', 'x', size=60)
+        cache.set('b', 'y', size=60)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.total_bytes, 60)
+        cache.set('huge', 'z', size=1000)
+        self.assertNotIn('huge', cache)
+
+    def test_ttl_and_counters(self):
+        cache = LRUCache(ttl=10)
+        with patch('Crew4lX64.cache_manager.time.time', return_value=1000.0):
+            cache.set('a', 1)
+            self.assertEqual(cache.get('a'), 1)
+        with patch('Crew4lX64.cache_manager.time.time', return_value=1011.0):
+            self.assertIsNone(cache.get('a'))
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['expired']), (1, 1, 1))
+        self.assertEqual(stats['bytes'], 0)
+
+class TestCacheManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_set_get_with_normalized_key(self):
+        cache = CacheManager(cache_dir=self.tmpdir.name)
+        cache.set('HTTPS://Example.com/page#section', {'content': '<html></html>'})
+        self.assertEqual(cache.get('https://example.com/page'), {'content': '<html></html>'})
+        self.assertIsNone(cache.get('https://example.com/other'))
+        stats = cache.get_stats()
+        self.assertEqual(stats['memory_hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        cache.close()
+
+    def test_disk_tier_survives_restart(self):
+        cache = CacheManager(cache_dir=self.tmpdir.name)
+        cache.set('https://example.com/', {'content': 'persisted'})
+        cache.close()
+
+        cache = CacheManager(cache_dir=self.tmpdir.name)
+        self.assertEqual(cache.get('https://example.com/')['content'], 'persisted')
+        self.assertEqual(cache.get_stats()['disk_hits'], 1)
+        self.assertGreater(cache.get_stats()['disk_bytes'], 0)
+        cache.close()
+
+    def test_expired_entries_are_misses(self):
+        cache = CacheManager(cache_dir=self.tmpdir.name, default_ttl=10)
+        with patch('Crew4lX64.cache_manager.time.time', return_value=1000.0):
+            cache.set('https://example.com/', {'content': 'old'})
+        with patch('Crew4lX64.cache_manager.time.time', return_value=1011.0):
+            self.assertIsNone(cache.get('https://example.com/'))
+        cache.close()
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = CacheManager(cache_dir=self.tmpdir.name, memory_limit=200)
+        for i in range(20):
+            cache.set(f'https://example.com/{i}', {'content': f'page {i} ' * 20})
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['memory_bytes'], 200)
+        self.assertGreater(stats['memory_evictions'], 0)
+        # Evicted entries are still served from disk
+        self.assertEqual(cache.get('https://example.com/0')['content'], 'page 0 ' * 20)
+        cache.close()
+
+    def test_memory_tier_counts_uncompressed_size(self):
+        cache = CacheManager(cache_dir=self.tmpdir.name)
+        cache.set('https://example.com/', {'content': 'a' * 10000})
+        stats = cache.get_stats()
+        self.assertGreater(stats['memory_bytes'], 10000)
+        self.assertLess(stats['disk_bytes'], 1000)
+        cache.close()
+
+    def test_access_times_are_written_in_batches(self):
+        cache = CacheManager(cache_dir=self.tmpdir.name, memory_limit=0, access_batch=3)
+        with patch('Crew4lX64.cache_manager.time.time', return_value=1000.0):
+            for i in range(3):
+                cache.set(f'https://example.com/{i}', {'content': str(i)})
+
+        def last_access():
+            db = sqlite3.connect(os.path.join(self.tmpdir.name, 'cache.db'))
+            try:
+                return [row[0] for row in db.execute('SELECT last_access FROM entries ORDER BY key')]
+            finally:
+                db.close()
+
+        with patch('Crew4lX64.cache_manager.time.time', return_value=2000.0):
+            cache.get('https://example.com/0')
+            cache.get('https://example.com/1')
+            self.assertEqual(last_access(), [1000.0, 1000.0, 1000.0])
+            cache.get('https://example.com/2')
+            self.assertEqual(last_access(), [2000.0, 2000.0, 2000.0])
+        cache.close()
+
+    def test_stale_entries_with_validators_kept_in_memory_only_cache(self):
+        with patch('Crew4lX64.cache_manager.sqlite3.connect', side_effect=sqlite3.Error('no disk')):
+            cache = CacheManager(cache_dir=self.tmpdir.name, default_ttl=10)
+        with patch('Crew4lX64.cache_manager.time.time', return_value=1000.0):
+            cache.set('https://example.com/a', {'content': 'a', 'etag': '"v1"'})
+            cache.set('https://example.com/b', {'content': 'b'})
+        with patch('Crew4lX64.cache_manager.time.time', return_value=1011.0):
+            self.assertIsNone(cache.get('https://example.com/a'))
+            self.assertIsNone(cache.get('https://example.com/b'))
+            self.assertEqual(cache.get_stale('https://example.com/a')['etag'], '"v1"')
+            self.assertIsNone(cache.get_stale('https://example.com/b'))
+        self.assertEqual(cache.get_stats()['expired'], 2)
+
+    def test_disk_tier_evicts_to_limit(self):
+        cache = CacheManager(cache_dir=self.tmpdir.name, memory_limit=0, disk_limit=500)
+        for i in range(50):
+            cache.set(f'https://example.com/{i}', {'content': f'{i}' * 100})
+        self.assertLessEqual(cache.get_stats()['disk_bytes'], 500)
+        self.assertGreater(cache.get_stats()['disk_evictions'], 0)
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from Crew4lX64.connection_pool import ConnectionPool
+from Crew4lX64.web_crawler import WebCrawler
+
+class TestConnectionPool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.peers = set()
+
+        async def page(request):
+            self.peers.add(request.transport.get_extra_info('peername'))
+            return web.Response(text='<html><body>ok</body></html>', content_type='text/html')
+
+        app = web.Application()
+        app.router.add_get('/page', page)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.pool = ConnectionPool(limit=10, limit_per_host=2)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        await self.server.close()
+
+    async def test_sequential_requests_reuse_one_connection(self):
+        url = self.server.make_url('/page')
+        async with self.pool.session() as session:
+            for _ in range(5):
+                async with session.get(url) as response:
+                    await response.read()
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['connections_reused'], 4)
+        self.assertEqual(len(self.peers), 1)
+
+    async def test_sessions_share_connector_and_leave_it_open(self):
+        url = self.server.make_url('/page')
+        first = self.pool.session()
+        second = self.pool.session(headers={'User-Agent': 'test'})
+        self.assertIs(first.connector, second.connector)
+
+        async with first.get(url) as response:
+            await response.read()
+        await first.close()
+        self.assertFalse(self.pool.closed)
+
+        async with second.get(url) as response:
+            await response.read()
+        await second.close()
+        self.assertEqual(self.pool.get_stats()['connections_reused'], 1)
+        self.assertEqual(len(self.peers), 1)
+
+    async def test_crawler_reuses_connections_across_pages(self):
+        crawler = WebCrawler()
+        await crawler.setup(rate_limit=100, respect_robots=False, connection_pool=self.pool)
+        try:
+            for _ in range(3):
+                await crawler._fetch_content(str(self.server.make_url('/page')))
+            stats = (await crawler.get_stats())['connection_pool']
+        finally:
+            await crawler.close()
+
+        self.assertGreater(stats['reuse_ratio'], 0)
+        # A pool passed in by the caller outlives the crawler
+        self.assertFalse(self.pool.closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch
+from Crew4lX64.crawl_budget import CrawlBudget
+
+class TestCrawlBudget(unittest.TestCase):
+
+    def test_unlimited_budget_allows_everything(self):
+        budget = CrawlBudget()
+        for i in range(100):
+            self.assertTrue(budget.acquire(f'https://example.com/{i}'))
+            budget.record(f'https://example.com/{i}', size=1000, error=True)
+        self.assertFalse(budget.exhausted)
+        stats = budget.get_stats()
+        self.assertEqual(stats['requests'], 100)
+        self.assertIsNone(stats['remaining_pages'])
+
+    def test_per_domain_pages_and_bytes(self):
+        budget = CrawlBudget(max_pages_per_domain=2, max_bytes_per_domain=500)
+        self.assertTrue(budget.acquire('https://a.com/1'))
+        self.assertTrue(budget.acquire('https://a.com/2'))
+        self.assertFalse(budget.acquire('https://a.com/3'))
+        self.assertTrue(budget.acquire('https://b.com/1'))
+        budget.record('https://b.com/1', size=600)
+        self.assertFalse(budget.acquire('https://b.com/2'))
+        self.assertTrue(budget.domain_stopped('https://b.com/x'))
+        self.assertFalse(budget.domain_stopped('https://c.com/'))
+
+        stats = budget.get_stats()
+        self.assertEqual(stats['domains']['a.com']['stopped'], 'pages')
+        self.assertEqual(stats['domains']['b.com']['stopped'], 'bytes')
+        self.assertEqual(stats['domains']['b.com']['remaining_pages'], 1)
+        self.assertEqual(stats['domains']['b.com']['remaining_bytes'], 0)
+        self.assertEqual(stats['stopped_domains'], ['a.com', 'b.com'])
+        self.assertEqual(stats['denied'], 2)
+        self.assertFalse(budget.exhausted)
+
+    def test_global_limits(self):
+        budget = CrawlBudget(max_pages=3, max_bytes=10_000)
+        for url in ('https://a.com/', 'https://b.com/', 'https://c.com/'):
+            self.assertTrue(budget.acquire(url))
+        self.assertTrue(budget.exhausted)
+        self.assertFalse(budget.acquire('https://d.com/'))
+        self.assertEqual(budget.get_stats()['exhausted'], 'pages')
+
+        budget = CrawlBudget(max_bytes=1000)
+        budget.acquire('https://a.com/')
+        budget.record('https://a.com/', size=1000)
+        self.assertEqual(budget.get_stats()['remaining_bytes'], 0)
+        self.assertFalse(budget.acquire('https://b.com/'))
+
+    def test_time_limits(self):
+        with patch('Crew4lX64.crawl_budget.time.monotonic', return_value=100.0) as clock:
+            budget = CrawlBudget(max_time=60, max_time_per_domain=10)
+            self.assertTrue(budget.acquire('https://a.com/'))
+            clock.return_value = 105.0
+            self.assertTrue(budget.acquire('https://b.com/'))
+            clock.return_value = 111.0
+            self.assertFalse(budget.acquire('https://a.com/2'))
+            self.assertTrue(budget.acquire('https://b.com/2'))
+            self.assertAlmostEqual(budget.get_stats()['remaining_time'], 49.0)
+            clock.return_value = 160.0
+            self.assertTrue(budget.exhausted)
+            self.assertFalse(budget.acquire('https://c.com/'))
+
+    def test_error_rate_needs_enough_samples(self):
+        budget = CrawlBudget(max_error_rate=0.1, min_error_samples=10)
+        for i in range(9):
+            self.assertTrue(budget.acquire(f'https://a.com/{i}'))
+            budget.record(f'https://a.com/{i}', error=i < 2)
+        self.assertTrue(budget.acquire('https://a.com/9'))
+        budget.record('https://a.com/9')
+        # 2 errors in 10 requests is over 10%
+        self.assertFalse(budget.acquire('https://a.com/10'))
+        self.assertEqual(budget.get_stats()['domains']['a.com']['stopped'], 'error_rate')
+
+    def test_error_rate_counts_completed_requests(self):
+        budget = CrawlBudget(max_error_rate=0.5, min_error_samples=2)
+        for i in range(4):
+            self.assertTrue(budget.acquire(f'https://a.com/{i}'))
+        # Two failures out of two completed requests; the other two are in flight
+        budget.record('https://a.com/0', error=True)
+        budget.record('https://a.com/1', error=True)
+        self.assertTrue(budget.domain_stopped('https://a.com/'))
+
+    def test_cache_hits_return_their_reservation(self):
+        budget = CrawlBudget(max_pages_per_domain=2)
+        for i in range(5):
+            self.assertTrue(budget.acquire(f'https://a.com/{i}'))
+            budget.record(f'https://a.com/{i}', size=100, cached=True)
+        self.assertTrue(budget.acquire('https://a.com/5'))
+        budget.record('https://a.com/5', size=100)
+        stats = budget.get_stats()
+        self.assertEqual((stats['requests'], stats['bytes'], stats['cached']), (1, 100, 5))
+        self.assertEqual(stats['domains']['a.com']['remaining_pages'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from Crew4lX64.jsonl_writer import JSONLWriter, ZSTD_AVAILABLE, encode_record
+
+def read_lines(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+class TestJSONLWriter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base = os.path.join(tmp.name, 'out', 'crawl')
+
+    async def test_single_file_keeps_record_order(self):
+        async with JSONLWriter(self.base, batch_bytes=64) as writer:
+            for i in range(100):
+                await writer.write({'i': i, 'text': 'ข้อความ'})
+
+        self.assertEqual(writer.files, [self.base + '.jsonl'])
+        records = read_lines(writer.files[0])
+        self.assertEqual([r['i'] for r in records], list(range(100)))
+        self.assertEqual(records[0]['text'], 'ข้อความ')
+
+    async def test_rotates_by_record_count_with_gzip(self):
+        async with JSONLWriter(self.base, max_records=40, compression='gzip') as writer:
+            for i in range(100):
+                await writer.write({'i': i})
+
+        self.assertEqual([os.path.basename(f) for f in writer.files],
+                         ['crawl-00001.jsonl.gz', 'crawl-00002.jsonl.gz', 'crawl-00003.jsonl.gz'])
+        self.assertEqual([len(read_lines(f)) for f in writer.files], [40, 40, 20])
+
+    async def test_rotates_by_size(self):
+        async with JSONLWriter(self.base, max_bytes=1000) as writer:
+            for i in range(100):
+                await writer.write({'i': i, 'pad': 'x' * 80})
+
+        self.assertGreater(len(writer.files), 5)
+        self.assertTrue(all(os.path.getsize(f) < 1100 for f in writer.files))
+        self.assertEqual(sum(len(read_lines(f)) for f in writer.files), 100)
+
+    @unittest.skipUnless(ZSTD_AVAILABLE, 'zstandard not installed')
+    async def test_zstd(self):
+        import zstandard
+        async with JSONLWriter(self.base, compression='zstd') as writer:
+            await writer.write({'i': 1})
+        with open(writer.files[0], 'rb') as f:
+            data = zstandard.ZstdDecompressor().stream_reader(f).read()
+        self.assertEqual(json.loads(data), {'i': 1})
+
+    def test_encoder_falls_back_for_unusual_records(self):
+        self.assertEqual(json.loads(encode_record({1: 'a'})), {'1': 'a'})
+        self.assertTrue(encode_record({'a': 1}).endswith(b'\n'))
+
+    def test_rejects_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            JSONLWriter(self.base, compression='bz2')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import random
+import unittest
+from Crew4lX64.near_duplicates import NearDuplicateIndex, hamming_distance, simhash
+
+def make_text(seed, words=400):
+    rng = random.Random(seed)
+    vocabulary = [f'word{i}' for i in range(3000)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+class TestSimHash(unittest.TestCase):
+
+    def test_small_edits_change_few_bits(self):
+        text = make_text(1)
+        edited = 'Print view. ' + text.replace('word', 'Word', 3) + ' Share this article.'
+        self.assertLessEqual(hamming_distance(simhash(text), simhash(edited)), 3)
+        self.assertGreater(hamming_distance(simhash(text), simhash(make_text(2))), 10)
+
+    def test_deterministic_and_case_insensitive(self):
+        text = make_text(3)
+        self.assertEqual(simhash(text), simhash(text.upper()))
+        self.assertLess(simhash(text), 1 << 64)
+
+    def test_short_text_is_not_fingerprinted(self):
+        self.assertIsNone(simhash('Home About Contact'))
+        self.assertIsNone(simhash(''))
+
+class TestNearDuplicateIndex(unittest.TestCase):
+
+    def test_finds_fingerprints_within_distance(self):
+        index = NearDuplicateIndex(max_distance=3)
+        base = simhash(make_text(4))
+        self.assertIsNone(index.add('https://example.com/a', base))
+        # Flip bits spread over different bands
+        self.assertEqual(index.add('https://example.com/a?print=1', base ^ (1 | 1 << 20 | 1 << 63)),
+                         'https://example.com/a')
+        self.assertIsNone(index.add('https://example.com/b', base ^ 0b1111))
+        self.assertEqual(len(index), 2)
+
+        stats = index.get_stats()
+        self.assertEqual(stats['checked'], 3)
+        self.assertEqual(stats['duplicates'], 1)
+        self.assertAlmostEqual(stats['dedup_ratio'], 1 / 3)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(5)
+        index = NearDuplicateIndex(max_distance=4)
+        seen = []
+        for _ in range(500):
+            if seen and rng.random() < 0.5:
+                fingerprint = rng.choice(seen)
+                for _ in range(rng.randint(0, 6)):
+                    fingerprint ^= 1 << rng.randrange(64)
+            else:
+                fingerprint = rng.getrandbits(64)
+            expected = any(hamming_distance(fingerprint, other) <= 4 for other in seen)
+            self.assertEqual(index.add(str(fingerprint), fingerprint) is not None, expected)
+            if not expected:
+                seen.append(fingerprint)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+import asyncio
+import time
+from Crew4lX64.rate_limiter import RateLimiter, parse_retry_after
+
+class TestRateLimiterDelays(unittest.TestCase):
+
+    def test_domain_specific_delays(self):
+        limiter = RateLimiter(requests_per_second=2.0, domain_delays={
+            'default': 1.0,
+            'slow.example.com': 5.0,
+            'fast.org': 0.1,
+            'search_pages': 3.0
+        })
+        self.assertEqual(limiter.get_delay('https://other.com/page'), 1.0)
+        self.assertEqual(limiter.get_delay('https://slow.example.com/page'), 5.0)
+        self.assertEqual(limiter.get_delay('https://docs.fast.org/page'), 0.1)
+        self.assertEqual(limiter.get_delay('https://docs.fast.org/search?q=x'), 3.0)
+
+    def test_global_rate_without_overrides(self):
+        self.assertEqual(RateLimiter(requests_per_second=4.0).get_delay('https://a.com/'), 0.25)
+
+    def test_crawl_delay_is_a_floor(self):
+        limiter = RateLimiter(requests_per_second=10.0, domain_delays={'strict.com': 0.5})
+        limiter.set_crawl_delay('strict.com', 2.0)
+        limiter.set_crawl_delay('friendly.com', 0.01)
+        self.assertEqual(limiter.get_delay('https://strict.com/'), 2.0)
+        self.assertEqual(limiter.get_delay('https://friendly.com/'), 0.1)
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_waiters_are_spaced(self):
+        limiter = RateLimiter(requests_per_second=20.0, burst_size=2)
+        fired = []
+
+        async def request():
+            await limiter.wait('https://example.com/page')
+            fired.append(time.monotonic())
+
+        start = time.monotonic()
+        await asyncio.gather(*(request() for _ in range(6)))
+        fired.sort()
+
+        # Two burst tokens go immediately, the other four one interval apart
+        self.assertLess(fired[1] - start, 0.03)
+        self.assertGreaterEqual(fired[-1] - start, 4 * 0.05 - 0.01)
+        gaps = [b - a for a, b in zip(fired[2:], fired[3:])]
+        self.assertTrue(all(gap >= 0.04 for gap in gaps), gaps)
+        self.assertEqual(limiter.domains['example.com'].total_requests, 6)
+
+    async def test_domains_do_not_share_buckets(self):
+        limiter = RateLimiter(requests_per_second=1.0, burst_size=1)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.wait(f'https://site{i}.com/') for i in range(5)))
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    async def test_cancelled_waiter_returns_its_slot(self):
+        limiter = RateLimiter(requests_per_second=10.0, burst_size=1)
+        await limiter.wait('https://example.com/')
+        waiter = asyncio.create_task(limiter.wait('https://example.com/'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertGreaterEqual(limiter.domains['example.com'].tokens, -0.01)
+
+    async def test_ready_in_reports_the_next_free_slot(self):
+        limiter = RateLimiter(requests_per_second=10.0, burst_size=2)
+        self.assertEqual(limiter.ready_in('https://example.com/'), 0.0)
+        await limiter.wait('https://example.com/')
+        self.assertEqual(limiter.ready_in('https://example.com/'), 0.0)
+        await limiter.wait('https://example.com/')
+        self.assertAlmostEqual(limiter.ready_in('https://example.com/'), 0.1, delta=0.02)
+        # Asking reserves nothing
+        self.assertAlmostEqual(limiter.ready_in('https://example.com/'), 0.1, delta=0.02)
+        self.assertEqual(limiter.ready_in('https://other.com/'), 0.0)
+
+    async def test_wait_uses_a_reserved_slot(self):
+        limiter = RateLimiter(requests_per_second=10.0, burst_size=1)
+        self.assertEqual(limiter.reserve('https://example.com/a'), 0.0)
+        self.assertAlmostEqual(limiter.ready_in('https://example.com/b'), 0.1, delta=0.02)
+        start = time.monotonic()
+        await limiter.wait('https://example.com/a')
+        self.assertLess(time.monotonic() - start, 0.01)
+        # The slot is used once; the next wait takes a new one
+        self.assertAlmostEqual(limiter.reserve('https://example.com/a'), 0.1, delta=0.02)
+
+    async def test_release_returns_an_unused_slot(self):
+        limiter = RateLimiter(requests_per_second=10.0, burst_size=1)
+        limiter.reserve('https://example.com/a')
+        limiter.release('https://example.com/a')
+        self.assertEqual(limiter.ready_in('https://example.com/b'), 0.0)
+        # Releasing after the slot was used gives nothing back
+        limiter.reserve('https://example.com/a')
+        await limiter.wait('https://example.com/a')
+        limiter.release('https://example.com/a')
+        self.assertGreater(limiter.ready_in('https://example.com/b'), 0.0)
+
+class TestAdaptiveRateLimiting(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = RateLimiter(requests_per_second=1.0, adaptive=True,
+                                   backoff_factor=2.0, max_backoff=10, max_speedup=2.0)
+        self.url = 'https://example.com/page'
+
+    def scale(self):
+        return self.limiter.domains['example.com'].rate_scale
+
+    def test_speeds_up_while_latency_is_stable(self):
+        for _ in range(100):
+            self.limiter.record_response(self.url, 200, latency=0.2)
+        self.assertEqual(self.scale(), 2.0)
+
+    def test_backs_off_on_429_and_503(self):
+        self.limiter.record_response(self.url, 429, latency=0.2)
+        self.assertEqual(self.scale(), 0.5)
+        self.limiter.record_response(self.url, 503, latency=0.2)
+        self.assertEqual(self.scale(), 0.25)
+        for _ in range(5):
+            self.limiter.record_response(self.url, 503)
+        # Never spaced further apart than max_backoff
+        self.assertAlmostEqual(self.scale(), 0.1)
+
+    def test_backs_off_when_latency_rises(self):
+        for _ in range(5):
+            self.limiter.record_response(self.url, 200, latency=0.1)
+        before = self.scale()
+        for _ in range(10):
+            self.limiter.record_response(self.url, 200, latency=1.0)
+        self.assertLess(self.scale(), before)
+
+    def test_disabled_controller_keeps_rate(self):
+        limiter = RateLimiter(requests_per_second=1.0)
+        limiter.record_response(self.url, 429)
+        limiter.record_response(self.url, 200, latency=0.1)
+        self.assertEqual(limiter.domains['example.com'].rate_scale, 1.0)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+class TestRetryAfter(unittest.IsolatedAsyncioTestCase):
+
+    async def test_retry_after_pauses_domain(self):
+        limiter = RateLimiter(requests_per_second=100.0)
+        await limiter.wait('https://example.com/')
+        limiter.record_response('https://example.com/', 429, retry_after='0.2')
+        start = time.monotonic()
+        await limiter.wait('https://example.com/')
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+if __name__ == '__main__':
+    unittest.main()
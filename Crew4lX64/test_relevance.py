@@ -0,0 +1,57 @@
+import unittest
+from Crew4lX64.relevance import RelevanceScorer, url_words
+
+class TestRelevanceScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.scorer = RelevanceScorer('graph neural networks')
+
+    def test_url_words(self):
+        self.assertEqual(url_words('https://example.com/ml/graph-neural_nets?page=2'), 'ml graph neural nets page 2')
+        self.assertEqual(url_words('https://example.com'), '')
+
+    def test_anchor_text_and_url_both_count(self):
+        links = [
+            {'url': 'https://example.com/about', 'text': 'About us'},
+            {'url': 'https://example.com/p?id=7', 'text': 'Graph neural networks explained'},
+            {'url': 'https://example.com/graph-neural-networks', 'text': 'Read more'},
+            {'url': 'https://example.com/contact', 'text': 'Contact', 'title': 'Neural networks team'},
+        ]
+        scores = self.scorer.score_links(links, '')
+        self.assertEqual(scores[0], 0.0)
+        # Anchor text (and title) weighs more than URL words
+        self.assertGreater(scores[1], scores[3])
+        self.assertGreater(scores[3], scores[2])
+        self.assertGreater(scores[2], scores[0])
+        self.assertTrue(all(0.0 <= score <= 1.0 for score in scores))
+
+    def test_parent_page_lifts_every_link(self):
+        links = [{'url': 'https://example.com/a', 'text': 'Next'}]
+        off_topic = self.scorer.score_links(links, 'Recipes for bread and cakes.')[0]
+        on_topic = self.scorer.score_links(links, 'Graph neural networks learn on graphs.')[0]
+        self.assertEqual(off_topic, 0.0)
+        self.assertGreater(on_topic, 0.0)
+        self.assertEqual(self.scorer.get_stats()['links_scored'], 2)
+
+    def test_urls_without_a_page_score_on_the_link_scale(self):
+        url = 'https://example.com/graph-neural-networks'
+        link_score = self.scorer.score_links([{'url': url, 'text': 'Graph neural networks'}], '')[0]
+        sitemap_score, other = self.scorer.score_urls([url, 'https://example.com/shop'])
+        self.assertAlmostEqual(sitemap_score, link_score)
+        self.assertEqual(other, 0.0)
+        self.assertEqual(self.scorer.score_urls([]), [])
+
+    def test_terms_common_to_every_page_weigh_less(self):
+        for _ in range(20):
+            self.scorer.score_links([], 'graph theory lecture notes')
+        graph, neural = self.scorer.score_texts(['graph', 'neural'])
+        self.assertLess(graph, neural)
+
+    def test_rejects_empty_topics(self):
+        with self.assertRaises(ValueError):
+            RelevanceScorer('  ')
+        with self.assertRaises(ValueError):
+            RelevanceScorer('the and of')
+
+if __name__ == '__main__':
+    unittest.main()
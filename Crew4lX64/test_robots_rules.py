@@ -0,0 +1,69 @@
+import unittest
+from Crew4lX64.robots_rules import RobotsRules
+from Crew4lX64.web_crawler import WebCrawler
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /private/
+Allow: /private/public-page
+Disallow: /*.pdf$
+Disallow: /search?q=*
+Allow: /$
+Disallow: /
+
+User-agent: CrewZombitX64
+User-agent: OtherBot
+Disallow: /Admin/
+Allow: /Admin/help
+Crawl-delay: 2.5
+"""
+
+class TestRobotsRules(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = RobotsRules(WebCrawler()._parse_robots_txt(ROBOTS_TXT))
+
+    def test_longest_match_wins(self):
+        self.assertTrue(self.rules.is_allowed('/private/public-page', 'somebot'))
+        self.assertFalse(self.rules.is_allowed('/private/secret', 'somebot'))
+        self.assertTrue(self.rules.is_allowed('/', 'somebot'))
+        self.assertFalse(self.rules.is_allowed('/anything-else', 'somebot'))
+
+    def test_wildcards_and_end_anchor(self):
+        rules = RobotsRules({'*': {'allow': [], 'disallow': ['/*.pdf$', '/search?q=*']}})
+        self.assertFalse(rules.is_allowed('/docs/file.pdf'))
+        self.assertTrue(rules.is_allowed('/docs/file.pdf?download=1'))
+        self.assertFalse(rules.is_allowed('/search?q=robots'))
+        self.assertTrue(rules.is_allowed('/search'))
+
+    def test_allow_wins_ties(self):
+        rules = RobotsRules({'*': {'allow': ['/page'], 'disallow': ['/page']}})
+        self.assertTrue(rules.is_allowed('/page'))
+
+    def test_grouped_user_agents_and_case(self):
+        for agent in ('CrewZombitX64', 'otherbot', 'CrewZombitX64/1.0'):
+            self.assertFalse(self.rules.is_allowed('/Admin/settings', agent))
+            self.assertTrue(self.rules.is_allowed('/Admin/help', agent))
+            # Paths are case-sensitive and the specific group replaces '*'
+            self.assertTrue(self.rules.is_allowed('/admin/settings', agent))
+            self.assertTrue(self.rules.is_allowed('/private/secret', agent))
+        self.assertEqual(self.rules.crawl_delay('CrewZombitX64'), 2.5)
+        self.assertIsNone(self.rules.crawl_delay('somebot'))
+
+    def test_sitemap_lines_do_not_end_a_group(self):
+        content = ROBOTS_TXT.replace('Allow: /Admin/help', 'Sitemap: /sitemap.xml\nAllow: /Admin/help')
+        content += 'Sitemap: https://cdn.example.com/sitemap-index.xml.gz\n'
+        crawler = WebCrawler()
+        rules = RobotsRules(crawler._parse_robots_txt(content))
+        self.assertTrue(rules.is_allowed('/Admin/help', 'CrewZombitX64'))
+        self.assertEqual(crawler._parse_robots_sitemaps(content, 'https://example.com/robots.txt'), [
+            'https://example.com/sitemap.xml',
+            'https://cdn.example.com/sitemap-index.xml.gz'
+        ])
+
+    def test_no_rules_allows_everything(self):
+        self.assertTrue(RobotsRules({}).is_allowed('/anything'))
+        self.assertTrue(RobotsRules({'*': {'allow': ['*'], 'disallow': []}}).is_allowed('/x'))
+
+if __name__ == '__main__':
+    unittest.main()
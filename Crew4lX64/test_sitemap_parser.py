@@ -0,0 +1,63 @@
+import gzip
+import unittest
+from Crew4lX64.sitemap_parser import SitemapParser, parse_sitemap
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url>
+    <loc>https://example.com/a</loc>
+    <lastmod>2024-05-01</lastmod>
+    <changefreq>weekly</changefreq>
+    <priority>0.8</priority>
+  </url>
+  <url><loc> https://example.com/b </loc><priority>high</priority></url>
+  <url><lastmod>2024-05-01</lastmod></url>
+</urlset>
+"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml.gz</loc><lastmod>2024-05-02</lastmod></sitemap>
+</sitemapindex>
+"""
+
+class TestSitemapParser(unittest.TestCase):
+
+    def test_urlset_fields(self):
+        entries = parse_sitemap(URLSET)
+        self.assertEqual([e.loc for e in entries], ['https://example.com/a', 'https://example.com/b'])
+        self.assertEqual(entries[0].metadata(),
+                         {'lastmod': '2024-05-01', 'changefreq': 'weekly', 'priority': 0.8})
+        # Invalid priorities are dropped rather than failing the sitemap
+        self.assertIsNone(entries[1].priority)
+        self.assertFalse(entries[0].is_index)
+
+    def test_sitemap_index(self):
+        entries = parse_sitemap(INDEX)
+        self.assertEqual(len(entries), 1)
+        self.assertTrue(entries[0].is_index)
+        self.assertEqual(entries[0].lastmod, '2024-05-02')
+
+    def test_incremental_feed_matches_whole_document(self):
+        for data in (URLSET, gzip.compress(URLSET)):
+            parser = SitemapParser()
+            entries = []
+            for i in range(0, len(data), 7):
+                entries.extend(parser.feed(data[i:i + 7]))
+            entries.extend(parser.close())
+            self.assertEqual(entries, parse_sitemap(URLSET))
+
+    def test_entries_are_returned_as_soon_as_they_close(self):
+        parser = SitemapParser()
+        cut = URLSET.index(b'</url>') + len(b'</url>')
+        self.assertEqual([e.loc for e in parser.feed(URLSET[:cut])], ['https://example.com/a'])
+
+    def test_size_limit_applies_after_decompression(self):
+        body = b'<urlset>' + b'<url><loc>https://example.com/x</loc></url>' * 1000 + b'</urlset>'
+        compressed = gzip.compress(body)
+        self.assertLess(len(compressed), 2000)
+        with self.assertRaises(ValueError):
+            parse_sitemap(compressed, max_bytes=2000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from Crew4lX64.url_canonicalizer import URLCanonicalizer, canonicalize_url
+
+class TestURLCanonicalizer(unittest.TestCase):
+
+    def test_variants_collapse_to_one_url(self):
+        variants = [
+            'https://example.com/page',
+            'HTTPS://Example.COM/page',
+            'https://example.com:443/page',
+            'https://example.com/page#section',
+            'https://example.com/docs/../page',
+            'https://example.com/page?utm_source=news&utm_medium=email',
+            'https://example.com/page?fbclid=abc',
+        ]
+        self.assertEqual({canonicalize_url(url) for url in variants}, {'https://example.com/page'})
+
+    def test_query_is_sorted_and_kept(self):
+        self.assertEqual(
+            canonicalize_url('https://example.com/search?q=x&a=1&gclid=zz&empty='),
+            'https://example.com/search?a=1&empty=&q=x'
+        )
+        # Parameters are kept as written, not re-encoded
+        self.assertEqual(canonicalize_url('https://example.com/list?page&q=a%20b'),
+                         'https://example.com/list?page&q=a%20b')
+
+    def test_root_path_and_ports(self):
+        self.assertEqual(canonicalize_url('http://example.com'), 'http://example.com/')
+        self.assertEqual(canonicalize_url('http://example.com:80/'), 'http://example.com/')
+        self.assertEqual(canonicalize_url('http://example.com:8080/x'), 'http://example.com:8080/x')
+
+    def test_path_case_and_trailing_slash_are_preserved(self):
+        self.assertEqual(canonicalize_url('https://github.com/Owner/Repo'), 'https://github.com/Owner/Repo')
+        self.assertEqual(canonicalize_url('https://example.com/docs/'), 'https://example.com/docs/')
+
+    def test_options(self):
+        canonicalizer = URLCanonicalizer(strip_trailing_slash=True, tracking_params=['ref'])
+        self.assertEqual(
+            canonicalizer.canonicalize('https://example.com/dir/?ref=home&fbclid=1'),
+            'https://example.com/dir?fbclid=1'
+        )
+
+    def test_non_http_urls_are_untouched(self):
+        self.assertEqual(canonicalize_url('mailto:Someone@Example.com'), 'mailto:Someone@Example.com')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import re
+import unittest
+from Crew4lX64.url_filter import GitHubPaths, URLFilter, split_http_url
+from Crew4lX64.web_crawler import WebCrawler
+
+GITHUB_PATHS = WebCrawler().github_base_paths
+
+class TestURLFilter(unittest.TestCase):
+
+    def test_split_http_url(self):
+        self.assertEqual(split_http_url('https://Example.com:8080/a/b?q=1#x'), ('example.com:8080', '/a/b'))
+        self.assertEqual(split_http_url('http://example.com'), ('example.com', ''))
+        self.assertIsNone(split_http_url('ftp://example.com/a'))
+        self.assertIsNone(split_http_url('/relative'))
+
+    def test_host_rules(self):
+        same_host = URLFilter()
+        self.assertTrue(same_host.allows('https://example.com/a', 'example.com'))
+        self.assertFalse(same_host.allows('https://docs.example.com/a', 'example.com'))
+        self.assertFalse(same_host.allows('mailto:me@example.com', 'example.com'))
+
+        subdomains = URLFilter(allow_subdomains=True)
+        self.assertTrue(subdomains.allows('https://docs.example.com/a', 'example.com'))
+        # Only real subdomains, not hosts that merely contain the name
+        self.assertFalse(subdomains.allows('https://notexample.com/a', 'example.com'))
+        self.assertFalse(subdomains.allows('https://example.com.evil.net/a', 'example.com'))
+
+    def test_patterns_and_extensions(self):
+        url_filter = URLFilter(include_pattern='/docs/', exclude_pattern=r'\?print',
+                               blocked_extensions=['.PDF'])
+        self.assertTrue(url_filter.allows('https://example.com/docs/a', 'example.com'))
+        self.assertFalse(url_filter.allows('https://example.com/blog/a', 'example.com'))
+        self.assertFalse(url_filter.allows('https://example.com/docs/a?print=1', 'example.com'))
+        self.assertFalse(url_filter.allows('https://example.com/docs/a.pdf', 'example.com'))
+
+    def test_github_paths(self):
+        url_filter = URLFilter(github_paths=GITHUB_PATHS)
+        self.assertTrue(url_filter.allows('https://github.com/owner/repo', 'github.com'))
+        self.assertTrue(url_filter.allows('https://github.com/owner/repo/issues/3', 'github.com'))
+        self.assertFalse(url_filter.allows('https://github.com/owner', 'github.com'))
+        self.assertFalse(url_filter.allows('https://github.com/search/repo/tree/x', 'github.com'))
+        self.assertFalse(url_filter.allows('https://github.com/owner/repo/settings', 'github.com'))
+
+    def test_github_path_type_keeps_pattern_order(self):
+        github = GitHubPaths(GITHUB_PATHS)
+        # Every pattern is searched anywhere in the path and the first one
+        # in order wins, as the per-pattern loop did
+        for path in ('/owner/repo', '/owner/repo/issues', '/owner/repo/tree/main/src',
+                     '/owner/repo/blob/main/setup.py', '/owner', '/a/b/c/releases/x'):
+            expected = next((name for name, pattern in GITHUB_PATHS.items()
+                             if re.search(pattern, path)), None)
+            self.assertEqual(github.path_type(path), expected, path)
+
+    def test_filter_links_keeps_order(self):
+        links = [{'url': f'https://{host}/p{i}'} for i, host in
+                 enumerate(['example.com', 'other.com', 'example.com', 'docs.example.com'] * 3)]
+        kept = URLFilter().filter_links(links, 'example.com')
+        self.assertEqual([link['url'] for link in kept],
+                         [link['url'] for link in links if '//example.com/' in link['url']])
+        self.assertEqual(URLFilter().filter_urls(['https://example.com/', 'https://x.com/'], 'example.com'),
+                         ['https://example.com/'])
+
+if __name__ == '__main__':
+    unittest.main()
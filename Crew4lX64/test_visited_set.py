@@ -0,0 +1,72 @@
+import time
+import unittest
+from Crew4lX64.visited_set import (
+    BloomVisitedSet, ExactVisitedSet, FingerprintVisitedSet, create_visited_set, load_visited_set
+)
+
+URLS = [f'https://example.com/page/{i}' for i in range(5000)]
+
+class TestVisitedSets(unittest.TestCase):
+
+    def test_membership_and_round_trip(self):
+        for backend in ('exact', 'fingerprint', 'bloom'):
+            with self.subTest(backend=backend):
+                visited = create_visited_set(backend)
+                visited.update(URLS)
+                self.assertEqual(len(visited), len(URLS))
+                self.assertTrue(all(url in visited for url in URLS))
+                self.assertNotIn('https://example.com/other', visited)
+
+                restored = load_visited_set(visited.to_state())
+                self.assertEqual(restored.backend, backend)
+                self.assertTrue(all(url in restored for url in URLS))
+
+                visited.discard(URLS[0])
+                self.assertNotIn(URLS[0], visited)
+                self.assertIn(URLS[1], visited)
+
+    def test_fingerprint_table_is_compact(self):
+        exact, compact = ExactVisitedSet(), FingerprintVisitedSet(initial_capacity=16)
+        exact.update(URLS)
+        compact.update(URLS)
+        self.assertLess(compact.memory_bytes(), exact.memory_bytes() / 4)
+        self.assertTrue(all(url in compact for url in URLS))
+
+    def test_fingerprint_table_doubles_when_full(self):
+        visited = FingerprintVisitedSet(initial_capacity=16)
+        for i in range(5000):
+            size = len(visited._keys)
+            visited.add(f'https://example.com/{i}')
+            self.assertIn(len(visited._keys), (size, 2 * size))
+            if len(visited._keys) != size:
+                # Right after a resize the table is half as full as max_load allows
+                self.assertGreaterEqual(len(visited) / len(visited._keys), visited.max_load / 2 - 0.01)
+        self.assertLessEqual(visited.memory_bytes() / len(visited), 12 / (visited.max_load / 2))
+
+    def test_max_age_and_expiry(self):
+        now = time.time()
+        for visited in (ExactVisitedSet(), FingerprintVisitedSet()):
+            with self.subTest(backend=visited.backend):
+                visited.add('https://example.com/old', now - 7200)
+                visited.add('https://example.com/new', now)
+                self.assertFalse(visited.seen('https://example.com/old', max_age=3600))
+                self.assertTrue(visited.seen('https://example.com/new', max_age=3600))
+
+                visited.expire(3600)
+                self.assertNotIn('https://example.com/old', visited)
+                self.assertEqual(len(visited), 1)
+
+    def test_bloom_filter_scales_within_error_rate(self):
+        visited = BloomVisitedSet(error_rate=0.01, initial_capacity=500)
+        visited.update(URLS)
+        self.assertGreater(visited.get_stats()['filters'], 1)
+        false_positives = sum(f'https://other.org/{i}' in visited for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.01)
+
+    def test_legacy_checkpoint_formats(self):
+        self.assertIn('https://example.com/', load_visited_set(['https://example.com/']))
+        self.assertTrue(load_visited_set({'https://example.com/': time.time()}).seen(
+            'https://example.com/', max_age=60))
+
+if __name__ == '__main__':
+    unittest.main()
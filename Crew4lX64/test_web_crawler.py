@@ -0,0 +1,931 @@
+import threading
+import unittest
+import asyncio
+import gzip
+import json
+import tempfile
+import time
+from unittest.mock import patch
+from urllib.parse import urlparse
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from bs4 import BeautifulSoup
+from Crew4lX64.web_crawler import WebCrawler
+from Crew4lX64.crawl_frontier import CrawlFrontier
+from Crew4lX64.rate_limiter import RateLimiter
+from Crew4lX64.cache_manager import CacheManager
+from Crew4lX64.checkpoint import CrawlCheckpoint
+from Crew4lX64.robots_rules import RobotsRules
+from Crew4lX64.data_exporter import DataExporter
+from Crew4lX64.visited_set import create_visited_set
+from Crew4lX64.near_duplicates import simhash
+from Crew4lX64.sitemap_parser import SitemapEntry
+
+SITE = {
+    'https://example.com/': ['/a', '/b', '/c'],
+    'https://example.com/a': ['/a1', '/a2'],
+    'https://example.com/b': ['/a', '/b1'],
+    'https://example.com/c': [],
+}
+
+def make_page(url):
+    links = ''.join(f'<a href="{href}">{href}</a>' for href in SITE.get(url, []))
+    return f'<html><head><title>{url}</title></head><body><p>{url}</p>{links}</body></html>'
+
+class TestCrawlFrontier(unittest.IsolatedAsyncioTestCase):
+
+    async def test_priority_order_and_dedup(self):
+        frontier = CrawlFrontier()
+        self.assertTrue(frontier.push('https://example.com/deep', 1))
+        self.assertTrue(frontier.push('https://example.com/shallow', 3))
+        self.assertFalse(frontier.push('https://example.com/deep', 2))
+
+        entry = await frontier.get()
+        self.assertEqual(entry.url, 'https://example.com/shallow')
+        await frontier.task_done(entry)
+        entry = await frontier.get()
+        self.assertEqual(entry.url, 'https://example.com/deep')
+        await frontier.task_done(entry)
+        self.assertIsNone(await frontier.get())
+
+    async def test_close_releases_waiting_workers(self):
+        frontier = CrawlFrontier()
+        frontier.push('https://example.com/', 1)
+        await frontier.get()
+        waiter = asyncio.create_task(frontier.get())
+        await asyncio.sleep(0)
+        await frontier.close()
+        self.assertIsNone(await waiter)
+
+    async def test_serves_due_hosts_while_others_wait(self):
+        # slow.com takes one request per 0.2s
+        limiter = RateLimiter(requests_per_second=1000, burst_size=1, domain_delays={'slow.com': 0.2})
+        frontier = CrawlFrontier(rate_limiter=limiter)
+        for url in ('https://slow.com/1', 'https://slow.com/2'):
+            frontier.push(url, 3)
+        for url in ('https://fast.com/1', 'https://fast.com/2'):
+            frontier.push(url, 2)
+
+        start = time.monotonic()
+        order = []
+        for _ in range(4):
+            entry = await frontier.get()
+            order.append((entry.url, time.monotonic() - start))
+            await limiter.wait(entry.url)
+            await frontier.task_done(entry)
+
+        self.assertEqual([url for url, _ in order],
+                         ['https://slow.com/1', 'https://fast.com/1', 'https://fast.com/2', 'https://slow.com/2'])
+        self.assertLess(order[2][1], 0.1)
+        self.assertGreaterEqual(order[3][1], 0.19)
+        self.assertEqual(frontier.get_stats()['hosts'], 0)
+        self.assertIsNone(await frontier.get())
+
+    async def test_workers_do_not_sleep_in_rate_limiter(self):
+        limiter = RateLimiter(requests_per_second=1000, burst_size=1,
+                              domain_delays={'slow.com': 0.1, 'fast.com': 0.02})
+        frontier = CrawlFrontier(rate_limiter=limiter, max_per_host=4)
+        for i in range(5):
+            frontier.push(f'https://slow.com/{i}', 1)
+        for i in range(20):
+            frontier.push(f'https://fast.com/{i}', 1)
+        waits = []
+        fast_done = []
+        start = time.monotonic()
+
+        async def worker():
+            while True:
+                entry = await frontier.get()
+                if entry is None:
+                    return
+                before = time.monotonic()
+                await limiter.wait(entry.url)
+                waits.append(time.monotonic() - before)
+                await asyncio.sleep(0.01)  # The fetch
+                if 'fast.com' in entry.url:
+                    fast_done.append(time.monotonic() - start)
+                await frontier.task_done(entry)
+
+        await asyncio.gather(*(worker() for _ in range(4)))
+        self.assertEqual(len(waits), 25)
+        self.assertLess(max(waits), 0.005)
+        # 20 requests at 0.02s spacing, unaffected by the slow host
+        self.assertLess(max(fast_done), 0.6)
+
+    async def test_better_entry_does_not_skip_the_rate_limit(self):
+        limiter = RateLimiter(requests_per_second=1000, burst_size=1, domain_delays={'a.com': 0.2})
+        frontier = CrawlFrontier(rate_limiter=limiter)
+        frontier.push('https://a.com/1', 1, priority=5)
+        frontier.push('https://a.com/2', 1, priority=1)
+
+        start = time.monotonic()
+        first = await frontier.get()
+        second = await frontier.get()
+        self.assertEqual((first.url, second.url), ('https://a.com/2', 'https://a.com/1'))
+        # The second URL is only handed out once its slot is due
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        before = time.monotonic()
+        await limiter.wait(second.url)
+        self.assertLess(time.monotonic() - before, 0.005)
+
+    async def test_max_per_host(self):
+        frontier = CrawlFrontier(max_per_host=1)
+        frontier.push('https://a.com/1', 3)
+        frontier.push('https://a.com/2', 3)
+        frontier.push('https://b.com/1', 1)
+
+        first = await frontier.get()
+        self.assertEqual(first.url, 'https://a.com/1')
+        self.assertEqual((await frontier.get()).url, 'https://b.com/1')
+        waiter = asyncio.create_task(frontier.get())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+        await frontier.task_done(first)
+        self.assertEqual((await waiter).url, 'https://a.com/2')
+
+    async def test_snapshot_covers_every_host(self):
+        frontier = CrawlFrontier(max_per_host=1)
+        for url in ('https://a.com/1', 'https://a.com/2', 'https://b.com/1'):
+            frontier.push(url, 2)
+        await frontier.get()
+
+        restored = CrawlFrontier()
+        restored.restore(frontier.snapshot())
+        self.assertEqual(len(restored), 3)
+        self.assertEqual(restored.get_stats()['hosts'], 2)
+
+class TestWebCrawlerEngine(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.crawler = WebCrawler(max_concurrency=3, max_per_host=2)
+        self.crawler.respect_robots = False
+        self.fetched = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def fake_fetch(url, retries=3):
+            self.fetched.append(url)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            return make_page(url)
+
+        patcher = patch.object(self.crawler, '_fetch_content', side_effect=fake_fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_crawl_nests_children_and_fetches_each_page_once(self):
+        result = await self.crawler.crawl('https://example.com/', depth=3)
+
+        self.assertIsNotNone(result)
+        self.assertEqual(len(self.fetched), len(set(self.fetched)))
+        self.assertIn('https://example.com/a1', self.fetched)
+        children = {link['url']: link.get('content') for link in result['links']}
+        self.assertEqual(children['https://example.com/a']['url'], 'https://example.com/a')
+        self.assertLessEqual(self.max_in_flight, 2)
+
+    async def test_depth_one_fetches_only_seed(self):
+        await self.crawler.crawl('https://example.com/', depth=1)
+        self.assertEqual(self.fetched, ['https://example.com/'])
+
+    async def test_page_is_parsed_once(self):
+        with patch('Crew4lX64.parsed_document.BeautifulSoup', wraps=BeautifulSoup) as soup_cls:
+            result = await self.crawler.crawl('https://example.com/', depth=1)
+        self.assertEqual(soup_cls.call_count, 1)
+        self.assertEqual(len(result['links']), 3)
+        self.assertIn('https://example.com/', result['content']['text'])
+
+    async def test_process_pool_matches_inline_processing(self):
+        inline = await self.crawler.crawl('https://example.com/', depth=1)
+
+        crawler = WebCrawler(max_concurrency=3)
+        await crawler.setup(respect_robots=False, parse_workers=2)
+        self.addAsyncCleanup(crawler.close)
+        async def fake_fetch(url, retries=3):
+            return make_page(url)
+
+        with patch.object(crawler, '_fetch_content', side_effect=fake_fetch):
+            pooled = await crawler.crawl('https://example.com/', depth=1)
+
+        self.assertIsNotNone(crawler._process_pool)
+        # Workers are not forked from the threaded crawler process
+        self.assertNotEqual(crawler._process_pool._mp_context.get_start_method(), 'fork')
+        for key in ('content', 'links', 'media'):
+            self.assertEqual(pooled[key], inline[key])
+        await crawler.close()
+        self.assertIsNone(crawler._process_pool)
+
+class TestCrawlStream(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.crawler = WebCrawler(max_concurrency=2)
+        self.crawler.respect_robots = False
+        self.fetched = []
+
+        async def fake_fetch(url, retries=3):
+            self.fetched.append(url)
+            return make_page(url)
+
+        self.crawler._fetch_content = fake_fetch
+
+    async def test_yields_flat_records_parents_first(self):
+        records = [record async for record in self.crawler.crawl_stream('https://example.com/', depth=3)]
+
+        urls = [record['url'] for record in records]
+        self.assertEqual(len(urls), 7)
+        self.assertEqual(urls[0], 'https://example.com/')
+        by_url = {record['url']: record for record in records}
+        self.assertEqual(by_url['https://example.com/a1']['parent'], 'https://example.com/a')
+        self.assertEqual(by_url['https://example.com/a1']['depth'], 2)
+        for record in records:
+            if record['parent']:
+                self.assertLess(urls.index(record['parent']), urls.index(record['url']))
+            self.assertTrue(all('content' not in link for link in record['result']['links']))
+
+    async def test_frontier_stats_survive_a_drained_frontier(self):
+        [record async for record in self.crawler.crawl_stream('https://example.com/', depth=3)]
+        stats = (await self.crawler.get_stats())['frontier']
+        self.assertEqual(stats['enqueued'], 7)
+        self.assertEqual(stats['dequeued'], 7)
+
+    async def test_multiple_seeds(self):
+        seeds = ['https://example.com/b', 'https://example.com/c']
+        records = [record async for record in self.crawler.crawl_stream(seeds, depth=1)]
+        self.assertEqual(sorted(record['url'] for record in records), seeds)
+
+    async def test_closing_early_checkpoints_the_crawl(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            self.crawler.checkpoint = CrawlCheckpoint(state_dir)
+            stream = self.crawler.crawl_stream('https://example.com/', depth=3)
+            first = await stream.__anext__()
+            await stream.aclose()
+
+            self.assertEqual(first['url'], 'https://example.com/')
+            self.assertTrue(self.crawler.checkpoint.exists())
+            self.assertLess(len(self.fetched), 7)
+
+    async def test_exporter_writes_records_as_jsonl(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            files = await DataExporter().export_stream(
+                self.crawler.crawl_stream('https://example.com/', depth=2),
+                {'url': 'https://example.com/', 'output_dir': output_dir}
+            )
+            self.assertEqual(len(files), 1)
+            with open(files[0], encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[0]['result']['url'], 'https://example.com/')
+
+class TestLinkExtraction(unittest.IsolatedAsyncioTestCase):
+
+    async def test_base_href_nofollow_and_text(self):
+        page = """<html><head><base href="/docs/v2/"><meta name="description" content="x"></head><body>
+            <a href="intro.html#top" title="Intro"> Getting <b>started</b> </a>
+            <a href="../v1/old" rel="NoFollow noopener">old</a>
+            <a href="//cdn.example.org/file">cdn</a>
+            <a href="?page=2">next</a>
+            <a href="/café">café</a>
+            <a href="mailto:me@example.com">mail</a><a href="#frag">frag</a>
+        </body></html>"""
+        links = await WebCrawler()._extract_links(page, 'https://example.com/blog/post')
+
+        self.assertEqual([link['url'] for link in links], [
+            'https://example.com/docs/v2/intro.html',
+            'https://example.com/docs/v1/old',
+            'https://cdn.example.org/file',
+            'https://example.com/docs/v2/?page=2',
+            'https://example.com/café',
+        ])
+        self.assertEqual(links[0]['text'], 'Gettingstarted')
+        self.assertEqual(links[0]['title'], 'Intro')
+        self.assertEqual(links[2]['type'], 'external')
+        self.assertEqual(links[4]['text'], 'café')
+        self.assertEqual([bool(link.get('nofollow')) for link in links], [False, True, False, False, False])
+
+    async def test_robots_meta_nofollow_marks_every_link(self):
+        page = '<html><head><meta name="Robots" content="noindex, NOFOLLOW"></head>' \
+               '<body><a href="/a">a</a><a href="/b">b</a></body></html>'
+        links = await WebCrawler()._extract_links(page, 'https://example.com/')
+        self.assertTrue(all(link['nofollow'] for link in links))
+
+    async def test_honor_nofollow_stops_following(self):
+        crawler = WebCrawler(max_concurrency=1)
+        crawler.respect_robots = False
+        pages = {
+            'https://example.com/': '<a href="/open">open</a><a href="/closed" rel="nofollow">closed</a>',
+            'https://example.com/open': 'open',
+            'https://example.com/closed': 'closed',
+        }
+
+        async def fake_fetch(url, retries=3):
+            return f'<html><body>{pages[url]}</body></html>'
+
+        crawler._fetch_content = fake_fetch
+        crawler.honor_nofollow = True
+        urls = [r['url'] async for r in crawler.crawl_stream('https://example.com/', depth=2)]
+        self.assertEqual(urls, ['https://example.com/', 'https://example.com/open'])
+
+class TestFocusedCrawl(unittest.IsolatedAsyncioTestCase):
+
+    async def test_relevant_pages_come_first(self):
+        pages = {
+            'https://example.com/': '<p>Welcome</p><a href="/cooking">Cooking</a><a href="/sports">Sports</a>'
+                                    '<a href="/research/gnn">Graph neural networks</a>',
+            'https://example.com/cooking': '<p>Bread and cakes</p><a href="/bread">Bread</a>',
+            'https://example.com/sports': '<p>Football results</p>',
+            'https://example.com/research/gnn': '<p>Graph neural networks learn on graphs.</p>'
+                                                '<a href="/research/gnn-pooling">Pooling in neural networks</a>',
+            'https://example.com/research/gnn-pooling': '<p>Graph pooling</p>',
+            'https://example.com/bread': '<p>Sourdough</p>',
+        }
+
+        async def fake_fetch(url, retries=3):
+            return f'<html><body>{pages[url]}</body></html>'
+
+        crawler = WebCrawler(max_concurrency=1)
+        crawler._fetch_content = fake_fetch
+        await crawler.setup(rate_limit=100, respect_robots=False, focus_topic='graph neural networks')
+        try:
+            records = [r async for r in crawler.crawl_stream('https://example.com/', depth=3)]
+        finally:
+            await crawler.close()
+
+        urls = [record['url'] for record in records]
+        self.assertEqual(urls[:3], ['https://example.com/', 'https://example.com/research/gnn',
+                                    'https://example.com/research/gnn-pooling'])
+        self.assertEqual(len(urls), 6)
+        relevance = {record['url']: record.get('metadata', {}).get('relevance') for record in records}
+        self.assertGreater(relevance['https://example.com/research/gnn'], relevance['https://example.com/sports'])
+
+    async def test_sitemap_urls_share_the_relevance_order(self):
+        pages = {
+            'https://example.com/': '<p>Welcome</p><a href="/cooking">Cooking</a>'
+                                    '<a href="/research/gnn">Graph neural networks</a>',
+        }
+
+        async def fake_fetch(url, retries=3):
+            return f'<html><body>{pages.get(url, "<p>Nothing here</p>")}</body></html>'
+
+        async def fake_sitemap(url):
+            for loc in ('https://example.com/shop', 'https://example.com/blog/graph-neural-networks'):
+                yield SitemapEntry(loc=loc, priority=1.0)
+
+        crawler = WebCrawler(max_concurrency=1)
+        crawler._fetch_content = fake_fetch
+        crawler.iter_sitemap = fake_sitemap
+        await crawler.setup(rate_limit=100, respect_robots=False, use_sitemaps=True,
+                            focus_topic='graph neural networks')
+        try:
+            records = [r async for r in crawler.crawl_stream('https://example.com/', depth=2)]
+        finally:
+            await crawler.close()
+
+        urls = [record['url'] for record in records]
+        # Off-topic sitemap URLs no longer jump ahead of relevant links
+        self.assertLess(urls.index('https://example.com/research/gnn'), urls.index('https://example.com/shop'))
+        self.assertLess(urls.index('https://example.com/blog/graph-neural-networks'),
+                        urls.index('https://example.com/cooking'))
+        relevance = {record['url']: record.get('metadata', {}).get('relevance') for record in records}
+        self.assertGreater(relevance['https://example.com/blog/graph-neural-networks'], 0.0)
+        self.assertEqual(relevance['https://example.com/shop'], 0.0)
+
+class TestCrawlBudgets(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.crawler = WebCrawler(max_concurrency=1)
+        self.fetched = []
+
+        async def fake_fetch(url, retries=3):
+            self.fetched.append(url)
+            if url == 'https://bad.com/':
+                return '<html><body>' + ''.join(f'<a href="/p{i}">p{i}</a>' for i in range(10)) + '</body></html>'
+            if url.startswith('https://bad.com/'):
+                return None
+            return make_page(url)
+
+        self.crawler._fetch_content = fake_fetch
+        self.addAsyncCleanup(self.crawler.close)
+
+    async def test_global_page_budget_stops_the_crawl(self):
+        await self.crawler.setup(rate_limit=100, respect_robots=False, max_pages=3)
+        records = [r async for r in self.crawler.crawl_stream('https://example.com/', depth=3)]
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(len(self.fetched), 3)
+        budget = (await self.crawler.get_stats())['budget']
+        self.assertEqual(budget['remaining_pages'], 0)
+        self.assertEqual(budget['exhausted'], 'pages')
+        self.assertIsNone(budget['remaining_bytes'])
+
+    async def test_failing_domain_is_aborted(self):
+        await self.crawler.setup(rate_limit=100, respect_robots=False, max_error_rate=0.3)
+        self.crawler.budget.min_error_samples = 3
+        records = [r async for r in self.crawler.crawl_stream(['https://bad.com/', 'https://example.com/'], depth=2)]
+
+        self.assertEqual(len([url for url in self.fetched if 'bad.com' in url]), 3)
+        self.assertIn('https://example.com/a', [record['url'] for record in records])
+        stats = await self.crawler.get_stats()
+        self.assertEqual(stats['budget']['stopped_domains'], ['bad.com'])
+        self.assertEqual(stats['budget']['domains']['bad.com']['stopped'], 'error_rate')
+        self.assertEqual(stats['budget_skipped'], 8)
+
+    async def test_max_depth_caps_the_requested_depth(self):
+        await self.crawler.setup(rate_limit=100, respect_robots=False, max_depth=1)
+        records = [r async for r in self.crawler.crawl_stream('https://example.com/', depth=3)]
+        self.assertEqual([record['url'] for record in records], ['https://example.com/'])
+        self.assertEqual((await self.crawler.get_stats())['budget'], {})
+
+ARTICLE = ' '.join(f'Sentence {i} of the article talks about crawling at scale.' for i in range(40))
+
+class TestNearDuplicates(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.crawler = WebCrawler(max_concurrency=1)
+        self.crawler.respect_robots = False
+        pages = {
+            'https://example.com/': '<a href="/post">post</a><a href="/post/print">print</a>'
+                                    '<a href="/other">other</a>',
+            'https://example.com/post': f'<article><h1>Post</h1><p>{ARTICLE}</p></article>',
+            'https://example.com/post/print': f'<article><p>{ARTICLE}</p><a href="/more">more</a></article>',
+            'https://example.com/other': f'<article><p>{make_page("x") * 30}</p></article>',
+            'https://example.com/more': '<p>more</p>',
+        }
+
+        async def fake_fetch(url, retries=3):
+            return f'<html><body>{pages[url]}</body></html>'
+
+        self.crawler._fetch_content = fake_fetch
+
+    async def crawl(self, **options):
+        await self.crawler.setup(rate_limit=100, respect_robots=False, detect_duplicates=True, **options)
+        try:
+            return {r['url']: r['result'] async for r in self.crawler.crawl_stream('https://example.com/', depth=3)}
+        finally:
+            await self.crawler.close()
+
+    async def test_marks_duplicates_and_reports_ratio(self):
+        results = await self.crawl()
+        self.assertEqual(results['https://example.com/post/print']['duplicate_of'], 'https://example.com/post')
+        self.assertNotIn('duplicate_of', results['https://example.com/post'])
+        self.assertNotIn('duplicate_of', results['https://example.com/other'])
+        self.assertIn('https://example.com/more', results)
+        stats = (await self.crawler.get_stats())['near_duplicates']
+        self.assertEqual(stats['duplicates'], 1)
+        self.assertGreater(stats['dedup_ratio'], 0)
+
+    async def test_skip_and_do_not_follow(self):
+        results = await self.crawl(duplicate_action='skip')
+        self.assertNotIn('https://example.com/post/print', results)
+        self.assertNotIn('https://example.com/more', results)
+
+        await self.asyncSetUp()
+        results = await self.crawl(follow_duplicate_links=False)
+        self.assertIn('https://example.com/post/print', results)
+        self.assertNotIn('https://example.com/more', results)
+
+    async def test_stats_reported_before_any_page_is_indexed(self):
+        await self.crawler.setup(rate_limit=100, respect_robots=False, detect_duplicates=True)
+        try:
+            stats = (await self.crawler.get_stats())['near_duplicates']
+        finally:
+            await self.crawler.close()
+        self.assertEqual(stats['duplicates'], 0)
+
+    async def test_fingerprints_only_when_enabled(self):
+        with patch('Crew4lX64.page_processor.simhash', wraps=simhash) as fingerprint:
+            await self.crawler.setup(rate_limit=100, respect_robots=False)
+            try:
+                [r async for r in self.crawler.crawl_stream('https://example.com/', depth=3)]
+            finally:
+                await self.crawler.close()
+            self.assertEqual(fingerprint.call_count, 0)
+            await self.asyncSetUp()
+            await self.crawl()
+            self.assertGreater(fingerprint.call_count, 0)
+
+class TestURLCanonicalization(unittest.IsolatedAsyncioTestCase):
+
+    async def test_url_variants_and_canonical_pages_are_fetched_once(self):
+        pages = {
+            'https://example.com/': [
+                '/print-a', '/a', '/a#top', '/a?utm_source=feed', 'https://EXAMPLE.com:443/a'
+            ],
+            'https://example.com/a': [],
+            'https://example.com/print-a': [],
+        }
+        crawler = WebCrawler(max_concurrency=1)
+        crawler.respect_robots = False
+        fetched = []
+
+        async def fake_fetch(url, retries=3):
+            fetched.append(url)
+            links = ''.join(f'<a href="{href}">{href}</a>' for href in pages[url])
+            head = '<link rel="canonical" href="/a">' if url.endswith('/print-a') else ''
+            return f'<html><head>{head}</head><body>{links}</body></html>'
+
+        with patch.object(crawler, '_fetch_content', side_effect=fake_fetch):
+            result = await crawler.crawl('https://example.com/', depth=2)
+
+        self.assertEqual(result['url'], 'https://example.com/')
+        # /print-a declares /a as canonical, so no variant of /a is fetched again
+        self.assertEqual(fetched, ['https://example.com/', 'https://example.com/print-a'])
+        # Links keep the form they were found in, minus fragments
+        self.assertEqual({link['url'] for link in result['links']},
+                         {'https://example.com/a', 'https://example.com/print-a',
+                          'https://example.com/a?utm_source=feed'})
+
+    async def test_pages_are_fetched_as_found_and_links_resolve_against_the_final_url(self):
+        async def page(request):
+            return web.Response(text='<html><body><a href="intro.html">intro</a>'
+                                     '<a href="list?page">list</a></body></html>',
+                                content_type='text/html')
+
+        async def moved(request):
+            raise web.HTTPFound('/docs/')
+
+        requested = []
+
+        @web.middleware
+        async def record(request, handler):
+            requested.append(request.path_qs)
+            return await handler(request)
+
+        app = web.Application(middlewares=[record])
+        app.router.add_get('/docs/', page)
+        app.router.add_get('/docs/intro.html', page)
+        app.router.add_get('/docs/list', page)
+        app.router.add_get('/old', moved)
+        server = TestServer(app)
+        await server.start_server()
+        crawler = WebCrawler(max_concurrency=1)
+        await crawler.setup(rate_limit=100, respect_robots=False)
+        try:
+            base = str(server.make_url('/'))
+            urls = [record['url'] async for record in crawler.crawl_stream(base + 'old', depth=2)]
+        finally:
+            await crawler.close()
+            await server.close()
+
+        self.assertEqual(requested[:2], ['/old', '/docs/'])
+        self.assertIn('/docs/intro.html', requested)
+        self.assertIn('/docs/list?page', requested)
+        self.assertIn(base + 'docs/list?page', urls)
+
+class TestCheckpointResume(unittest.IsolatedAsyncioTestCase):
+
+    def make_crawler(self, state_dir, stop_after=None, visited_backend='exact'):
+        crawler = WebCrawler(max_concurrency=1)
+        crawler.respect_robots = False
+        crawler.visited_backend = visited_backend
+        crawler.visited_urls = create_visited_set(visited_backend)
+        crawler.checkpoint = CrawlCheckpoint(state_dir)
+        crawler.checkpoint_interval = 2
+        fetched = []
+
+        async def fake_fetch(url, retries=3):
+            fetched.append(url)
+            if stop_after and len(fetched) >= stop_after:
+                crawler.terminate_crawl = True
+            return make_page(url)
+
+        crawler._fetch_content = fake_fetch
+        return crawler, fetched
+
+    async def test_resume_skips_completed_pages(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            first, first_fetched = self.make_crawler(state_dir, stop_after=3)
+            partial = await first.crawl('https://example.com/', depth=3)
+            self.assertEqual(len(first_fetched), 3)
+            self.assertTrue(first.checkpoint.exists())
+
+            second, second_fetched = self.make_crawler(state_dir)
+            result = await second.crawl('https://example.com/', depth=3, resume=True)
+
+            self.assertFalse(set(first_fetched) & set(second_fetched))
+            self.assertEqual(len(first_fetched) + len(second_fetched), 7)
+            self.assertEqual(second.stats['pages_crawled'], 7)
+            children = {link['url']: link.get('content') for link in result['links']}
+            self.assertEqual(children['https://example.com/a']['links'][0]['content']['url'],
+                             'https://example.com/a1')
+            # A completed crawl leaves no checkpoint behind
+            self.assertFalse(second.checkpoint.exists())
+            self.assertIsNotNone(partial)
+
+    async def test_resume_with_compact_visited_sets(self):
+        for backend in ('fingerprint', 'bloom'):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as state_dir:
+                first, first_fetched = self.make_crawler(state_dir, stop_after=3, visited_backend=backend)
+                await first.crawl('https://example.com/', depth=3)
+                second, second_fetched = self.make_crawler(state_dir, visited_backend=backend)
+                await second.crawl('https://example.com/', depth=3, resume=True)
+
+                self.assertEqual(second.visited_urls.backend, backend)
+                self.assertFalse(set(first_fetched) & set(second_fetched))
+                self.assertEqual(len(first_fetched) + len(second_fetched), 7)
+
+    async def test_periodic_checkpoints_are_written_off_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            crawler, _ = self.make_crawler(state_dir, stop_after=5)
+            threads = []
+            write_state = crawler.checkpoint.write_state
+
+            def record_thread(state):
+                threads.append(threading.current_thread())
+                write_state(state)
+
+            crawler.checkpoint.write_state = record_thread
+            await crawler.crawl('https://example.com/', depth=3)
+            # Periodic saves run in the executor; the final one when stopping does not
+            self.assertGreater(len(threads), 1)
+            self.assertTrue(all(thread is not threading.main_thread() for thread in threads[:-1]))
+            self.assertIs(threads[-1], threading.main_thread())
+            self.assertTrue(crawler.checkpoint.exists())
+
+    async def test_completed_crawl_waits_for_a_slow_checkpoint_write(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            crawler, _ = self.make_crawler(state_dir)
+            write_state = crawler.checkpoint.write_state
+
+            def slow_write(state):
+                time.sleep(0.2)
+                write_state(state)
+
+            crawler.checkpoint.write_state = slow_write
+            await crawler.crawl('https://example.com/', depth=3)
+            self.assertFalse(crawler.checkpoint.exists())
+            await asyncio.sleep(0.3)
+            self.assertFalse(crawler.checkpoint.exists())
+
+    async def test_resume_without_checkpoint_starts_fresh(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            crawler, fetched = self.make_crawler(state_dir)
+            await crawler.crawl('https://example.com/', depth=2, resume=True)
+            self.assertEqual(len(fetched), 4)
+
+class TestConditionalRevalidation(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.requests = []
+
+        async def page(request):
+            self.requests.append(dict(request.headers))
+            if request.headers.get('If-None-Match') == '"v1"':
+                return web.Response(status=304, headers={'ETag': '"v1"'})
+            return web.Response(text='<html><body>v1</body></html>', content_type='text/html',
+                                headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+
+        app = web.Application()
+        app.router.add_get('/page', page)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.crawler = WebCrawler()
+        await self.crawler.setup(rate_limit=100, cache_manager=CacheManager(
+            cache_dir=self.tmpdir.name, default_ttl=0
+        ))
+
+    async def asyncTearDown(self):
+        await self.crawler.close()
+        await self.server.close()
+        self.tmpdir.cleanup()
+
+    async def test_recrawl_sends_validators_and_reuses_body_on_304(self):
+        url = str(self.server.make_url('/page'))
+        first = await self.crawler._fetch_content(url)
+        second = await self.crawler._fetch_content(url)
+
+        self.assertEqual(first, second)
+        self.assertNotIn('If-None-Match', self.requests[0])
+        self.assertEqual(self.requests[1]['If-None-Match'], '"v1"')
+        self.assertEqual(self.requests[1]['If-Modified-Since'], 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual(self.crawler.stats['revalidated'], 1)
+
+    async def test_cache_writes_run_off_the_event_loop(self):
+        threads = []
+        cache_set = self.crawler.cache_manager.set
+
+        def record_thread(key, value, ttl=None):
+            threads.append(threading.current_thread())
+            cache_set(key, value, ttl)
+
+        self.crawler.cache_manager.set = record_thread
+        url = str(self.server.make_url('/page'))
+        await self.crawler._fetch_content(url)
+        await self.crawler._fetch_content(url)
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(all(thread is not threading.main_thread() for thread in threads))
+        self.assertEqual(self.crawler.cache_manager.get_stale(url)['etag'], '"v1"')
+
+class TestBudgetAccounting(unittest.IsolatedAsyncioTestCase):
+
+    BODY = ('<html><body>' + '\u00e9' * 1000 + '</body></html>').encode('utf-8')
+
+    async def asyncSetUp(self):
+        async def page(request):
+            return web.Response(body=self.BODY, content_type='text/html', charset='utf-8')
+
+        app = web.Application()
+        app.router.add_get('/page', page)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    async def crawl_once(self, url):
+        crawler = WebCrawler()
+        await crawler.setup(rate_limit=100, respect_robots=False, max_requests_per_domain=10,
+                            cache_manager=CacheManager(cache_dir=self.tmpdir.name))
+        try:
+            await crawler.crawl(url, depth=1)
+            return crawler.budget.get_stats()
+        finally:
+            await crawler.close()
+
+    async def test_bytes_are_response_bytes_and_cache_hits_are_free(self):
+        url = str(self.server.make_url('/page'))
+        first = await self.crawl_once(url)
+        self.assertEqual(first['bytes'], len(self.BODY))
+        self.assertEqual(first['requests'], 1)
+
+        second = await self.crawl_once(url)
+        self.assertEqual((second['requests'], second['bytes'], second['cached']), (0, 0, 1))
+        self.assertEqual(second['domains'][urlparse(url).netloc]['remaining_pages'], 10)
+
+class TestResponseGating(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.streamed = {}
+
+        async def streamed(request):
+            response = web.StreamResponse(headers={'Content-Type': 'text/html'})
+            await response.prepare(request)
+            self.streamed['chunks'] = 0
+            for _ in range(100):
+                await response.write(b'<p>' + b'x' * 1000 + b'</p>')
+                self.streamed['chunks'] += 1
+            await response.write_eof()
+            return response
+
+        def static(body, content_type):
+            async def handler(request):
+                return web.Response(body=body, headers={'Content-Type': content_type})
+            return handler
+
+        app = web.Application()
+        app.router.add_get('/page', static(
+            '<html><meta charset="utf-8"><body>สวัสดี</body></html>'.encode('utf-8'), 'text/html'))
+        app.router.add_get('/big', static(b'x' * 5000, 'text/html'))
+        app.router.add_get('/image.png', static(b'\x89PNG', 'image/png'))
+        app.router.add_get('/notes.txt', static(b'a < b', 'text/plain'))
+        app.router.add_get('/stream', streamed)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.crawler = WebCrawler()
+        await self.crawler.setup(rate_limit=100, max_file_size=4096)
+
+    async def asyncTearDown(self):
+        await self.crawler.close()
+        await self.server.close()
+
+    async def fetch(self, path):
+        return await self.crawler._fetch_content(str(self.server.make_url(path)))
+
+    async def test_html_is_decoded_with_declared_charset(self):
+        self.assertIn('สวัสดี', await self.fetch('/page'))
+
+    async def test_oversized_and_unsupported_responses_are_skipped(self):
+        self.assertEqual(await self.fetch('/big'), '')
+        self.assertEqual(await self.fetch('/image.png'), '')
+        self.assertEqual(await self.fetch('/stream'), '')
+        self.assertEqual(self.crawler.stats['skipped_content'], 3)
+
+    async def test_plain_text_goes_to_its_handler(self):
+        self.assertIn('<pre>a &lt; b</pre>', await self.fetch('/notes.txt'))
+
+    async def test_skipped_pages_are_not_errors(self):
+        result = await self.crawler._crawl_page(str(self.server.make_url('/image.png')))
+        self.assertIsNone(result)
+        self.assertEqual(self.crawler.stats['errors'], 0)
+
+    def test_blocked_extensions(self):
+        self.crawler.blocked_extensions = ['.exe']
+        self.assertFalse(self.crawler.should_crawl_url('https://example.com/setup.EXE', 'example.com'))
+        self.assertTrue(self.crawler.should_crawl_url('https://example.com/setup', 'example.com'))
+
+class TestRobotsFetching(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.robots_requests = 0
+
+        async def robots(request):
+            self.robots_requests += 1
+            await asyncio.sleep(0.05)
+            return web.Response(text='User-agent: *\nDisallow: /private/\nCrawl-delay: 4\n')
+
+        app = web.Application()
+        app.router.add_get('/robots.txt', robots)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.crawler = WebCrawler()
+        await self.crawler.setup()
+
+    async def asyncTearDown(self):
+        await self.crawler.close()
+        await self.server.close()
+        self.tmpdir.cleanup()
+
+    async def test_concurrent_checks_share_one_fetch(self):
+        urls = [str(self.server.make_url(f'/page{i}')) for i in range(50)]
+        urls.append(str(self.server.make_url('/private/x')))
+        results = await asyncio.gather(*(self.crawler.check_robots_txt(u) for u in urls))
+
+        self.assertEqual(self.robots_requests, 1)
+        self.assertTrue(all(results[:-1]))
+        self.assertFalse(results[-1])
+        self.assertEqual(self.crawler.rate_limiter.get_delay(urls[0]), 4.0)
+
+    async def test_robots_cache_survives_restart(self):
+        filename = f'{self.tmpdir.name}/robots.json'
+        await self.crawler.check_robots_txt(str(self.server.make_url('/')))
+        self.crawler.save_robots_cache(filename)
+
+        restarted = WebCrawler()
+        restarted.load_robots_cache(filename)
+        restarted.session = self.crawler.session
+        self.assertFalse(await restarted.check_robots_txt(str(self.server.make_url('/private/x'))))
+        self.assertEqual(self.robots_requests, 1)
+
+class TestSitemapSeeding(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        pages = b"""<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>{base}/s1</loc><lastmod>2024-05-01</lastmod><priority>0.9</priority></url>
+            <url><loc>{base}/s2?utm_source=feed</loc></url>
+            <url><loc>https://elsewhere.example/x</loc></url>
+        </urlset>"""
+
+        async def robots(request):
+            return web.Response(text='User-agent: *\nDisallow: /private/\nSitemap: /sitemap_index.xml\n')
+
+        async def index(request):
+            return web.Response(content_type='application/xml', text=(
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f'<sitemap><loc>{self.base}/sitemap-pages.xml.gz</loc></sitemap>'
+                f'<sitemap><loc>{self.base}/sitemap_index.xml</loc></sitemap>'
+                '</sitemapindex>'
+            ))
+
+        async def gzipped(request):
+            body = gzip.compress(pages.replace(b'{base}', self.base.encode()))
+            return web.Response(body=body, content_type='application/gzip')
+
+        async def page(request):
+            return web.Response(text='<html><body>no links</body></html>', content_type='text/html')
+
+        app = web.Application()
+        app.router.add_get('/robots.txt', robots)
+        app.router.add_get('/sitemap_index.xml', index)
+        app.router.add_get('/sitemap-pages.xml.gz', gzipped)
+        app.router.add_get('/{name}', page)
+        app.router.add_get('/', page)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.base = str(self.server.make_url('')).rstrip('/')
+        self.crawler = WebCrawler()
+        await self.crawler.setup(rate_limit=100, use_sitemaps=True)
+
+    async def asyncTearDown(self):
+        await self.crawler.close()
+        await self.server.close()
+
+    async def test_sitemap_urls_seed_the_frontier(self):
+        records = [r async for r in self.crawler.crawl_stream(self.base + '/', depth=2)]
+
+        by_url = {record['url']: record for record in records}
+        # Sitemap URLs are fetched as listed; canonical forms only deduplicate them
+        self.assertEqual(set(by_url), {self.base + '/', self.base + '/s1', self.base + '/s2?utm_source=feed'})
+        self.assertEqual(by_url[self.base + '/s1']['metadata'],
+                         {'lastmod': '2024-05-01', 'priority': 0.9})
+        self.assertIsNone(by_url[self.base + '/s1']['parent'])
+        self.assertEqual(by_url[self.base + '/s1']['depth'], 1)
+        # The index lists itself; it is only fetched once
+        self.assertEqual(self.crawler.stats['sitemaps_fetched'], 2)
+        self.assertEqual(self.crawler.stats['sitemap_urls'], 2)
+
+    async def test_depth_one_ignores_sitemaps(self):
+        records = [r async for r in self.crawler.crawl_stream(self.base + '/', depth=1)]
+        self.assertEqual([record['url'] for record in records], [self.base + '/'])
+        self.assertEqual(self.crawler.stats['sitemaps_fetched'], 0)
+
+    async def test_falls_back_to_sitemap_xml(self):
+        self.crawler.robots_cache[self.base.split('//')[1]] = {
+            'timestamp': time.time(), 'rules': RobotsRules({})
+        }
+        self.assertEqual(await self.crawler.discover_sitemaps(self.base + '/page'),
+                         [self.base + '/sitemap.xml'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import posixpath
+from typing import Iterable, Optional
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+DEFAULT_TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'spm'
+}
+DEFAULT_TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+class URLCanonicalizer:
+    """Reduce URL variants that point at the same page to a single form.
+
+    Fragments are dropped, scheme and host are lowercased, default ports and
+    dot segments are removed, tracking parameters are stripped and the
+    remaining query parameters are sorted, each kept as written (``?page``
+    stays ``?page``). Trailing slashes are kept unless
+    ``strip_trailing_slash`` is set, since servers may treat ``/docs`` and
+    ``/docs/`` as different pages.
+
+    The result is meant as a key for deduplication and caching; pages are
+    still requested at the URL as it was found.
+    """
+    def __init__(self, strip_trailing_slash: bool = False,
+                 tracking_params: Optional[Iterable[str]] = None,
+                 tracking_prefixes: Iterable[str] = DEFAULT_TRACKING_PREFIXES,
+                 sort_query: bool = True):
+        self.strip_trailing_slash = strip_trailing_slash
+        self.tracking_params = set(DEFAULT_TRACKING_PARAMS if tracking_params is None else tracking_params)
+        self.tracking_prefixes = tuple(tracking_prefixes)
+        self.sort_query = sort_query
+
+    def canonicalize(self, url: str) -> str:
+        try:
+            parts = urlsplit(url.strip())
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            return url
+
+        netloc = parts.netloc.lower()
+        userinfo, at, hostport = netloc.rpartition('@')
+        host, colon, port = hostport.rpartition(':')
+        if colon and not host.endswith(']') and ']' not in port:
+            if port == DEFAULT_PORTS.get(scheme) or not port:
+                hostport = host
+        hostport = hostport.rstrip('.')
+        netloc = f"{userinfo}{at}{hostport}"
+
+        path = parts.path or '/'
+        if '/.' in path or '//' in path:
+            trailing = path.endswith('/')
+            path = posixpath.normpath(path)
+            if path.startswith('//'):
+                path = '/' + path.lstrip('/')
+            if trailing and path != '/':
+                path += '/'
+        if self.strip_trailing_slash and len(path) > 1 and path.endswith('/'):
+            path = path.rstrip('/') or '/'
+
+        query = parts.query
+        if query:
+            params = [
+                param for param in query.split('&')
+                if param and not self._is_tracking_param(unquote_plus(param.partition('=')[0]))
+            ]
+            if self.sort_query:
+                params.sort()
+            query = '&'.join(params)
+
+        return urlunsplit((scheme, netloc, path, query, ''))
+
+    def _is_tracking_param(self, key: str) -> bool:
+        key = key.lower()
+        return key in self.tracking_params or key.startswith(self.tracking_prefixes)
+
+_default_canonicalizer = URLCanonicalizer()
+
+def canonicalize_url(url: str) -> str:
+    """Canonicalize a URL with the default settings."""
+    return _default_canonicalizer.canonicalize(url)
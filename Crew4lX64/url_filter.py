@@ -0,0 +1,113 @@
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple, Union
+
+# GitHub pages that are never worth crawling
+GITHUB_SKIP_SEGMENTS = (
+    '/search', '/marketplace', '/sponsors', '/settings',
+    '/notifications', '/explore', '/topics'
+)
+
+_HTTP_URL_RE = re.compile(r'https?://([^/?#]*)([^?#]*)')
+
+def split_http_url(url: str) -> Optional[Tuple[str, str]]:
+    """(host, path) of an http(s) URL, or None for other schemes.
+
+    A single regex match instead of urlparse; the host is lowercased and
+    keeps any port, like ``urlparse(url).netloc``.
+    """
+    match = _HTTP_URL_RE.match(url)
+    if match is None:
+        return None
+    return match.group(1).lower(), match.group(2)
+
+class GitHubPaths:
+    """GitHub path rules compiled into two regexes.
+
+    ``path_type`` returns the name of the first pattern (in ``patterns``
+    order) that matches anywhere in the path, using one regex of
+    lookahead alternatives instead of a search per pattern; ``skip``
+    scans for every skip segment in one pass.
+    """
+    def __init__(self, patterns: Dict[str, str], skip_segments: Iterable[str] = GITHUB_SKIP_SEGMENTS):
+        self.patterns = dict(patterns)
+        self._types = re.compile(
+            '|'.join(f'(?=.*?(?P<{name}>{pattern}))' for name, pattern in self.patterns.items())
+        ) if self.patterns else None
+        skip_segments = list(skip_segments)
+        self._skip = re.compile('|'.join(re.escape(s) for s in skip_segments)) if skip_segments else None
+
+    def path_type(self, path: str) -> Optional[str]:
+        if self._types is None:
+            return None
+        match = self._types.match(path)
+        return match.lastgroup if match else None
+
+    def skip(self, path: str) -> bool:
+        return self._skip is not None and self._skip.search(path) is not None
+
+def is_github_host(host: str) -> bool:
+    return host == 'github.com' or host.endswith('.github.com')
+
+class URLFilter:
+    """Compiled crawl rules for candidate URLs.
+
+    A URL passes if it is http(s), does not end in a blocked extension,
+    is on the base host (or a subdomain of it with ``allow_subdomains``),
+    matches ``include_pattern`` and not ``exclude_pattern``; GitHub URLs
+    must also match one of the repository path patterns and none of the
+    skip segments. Everything is compiled once, and ``filter_links`` checks
+    each distinct host of a page's link list only once.
+    """
+    def __init__(self, include_pattern: Union[str, Pattern, None] = None,
+                 exclude_pattern: Union[str, Pattern, None] = None,
+                 allow_subdomains: bool = False, blocked_extensions: Iterable[str] = (),
+                 github_paths: Optional[Dict[str, str]] = None):
+        self.include_pattern = re.compile(include_pattern) if isinstance(include_pattern, str) else include_pattern
+        self.exclude_pattern = re.compile(exclude_pattern) if isinstance(exclude_pattern, str) else exclude_pattern
+        self.allow_subdomains = allow_subdomains
+        self.blocked_extensions = tuple(ext.lower() for ext in blocked_extensions)
+        self.github = GitHubPaths(github_paths or {})
+
+    def allows(self, url: str, base_domain: str) -> bool:
+        return self._allows(url, base_domain.lower(), {})
+
+    def filter_links(self, links: List[Dict], base_domain: str) -> List[Dict]:
+        """The links (dicts with a 'url') that pass, in their original order."""
+        host_cache: Dict[str, bool] = {}
+        base_domain = base_domain.lower()
+        return [link for link in links if self._allows(link['url'], base_domain, host_cache)]
+
+    def filter_urls(self, urls: Iterable[str], base_domain: str) -> List[str]:
+        host_cache: Dict[str, bool] = {}
+        base_domain = base_domain.lower()
+        return [url for url in urls if self._allows(url, base_domain, host_cache)]
+
+    def _allows(self, url: str, base_domain: str, host_cache: Dict[str, bool]) -> bool:
+        parts = split_http_url(url)
+        if parts is None:
+            return False
+        host, path = parts
+
+        allowed_host = host_cache.get(host)
+        if allowed_host is None:
+            allowed_host = host_cache[host] = self._host_allowed(host, base_domain)
+        if not allowed_host:
+            return False
+
+        if self.blocked_extensions and path.lower().endswith(self.blocked_extensions):
+            return False
+
+        if is_github_host(host):
+            if self.github.skip(path) or self.github.path_type(path) is None:
+                return False
+
+        if self.include_pattern and not self.include_pattern.search(url):
+            return False
+        if self.exclude_pattern and self.exclude_pattern.search(url):
+            return False
+        return True
+
+    def _host_allowed(self, host: str, base_domain: str) -> bool:
+        if host == base_domain:
+            return True
+        return self.allow_subdomains and host.endswith('.' + base_domain)
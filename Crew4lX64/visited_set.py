@@ -0,0 +1,354 @@
+import base64
+import hashlib
+import math
+import sys
+import time
+from array import array
+from itertools import compress
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class VisitedSet:
+    """Set of visited URLs with the time each was last visited.
+
+    Backends trade exactness for memory:
+
+    - ``exact``: a dict of full URL strings; iterable and exact.
+    - ``fingerprint``: 64-bit URL fingerprints and 32-bit timestamps in an
+      open-addressing table backed by ``array``s, about 24 bytes per URL.
+      Two URLs collide with probability ~n/2**64.
+    - ``bloom``: a scalable Bloom filter holding no timestamps, so entries
+      never expire; a few bytes per URL with a bounded false-positive rate.
+    """
+    backend = ''
+
+    def add(self, url: str, timestamp: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def seen(self, url: str, max_age: Optional[float] = None) -> bool:
+        """True if url was visited, and within max_age seconds if given."""
+        raise NotImplementedError
+
+    def discard(self, url: str) -> None:
+        raise NotImplementedError
+
+    def expire(self, max_age: float) -> None:
+        """Drop entries older than max_age seconds where the backend can."""
+
+    def update(self, urls: Iterable[str], timestamp: Optional[float] = None) -> None:
+        for url in urls:
+            self.add(url, timestamp)
+
+    def __contains__(self, url: str) -> bool:
+        return self.seen(url)
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def memory_bytes(self) -> int:
+        raise NotImplementedError
+
+    def to_state(self) -> Dict:
+        """JSON-serializable state for checkpoints; see load_visited_set."""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict:
+        return {
+            'backend': self.backend,
+            'entries': len(self),
+            'memory_bytes': self.memory_bytes()
+        }
+
+class ExactVisitedSet(VisitedSet):
+    backend = 'exact'
+
+    def __init__(self):
+        # Kept in visit order, so expiry only touches the oldest entries
+        self._urls: Dict[str, float] = {}
+
+    def add(self, url: str, timestamp: Optional[float] = None) -> None:
+        self._urls.pop(url, None)
+        self._urls[url] = time.time() if timestamp is None else timestamp
+
+    def seen(self, url: str, max_age: Optional[float] = None) -> bool:
+        timestamp = self._urls.get(url)
+        if timestamp is None:
+            return False
+        return max_age is None or time.time() - timestamp < max_age
+
+    def discard(self, url: str) -> None:
+        self._urls.pop(url, None)
+
+    def expire(self, max_age: float) -> None:
+        cutoff = time.time() - max_age
+        while self._urls:
+            url = next(iter(self._urls))
+            if self._urls[url] > cutoff:
+                break
+            del self._urls[url]
+
+    def __iter__(self):
+        return iter(self._urls)
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def memory_bytes(self) -> int:
+        # Dict table plus key strings and float values
+        return sys.getsizeof(self._urls) + sum(sys.getsizeof(url) + 24 for url in self._urls)
+
+    def to_state(self) -> Dict:
+        return {'backend': self.backend, 'urls': dict(self._urls)}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'ExactVisitedSet':
+        visited = cls()
+        for url, timestamp in sorted(state.get('urls', {}).items(), key=lambda item: item[1]):
+            visited.add(url, timestamp)
+        return visited
+
+def _fingerprint(url: str) -> int:
+    value = int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1  # 0 marks an empty slot
+
+class FingerprintVisitedSet(VisitedSet):
+    backend = 'fingerprint'
+    max_load = 0.7
+
+    def __init__(self, initial_capacity: int = 1 << 16):
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        size = 1 << max(4, math.ceil(math.log2(max(1, capacity) / self.max_load)))
+        self._keys = array('Q', bytes(8 * size))
+        self._times = array('I', bytes(4 * size))
+        self._mask = size - 1
+        self._count = 0
+        self._oldest: Optional[int] = None
+
+    def _slot(self, fingerprint: int) -> int:
+        keys, mask = self._keys, self._mask
+        slot = fingerprint & mask
+        while keys[slot] and keys[slot] != fingerprint:
+            slot = (slot + 1) & mask
+        return slot
+
+    def _insert(self, fingerprint: int, timestamp: int) -> None:
+        slot = self._slot(fingerprint)
+        if not self._keys[slot]:
+            self._keys[slot] = fingerprint
+            self._count += 1
+        self._times[slot] = timestamp
+        if self._oldest is None or timestamp < self._oldest:
+            self._oldest = timestamp
+
+    def _rebuild(self, capacity: int, cutoff: Optional[float] = None) -> None:
+        """Rehash into a table sized for capacity entries, dropping those older than cutoff.
+
+        Entries are read straight from the old arrays, so a rebuild needs
+        no more memory than the two tables.
+        """
+        keys, times = self._keys, self._times
+        self._allocate(capacity)
+        for fingerprint, timestamp in zip(keys, times):
+            if fingerprint and (cutoff is None or timestamp > cutoff):
+                self._insert(fingerprint, timestamp)
+
+    def add(self, url: str, timestamp: Optional[float] = None) -> None:
+        if (self._count + 1) > self.max_load * len(self._keys):
+            # _allocate applies max_load, so the table doubles
+            self._rebuild(self._count + 1)
+        self._insert(_fingerprint(url), int(time.time() if timestamp is None else timestamp))
+
+    def seen(self, url: str, max_age: Optional[float] = None) -> bool:
+        slot = self._slot(_fingerprint(url))
+        if not self._keys[slot]:
+            return False
+        return max_age is None or time.time() - self._times[slot] < max_age
+
+    def discard(self, url: str) -> None:
+        slot = self._slot(_fingerprint(url))
+        if not self._keys[slot]:
+            return
+        # Re-insert the rest of the probe run so lookups never stop early
+        self._keys[slot] = 0
+        self._count -= 1
+        mask = self._mask
+        slot = (slot + 1) & mask
+        while self._keys[slot]:
+            fingerprint, timestamp = self._keys[slot], self._times[slot]
+            self._keys[slot] = 0
+            self._count -= 1
+            self._insert(fingerprint, timestamp)
+            slot = (slot + 1) & mask
+
+    def expire(self, max_age: float) -> None:
+        # Stale entries are harmless (seen() checks their age), so reclaim
+        # them in batches rather than rebuilding the table on every call
+        now = time.time()
+        if self._oldest is None or self._oldest > now - max_age * 1.25:
+            return
+        cutoff = now - max_age
+        self._rebuild(sum(1 for key, ts in zip(self._keys, self._times) if key and ts > cutoff), cutoff)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def memory_bytes(self) -> int:
+        return self._keys.itemsize * len(self._keys) + self._times.itemsize * len(self._times)
+
+    def to_state(self) -> Dict:
+        used = self._keys
+        return {
+            'backend': self.backend,
+            'fingerprints': base64.b64encode(array('Q', (key for key in used if key)).tobytes()).decode('ascii'),
+            'timestamps': base64.b64encode(array('I', compress(self._times, used)).tobytes()).decode('ascii')
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'FingerprintVisitedSet':
+        keys = array('Q', base64.b64decode(state.get('fingerprints', '')))
+        times = array('I', base64.b64decode(state.get('timestamps', '')))
+        visited = cls(initial_capacity=len(keys))
+        for fingerprint, timestamp in zip(keys, times):
+            visited._insert(fingerprint, timestamp)
+        return visited
+
+class _BloomFilter:
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, h1: int, h2: int):
+        num_bits = self.num_bits
+        return ((h1 + i * h2) % num_bits for i in range(self.num_hashes))
+
+    def add(self, h1: int, h2: int) -> None:
+        bits = self.bits
+        for pos in self._positions(h1, h2):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, hashes: Tuple[int, int]) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(*hashes))
+
+class BloomVisitedSet(VisitedSet):
+    """Scalable Bloom filter (Almeida et al.).
+
+    When a filter reaches its capacity a new one ``growth`` times larger is
+    added with a false-positive rate ``tightening`` times smaller, which keeps
+    the overall rate under ``error_rate`` however many URLs are added.
+    """
+    backend = 'bloom'
+
+    def __init__(self, error_rate: float = 0.001, initial_capacity: int = 100000,
+                 growth: int = 2, tightening: float = 0.5):
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self.growth = growth
+        self.tightening = tightening
+        self._filters: List[_BloomFilter] = []
+        # Bloom filters cannot delete; discarded URLs are tracked here instead
+        self._removed = set()
+
+    @staticmethod
+    def _hashes(url: str) -> Tuple[int, int]:
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def _new_filter(self, **kwargs) -> _BloomFilter:
+        index = len(self._filters)
+        return _BloomFilter(
+            capacity=self.initial_capacity * self.growth ** index,
+            error_rate=self.error_rate * (1 - self.tightening) * self.tightening ** index,
+            **kwargs
+        )
+
+    def add(self, url: str, timestamp: Optional[float] = None) -> None:
+        self._removed.discard(url)
+        hashes = self._hashes(url)
+        if any(hashes in bloom for bloom in self._filters):
+            return
+        if not self._filters or self._filters[-1].count >= self._filters[-1].capacity:
+            self._filters.append(self._new_filter())
+        self._filters[-1].add(*hashes)
+
+    def seen(self, url: str, max_age: Optional[float] = None) -> bool:
+        if url in self._removed:
+            return False
+        hashes = self._hashes(url)
+        return any(hashes in bloom for bloom in self._filters)
+
+    def discard(self, url: str) -> None:
+        self._removed.add(url)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self._filters)
+
+    def memory_bytes(self) -> int:
+        return sum(len(bloom.bits) for bloom in self._filters)
+
+    def get_stats(self) -> Dict:
+        return {
+            **super().get_stats(),
+            'filters': len(self._filters),
+            'error_rate': self.error_rate
+        }
+
+    def to_state(self) -> Dict:
+        return {
+            'backend': self.backend,
+            'error_rate': self.error_rate,
+            'initial_capacity': self.initial_capacity,
+            'growth': self.growth,
+            'tightening': self.tightening,
+            'filters': [
+                {'count': bloom.count, 'bits': base64.b64encode(bytes(bloom.bits)).decode('ascii')}
+                for bloom in self._filters
+            ],
+            'removed': list(self._removed)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'BloomVisitedSet':
+        visited = cls(
+            error_rate=state['error_rate'],
+            initial_capacity=state['initial_capacity'],
+            growth=state['growth'],
+            tightening=state['tightening']
+        )
+        for data in state.get('filters', []):
+            visited._filters.append(visited._new_filter(
+                bits=bytearray(base64.b64decode(data['bits'])),
+                count=data['count']
+            ))
+        visited._removed.update(state.get('removed', []))
+        return visited
+
+VISITED_BACKENDS = {
+    'exact': ExactVisitedSet,
+    'fingerprint': FingerprintVisitedSet,
+    'bloom': BloomVisitedSet
+}
+
+def create_visited_set(backend: str = 'exact', **kwargs) -> VisitedSet:
+    """Create a visited set; kwargs go to the backend (e.g. error_rate for bloom)."""
+    if backend not in VISITED_BACKENDS:
+        raise ValueError(f"Unknown visited set backend: {backend}")
+    return VISITED_BACKENDS[backend](**kwargs)
+
+def load_visited_set(state) -> VisitedSet:
+    """Rebuild a visited set from to_state() output (or a plain URL list/dict)."""
+    if isinstance(state, dict) and 'backend' in state:
+        return VISITED_BACKENDS[state['backend']].from_state(state)
+    visited = ExactVisitedSet()
+    if isinstance(state, dict):
+        for url, timestamp in state.items():
+            visited.add(url, timestamp)
+    else:
+        visited.update(state or [])
+    return visited
@@ -1,27 +1,70 @@
 import aiohttp
+import html
+import json
 import logging
 import asyncio
+import functools
+import multiprocessing
+import os
 import re
 import time
-from typing import Optional, Dict, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 from Crew4lX64.browser_manager import BrowserManager
 from Crew4lX64.rate_limiter import RateLimiter
 from Crew4lX64.proxy_manager import ProxyManager
 from Crew4lX64.content_extractor import ContentExtractor
 from Crew4lX64.arxiv_handler import ArxivHandler
+from Crew4lX64.connection_pool import ConnectionPool
+from Crew4lX64.crawl_frontier import CrawlFrontier, FrontierEntry
+from Crew4lX64.crawl_budget import CrawlBudget
+from Crew4lX64.near_duplicates import NearDuplicateIndex
+from Crew4lX64.parsed_document import ParsedDocument
+from Crew4lX64.page_processor import PageProcessor, init_worker, process_in_worker
+from Crew4lX64.cache_manager import CacheManager, LRUCache
+from Crew4lX64.relevance import RelevanceScorer
+from Crew4lX64.robots_rules import RobotsRules
+from Crew4lX64.sitemap_parser import SitemapEntry, SitemapParser
+from Crew4lX64.checkpoint import CrawlCheckpoint
+from Crew4lX64.url_canonicalizer import URLCanonicalizer
+from Crew4lX64.url_filter import URLFilter
+from Crew4lX64.visited_set import VisitedSet, create_visited_set, load_visited_set
+
+# Content types parsed as HTML; anything else needs an entry in content_handlers
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
+# Sitemap URLs are scheduled (and scored, in focused mode) this many at a time
+SITEMAP_BATCH_SIZE = 500
+
+def _plain_text_to_html(url: str, body: bytes, charset: str) -> str:
+    text = body.decode(charset, errors='replace')
+    return f'<html><head><title>{html.escape(url)}</title></head><body><pre>{html.escape(text)}</pre></body></html>'
 
 class WebCrawler:
-    def __init__(self, max_cache_size: int = 1000, max_retries: int = 3):
+    def __init__(self, max_cache_size: int = 1000, max_retries: int = 3,
+                 max_concurrency: int = 10, max_per_host: int = 4,
+                 max_cache_bytes: int = 256 * 1024 * 1024):
         self.browser = None
         self.data_extractor = ContentExtractor()
-        self.visited_urls: Dict[str, float] = {}  # URL -> timestamp
-        self.cache: Dict[str, Dict] = {}
-        self.cache_timestamps: Dict[str, float] = {}  # URL -> timestamp
+        # Canonical URL -> last visit; backend 'exact', 'fingerprint' or 'bloom'
+        self.visited_backend = 'exact'
+        self.visited_options: Dict = {}
+        self.visited_urls: VisitedSet = create_visited_set()
+        # Visited, frontier and cache entries are keyed by canonical URL;
+        # pages are still fetched at the URL as it was found
+        self.canonicalizer = URLCanonicalizer()
+        # URL -> details of its last fetch (final URL after redirects)
+        self._fetch_info: Dict[str, Dict] = {}
+        # URL -> result, valid for 1 hour; sized by the page's source length
+        self.cache = LRUCache(max_entries=max_cache_size, max_bytes=max_cache_bytes, ttl=3600)
         self.max_cache_size = max_cache_size
         self.max_retries = max_retries
         self.session = None
+        # Keep-alive connections shared with the arXiv client, proxy checks and exporter
+        self.connection_pool: Optional[ConnectionPool] = None
+        self._owns_connection_pool = False
         self.rate_limiter = RateLimiter()
         self.proxy_manager = None
         self.arxiv_handler = ArxivHandler()
@@ -29,13 +72,53 @@ class WebCrawler:
         self.include_pattern = None
         self.exclude_pattern = None
         self.allow_subdomains = False
+        # Responses larger than this are abandoned while streaming the body
+        self.max_file_size = 10 * 1024 * 1024
+        self.blocked_extensions: List[str] = []
+        # Non-HTML content type -> handler(url, body, charset) returning HTML
+        self.content_handlers: Dict[str, Callable[[str, bytes, str], Optional[str]]] = {
+            'text/plain': _plain_text_to_html
+        }
+        self.max_concurrency = max_concurrency  # Number of crawl workers
+        self.max_per_host = max_per_host  # Simultaneous fetches per host
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.frontier: Optional[CrawlFrontier] = None
+        self.cache_manager: Optional[CacheManager] = None
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        self.checkpoint_interval = 50  # Pages between checkpoints
+        self.terminate_crawl = False
         self.robots_cache: Dict[str, Dict] = {}  # domain -> {rules, timestamp}
         self.robots_cache_ttl = 3600  # 1 hour
+        self.robots_user_agent = 'CrewZombitX64'
+        self.robots_cache_file: Optional[str] = None
+        self._robots_inflight: Dict[str, asyncio.Future] = {}  # domain -> pending fetch
+        # Seed the frontier from robots.txt Sitemap lines or /sitemap.xml
+        self.use_sitemaps = False
+        self.max_sitemap_urls = 50000  # Per seed
+        self.max_sitemaps = 100  # Sitemap files fetched per seed, indexes included
+        # SimHash index of main texts; None disables near-duplicate detection
+        self.near_duplicates: Optional[NearDuplicateIndex] = None
+        self.duplicate_action = 'mark'  # 'mark' sets result['duplicate_of'], 'skip' drops the page
+        self.follow_duplicate_links = True
+        # Don't follow links marked rel=nofollow (or on robots-meta nofollow pages)
+        self.honor_nofollow = False
+        # Focused crawling: links are served best-first by relevance to a topic
+        self.relevance: Optional[RelevanceScorer] = None
+        self.min_relevance = 0.0  # Links scoring below this are not followed
+        # Page/byte/time limits per domain and overall; None crawls without limits
+        self.budget: Optional[CrawlBudget] = None
+        self.max_depth: Optional[int] = None  # Caps the depth passed to crawl()
         self.stats = {
             'pages_crawled': 0,
             'errors': 0,
             'start_time': None,
             'total_bytes': 0,
+            'revalidated': 0,
+            'robots_fetches': 0,
+            'skipped_content': 0,
+            'sitemaps_fetched': 0,
+            'sitemap_urls': 0,
+            'budget_skipped': 0,
             'success_rate': 0.0
         }
         self.github_base_paths = {
@@ -47,35 +130,23 @@ class WebCrawler:
             'pulls': '/[^/]+/[^/]+/pulls',
             'releases': '/[^/]+/[^/]+/releases'
         }
+        # Parsing and extraction run inline, or in parse_workers processes
+        self.page_processor = PageProcessor(self.canonicalizer, self.github_base_paths,
+                                            extractor=self.data_extractor)
+        self.parse_workers = 0
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        # Compiled from the settings above; rebuilt when they change
+        self._url_filter: Optional[URLFilter] = None
+        self._url_filter_key = None
         self._setup_logging()
 
     def _cleanup_cache(self) -> None:
-        """Remove old entries from cache if it exceeds max size."""
-        if len(self.cache) > self.max_cache_size:
-            # Sort by timestamp and keep only the newest entries
-            sorted_urls = sorted(
-                self.cache_timestamps.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:self.max_cache_size]
-            
-            new_cache = {}
-            new_timestamps = {}
-            for url, timestamp in sorted_urls:
-                new_cache[url] = self.cache[url]
-                new_timestamps[url] = timestamp
-            
-            self.cache = new_cache
-            self.cache_timestamps = new_timestamps
+        """Remove expired entries from cache; size limits are enforced on insert."""
+        self.cache.purge_expired()
 
     def _cleanup_visited_urls(self, max_age: float = 86400) -> None:
         """Remove visited URLs older than max_age seconds."""
-        current_time = time.time()
-        self.visited_urls = {
-            url: timestamp
-            for url, timestamp in self.visited_urls.items()
-            if current_time - timestamp < max_age
-        }
+        self.visited_urls.expire(max_age)
 
     def _setup_logging(self) -> None:
         logging.basicConfig(
@@ -87,23 +158,112 @@ class WebCrawler:
     async def setup(self, use_browser=False, respect_robots=True, rate_limit=1.0, 
                    use_proxies=False, headless=True, wait_time=2.0, auto_scroll=False, 
                    retry_count=3, retry_delay=1.0, proxy_timeout=10.0, 
-                   include_pattern=None, exclude_pattern=None, allow_subdomains=False, **kwargs):
+                   include_pattern=None, exclude_pattern=None, allow_subdomains=False,
+                   max_concurrency=None, max_per_host=None, cache_manager=None,
+                   robots_cache_file=None, burst_size=3, domain_delays=None,
+                   adaptive_rate_limiting=False, backoff_factor=1.5, max_backoff=300,
+                   checkpoint_dir=None, checkpoint_interval=None, visited_backend=None,
+                   visited_error_rate=None, parse_workers=None, max_file_size=None,
+                   blocked_extensions=None, connection_pool=None, keepalive_timeout=30.0,
+                   use_sitemaps=None, max_sitemap_urls=None, detect_duplicates=None,
+                   duplicate_distance=3, duplicate_action=None, follow_duplicate_links=None,
+                   honor_nofollow=None, focus_topic=None, min_relevance=None, max_depth=None,
+                   max_pages=None, max_bytes=None, max_time=None, max_requests_per_domain=None,
+                   max_bytes_per_domain=None, max_time_per_domain=None, max_error_rate=None,
+                   **kwargs):
         self.respect_robots = respect_robots
-        self.rate_limiter = RateLimiter(requests_per_second=rate_limit)
+        if max_depth:
+            self.max_depth = max_depth
+        limits = {
+            'max_pages': max_pages,
+            'max_bytes': max_bytes,
+            'max_time': max_time,
+            'max_pages_per_domain': max_requests_per_domain,
+            'max_bytes_per_domain': max_bytes_per_domain,
+            'max_time_per_domain': max_time_per_domain,
+            'max_error_rate': max_error_rate
+        }
+        if any(limit is not None for limit in limits.values()):
+            self.budget = CrawlBudget(**limits)
+        if max_file_size:
+            self.max_file_size = max_file_size
+        if blocked_extensions is not None:
+            self.blocked_extensions = [ext.lower() for ext in blocked_extensions]
+        if parse_workers is not None:
+            self.parse_workers = parse_workers
+        if use_sitemaps is not None:
+            self.use_sitemaps = use_sitemaps
+        if max_sitemap_urls:
+            self.max_sitemap_urls = max_sitemap_urls
+        if detect_duplicates:
+            self.near_duplicates = NearDuplicateIndex(max_distance=duplicate_distance)
+        elif detect_duplicates is not None:
+            self.near_duplicates = None
+        # Set before the process pool pickles the processor
+        self.page_processor.detect_duplicates = self.near_duplicates is not None
+        if duplicate_action:
+            if duplicate_action not in ('mark', 'skip'):
+                raise ValueError(f"Unknown duplicate_action: {duplicate_action}")
+            self.duplicate_action = duplicate_action
+        if follow_duplicate_links is not None:
+            self.follow_duplicate_links = follow_duplicate_links
+        if honor_nofollow is not None:
+            self.honor_nofollow = honor_nofollow
+        if focus_topic:
+            self.relevance = RelevanceScorer(focus_topic)
+        if min_relevance is not None:
+            self.min_relevance = min_relevance
+        if self.parse_workers and self._process_pool is None:
+            # Forking after the session's resolver threads and the export
+            # writer thread have started can deadlock the child
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=init_worker,
+                initargs=(self.page_processor,)
+            )
+        if visited_backend:
+            self.visited_backend = visited_backend
+            self.visited_options = {'error_rate': visited_error_rate} if visited_backend == 'bloom' and visited_error_rate else {}
+            self.visited_urls = create_visited_set(self.visited_backend, **self.visited_options)
+        self.checkpoint = CrawlCheckpoint(checkpoint_dir) if checkpoint_dir else None
+        if checkpoint_interval:
+            self.checkpoint_interval = checkpoint_interval
+        self.cache_manager = cache_manager
+        if max_concurrency:
+            self.max_concurrency = max_concurrency
+        if max_per_host:
+            self.max_per_host = max_per_host
+            self._host_semaphores = {}
+        self.rate_limiter = RateLimiter(
+            requests_per_second=rate_limit,
+            burst_size=burst_size,
+            domain_delays=domain_delays,
+            adaptive=adaptive_rate_limiting,
+            backoff_factor=backoff_factor,
+            max_backoff=max_backoff
+        )
+        self.robots_cache_file = robots_cache_file
+        if robots_cache_file:
+            self.load_robots_cache(robots_cache_file)
         self.include_pattern = re.compile(include_pattern) if include_pattern else None
         self.exclude_pattern = re.compile(exclude_pattern) if exclude_pattern else None
         self.allow_subdomains = allow_subdomains
-        
+
+        if connection_pool is not None:
+            self.connection_pool = connection_pool
+            self._owns_connection_pool = False
+        elif self.connection_pool is None or self.connection_pool.closed:
+            self.connection_pool = ConnectionPool(
+                limit=max(100, self.max_concurrency),
+                limit_per_host=max(10, self.max_per_host),
+                keepalive_timeout=keepalive_timeout
+            )
+            self._owns_connection_pool = True
+
         if use_proxies:
-            self.proxy_manager = ProxyManager(timeout=proxy_timeout)
-
-        conn = aiohttp.TCPConnector(
-            limit=100,
-            limit_per_host=10,
-            enable_cleanup_closed=True,
-            force_close=True,
-            ttl_dns_cache=300
-        )
+            self.proxy_manager = ProxyManager(timeout=proxy_timeout, connection_pool=self.connection_pool)
             
         if use_browser:
             self.browser = BrowserManager(
@@ -116,14 +276,13 @@ class WebCrawler:
             
         if not self.session:
             timeout = aiohttp.ClientTimeout(total=30, connect=10, sock_read=10)
-            self.session = aiohttp.ClientSession(
-                connector=conn,
+            self.session = self.connection_pool.session(
                 timeout=timeout,
                 headers={
                     'User-Agent': 'CrewZombitX64/1.0 (Scholarly Paper Analysis Tool)'
                 }
             )
-            await self.arxiv_handler.setup()
+            await self.arxiv_handler.setup(connection_pool=self.connection_pool)
 
     async def cleanup(self) -> None:
         """Clean up resources and perform final tasks."""
@@ -138,6 +297,8 @@ class WebCrawler:
                 domain: cache for domain, cache in self.robots_cache.items()
                 if current_time - cache['timestamp'] < self.robots_cache_ttl
             }
+            if self.robots_cache_file:
+                self.save_robots_cache(self.robots_cache_file)
             
             # Save final stats
             if self.stats['pages_crawled'] > 0:
@@ -172,6 +333,16 @@ class WebCrawler:
                     self.browser.close()  # Synchronous call
                 except Exception as e:
                     logging.error(f"Error closing browser: {e}")
+
+            if self.cache_manager:
+                self.cache_manager.close()
+
+            if self._process_pool:
+                # Wait for the workers to exit without blocking the event loop
+                pool, self._process_pool = self._process_pool, None
+                await asyncio.get_running_loop().run_in_executor(
+                    None, functools.partial(pool.shutdown, wait=True)
+                )
             
             # Close arxiv handler
             if self.arxiv_handler:
@@ -179,6 +350,10 @@ class WebCrawler:
                     await self.arxiv_handler.close()
                 except Exception as e:
                     logging.error(f"Error closing arxiv handler: {e}")
+
+            # Close pooled connections last, once no session borrows them
+            if self.connection_pool and self._owns_connection_pool:
+                await self.connection_pool.close()
                 
         except Exception as e:
             logging.error(f"Error during close: {e}")
@@ -196,185 +371,581 @@ class WebCrawler:
             'runtime': current_time - (self.stats['start_time'] or current_time),
             'cache_size': len(self.cache),
             'visited_urls': len(self.visited_urls),
+            'result_cache': self.cache.get_stats(),
+            'visited': self.visited_urls.get_stats(),
+            'frontier': self.frontier.get_stats() if self.frontier is not None else {},
+            'near_duplicates': self.near_duplicates.get_stats() if self.near_duplicates is not None else {},
+            'relevance': self.relevance.get_stats() if self.relevance else {},
+            'budget': self.budget.get_stats() if self.budget else {},
+            'http_cache': self.cache_manager.get_stats() if self.cache_manager else {},
+            'connection_pool': self.connection_pool.get_stats() if self.connection_pool else {},
             'memory_usage': {
                 'cache_size': len(self.cache),
+                'cache_bytes': self.cache.total_bytes,
                 'visited_urls': len(self.visited_urls),
+                'visited_bytes': self.visited_urls.memory_bytes(),
                 'robots_cache': len(self.robots_cache)
             }
         }
 
+    @property
+    def url_filter(self) -> URLFilter:
+        """The compiled URLFilter for the current include/exclude, domain and extension settings."""
+        key = (self.include_pattern, self.exclude_pattern, self.allow_subdomains,
+               tuple(self.blocked_extensions), tuple(self.github_base_paths.items()))
+        if self._url_filter is None or key != self._url_filter_key:
+            self._url_filter = URLFilter(
+                include_pattern=self.include_pattern,
+                exclude_pattern=self.exclude_pattern,
+                allow_subdomains=self.allow_subdomains,
+                blocked_extensions=self.blocked_extensions,
+                github_paths=self.github_base_paths
+            )
+            self._url_filter_key = key
+        return self._url_filter
+
     def should_crawl_url(self, url: str, base_domain: str) -> bool:
         """Check if URL should be crawled based on patterns, domain rules and GitHub paths"""
-        if not url.startswith(('http://', 'https://')):
-            return False
-            
-        parsed_url = urlparse(url)
-        
-        # Handle GitHub-specific paths
-        if 'github.com' in parsed_url.netloc:
-            path = parsed_url.path
-            
-            # Skip GitHub search and non-repository paths
-            if any(segment in path for segment in [
-                '/search', '/marketplace', '/sponsors', '/settings',
-                '/notifications', '/explore', '/topics'
-            ]):
-                return False
-                
-            # Check if path matches any valid GitHub repository pattern
-            is_github_path = any(
-                re.search(pattern, path)
-                for pattern in self.github_base_paths.values()
+        return self.url_filter.allows(url, base_domain)
+
+    async def crawl(self, url: str, depth: int = 1, cleanup_interval: int = 100,
+                    resume: bool = False, **kwargs) -> Optional[Dict]:
+        """Crawl url and the pages it links to, up to depth levels deep.
+
+        Returns the seed's result with each child result nested into its
+        parent's links[i]['content'], so the whole tree is held in memory;
+        use crawl_stream to handle pages as they finish instead.
+
+        With a checkpoint directory configured, progress is saved every
+        checkpoint_interval pages and when the crawl is stopped; resume=True
+        continues from the last checkpoint for the same url and depth.
+        """
+        url = url.strip()
+        page_results: Dict[str, Dict] = {}
+        try:
+            records = self.crawl_stream(url, depth, cleanup_interval, resume=resume,
+                                        include_completed=True)
+            try:
+                async for record in records:
+                    self._add_page_result(page_results, record['url'], record['result'],
+                                          record.get('parent'), record.get('link_index'))
+            finally:
+                await records.aclose()
+            return page_results.get(url)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Error crawling {url}: {str(e)}")
+            return None
+
+    async def crawl_stream(self, seeds: Union[str, Iterable[str]], depth: int = 1,
+                           cleanup_interval: int = 100, resume: bool = False,
+                           include_completed: bool = False) -> AsyncIterator[Dict]:
+        """Crawl from one or more seed URLs, yielding a flat record per page.
+
+        Records are yielded as pages finish, as {'url', 'parent',
+        'link_index', 'depth', 'result'} with depth counted in links from the
+        seed; child results are not nested into their parents. Pages are
+        scheduled through a CrawlFrontier and processed by a fixed pool of
+        workers, which pause when the consumer falls behind, so memory stays
+        flat however large the crawl gets.
+
+        With use_sitemaps and depth > 1, each seed's sitemaps are read while
+        the crawl runs and their URLs are scheduled one level below the seed,
+        ordered by sitemap priority, with the sitemap fields in the record's
+        'metadata'. These records have no parent.
+
+        With a focus topic (setup(focus_topic=...)), links are crawled
+        best-first by their relevance to the topic instead of breadth-first,
+        and each record's 'metadata' carries the 'relevance' it was
+        scheduled with.
+
+        On resume, include_completed first replays the pages finished by
+        earlier runs. If you stop iterating early, call aclose() on the
+        generator; the crawl is then checkpointed as stopped.
+        """
+        if isinstance(seeds, str):
+            seeds = [seeds]
+        if self.max_depth:
+            depth = min(depth, self.max_depth)
+        unique_seeds: Dict[str, str] = {}
+        for seed in seeds:
+            unique_seeds.setdefault(self._url_key(seed), seed.strip())
+        seeds = list(unique_seeds.values())
+
+        # Initialize stats if this is the first crawl
+        if not self.stats['start_time']:
+            self.stats['start_time'] = time.time()
+
+        # Per-host queues: workers take URLs only from hosts whose rate
+        # limit slot is due instead of sleeping in RateLimiter.wait
+        frontier = CrawlFrontier(
+            seen=create_visited_set(self.visited_backend, **self.visited_options),
+            rate_limiter=self.rate_limiter,
+            max_per_host=self.max_per_host,
+            key=self._url_key
+        )
+        self.frontier = frontier
+        self.terminate_crawl = False
+        if resume and self.checkpoint and self._restore_checkpoint(seeds, depth, frontier):
+            if include_completed:
+                for record in self.checkpoint.iter_pages():
+                    yield record
+        else:
+            if self.checkpoint:
+                self.checkpoint.start()
+            for seed in seeds:
+                frontier.push(seed, depth)
+
+        # Bounded so workers wait for a slow consumer instead of piling up results
+        records: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency)
+        pages_since_checkpoint = 0
+        checkpoint_write: Optional[asyncio.Future] = None
+
+        async def worker() -> None:
+            nonlocal pages_since_checkpoint, checkpoint_write
+            while not self.terminate_crawl:
+                entry = await frontier.get()
+                if entry is None:
+                    return
+                done_entry = entry
+                record = None
+                try:
+                    result = await self._crawl_page(entry.url, cleanup_interval)
+                    if self.budget is not None and not self.terminate_crawl and self.budget.exhausted:
+                        logging.info("Crawl budget exhausted; stopping")
+                        self.terminate_crawl = True
+                    if not result:
+                        continue
+                    record = {
+                        'url': entry.url,
+                        'parent': entry.parent,
+                        'link_index': entry.link_index,
+                        'depth': depth - entry.depth,
+                        'result': result
+                    }
+                    if entry.metadata:
+                        record['metadata'] = entry.metadata
+                    if self.checkpoint:
+                        self.checkpoint.append_page(record)
+                    if entry.depth > 1 and (self.follow_duplicate_links or 'duplicate_of' not in result):
+                        await self._schedule_links(frontier, entry, result)
+                except asyncio.CancelledError:
+                    # Leave the entry active so the checkpoint retries it
+                    done_entry = None
+                    raise
+                except Exception as e:
+                    logging.error(f"Error crawling {entry.url}: {str(e)}")
+                finally:
+                    await frontier.task_done(done_entry)
+
+                if record is not None:
+                    await records.put(record)
+
+                if self.checkpoint:
+                    pages_since_checkpoint += 1
+                    # Snapshot on the loop, encode and write in a thread; skip
+                    # this round if the previous checkpoint is still being written
+                    if (pages_since_checkpoint >= self.checkpoint_interval
+                            and (checkpoint_write is None or checkpoint_write.done())):
+                        pages_since_checkpoint = 0
+                        self.checkpoint.flush_pages()
+                        checkpoint_write = asyncio.get_running_loop().run_in_executor(
+                            None, self.checkpoint.write_state, self._checkpoint_state(seeds, depth)
+                        )
+
+            # Terminated: wake up the other workers
+            await frontier.close()
+
+        async def seed_from_sitemaps() -> None:
+            try:
+                for seed in seeds:
+                    await self._seed_from_sitemaps(seed, depth, frontier)
+            except Exception as e:
+                logging.error(f"Error reading sitemaps: {str(e)}")
+            finally:
+                await frontier.producer_done()
+
+        async def supervise() -> None:
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                await records.put(None)
+
+        if self.use_sitemaps and depth > 1:
+            frontier.add_producer()
+            workers = [asyncio.create_task(seed_from_sitemaps())]
+        else:
+            workers = []
+        workers += [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        supervisor = asyncio.create_task(supervise())
+        completed = False
+        try:
+            while True:
+                record = await records.get()
+                if record is None:
+                    break
+                yield record
+            await supervisor
+            completed = not self.terminate_crawl
+        finally:
+            supervisor.cancel()
+            for task in workers:
+                task.cancel()
+            if self.checkpoint:
+                if checkpoint_write is not None:
+                    # Let a background write finish first, so it cannot bring
+                    # back the checkpoint of a completed crawl
+                    try:
+                        await checkpoint_write
+                    except Exception as e:
+                        logging.error(f"Checkpoint write failed: {e}")
+                if completed:
+                    self.checkpoint.clear()
+                else:
+                    self.checkpoint.save(self._checkpoint_state(seeds, depth))
+                    self.checkpoint.close()
+                    logging.info(f"Crawl stopped; progress saved to {self.checkpoint.state_dir}")
+
+    async def _schedule_links(self, frontier: CrawlFrontier, entry: FrontierEntry, result: Dict) -> None:
+        """Push a crawled page's followable links into the frontier.
+
+        In focused mode the links are scored against the topic as one batch
+        and pushed with their relevance as priority, so the most promising
+        links anywhere in the frontier are crawled first.
+        """
+        candidates = [
+            (i, link) for i, link in enumerate(result['links'])
+            if not (self.honor_nofollow and link.get('nofollow')) and self._url_key(link['url']) not in self.visited_urls
+            and not (self.budget is not None and self.budget.domain_stopped(link['url']))
+        ]
+        scores = None
+        if self.relevance is not None and candidates:
+            scores = self.relevance.score_links(
+                [link for _, link in candidates],
+                result.get('content', {}).get('text', '')
             )
-            
-            if not is_github_path:
-                return False
-        
-        if not self.allow_subdomains and parsed_url.netloc != base_domain:
-            return False
-        elif self.allow_subdomains and base_domain not in parsed_url.netloc:
-            return False
+        for n, (i, link) in enumerate(candidates):
+            options = {}
+            if scores is not None:
+                if scores[n] < self.min_relevance:
+                    continue
+                options = {'priority': -scores[n], 'metadata': {'relevance': round(scores[n], 4)}}
+            await frontier.put(link['url'], entry.depth - 1, parent=entry.url, link_index=i, **options)
 
-        if self.include_pattern and not self.include_pattern.search(url):
-            return False
+    async def _seed_from_sitemaps(self, seed: str, depth: int, frontier: CrawlFrontier) -> int:
+        """Schedule the URLs in seed's sitemaps one level below the seed.
+
+        Returns the number of URLs added to the frontier.
+        """
+        base_domain = urlparse(seed).netloc
+        added = 0
+        batch: List[Tuple[str, SitemapEntry]] = []
+        entries = self.iter_sitemap(seed)
+        try:
+            async for entry in entries:
+                if self.terminate_crawl or added + len(batch) >= self.max_sitemap_urls:
+                    break
+                url = entry.loc.strip()
+                if self._url_key(url) in self.visited_urls or not self.should_crawl_url(url, base_domain):
+                    continue
+                batch.append((url, entry))
+                if len(batch) >= SITEMAP_BATCH_SIZE:
+                    added += await self._schedule_sitemap_urls(frontier, batch, depth)
+                    batch = []
+            added += await self._schedule_sitemap_urls(frontier, batch, depth)
+        finally:
+            await entries.aclose()
+        logging.info(f"Scheduled {added} URLs from the sitemaps of {base_domain}")
+        return added
+
+    async def _schedule_sitemap_urls(self, frontier: CrawlFrontier, batch: List[Tuple[str, SitemapEntry]],
+                                     depth: int) -> int:
+        """Push sitemap URLs one level below the seed; returns how many were added.
+
+        In focused mode the URLs are scored with the same RelevanceScorer as
+        links, so sitemap URLs and scored links share one best-first order.
+        """
+        scores = None
+        if self.relevance is not None and batch:
+            scores = self.relevance.score_urls([url for url, _ in batch])
+        added = 0
+        for n, (url, entry) in enumerate(batch):
+            metadata = entry.metadata()
+            if scores is None:
+                # Within a level, higher sitemap priority is served first
+                priority = -(depth - 1) - 0.5 * (0.5 if entry.priority is None else entry.priority)
+            else:
+                if scores[n] < self.min_relevance:
+                    continue
+                priority = -scores[n]
+                metadata['relevance'] = round(scores[n], 4)
+            if await frontier.put(url, depth - 1, priority=priority, metadata=metadata):
+                added += 1
+                self.stats['sitemap_urls'] += 1
+        return added
 
-        if self.exclude_pattern and self.exclude_pattern.search(url):
+    def _add_page_result(self, page_results: Dict[str, Dict], url: str, result: Dict,
+                         parent: Optional[str], link_index: Optional[int]) -> None:
+        """Store a page result and nest it into its parent's link list."""
+        page_results[url] = result
+        if parent is not None:
+            parent_result = page_results.get(parent)
+            if parent_result and link_index < len(parent_result['links']):
+                parent_result['links'][link_index]['content'] = result
+
+    def _checkpoint_state(self, seeds: List[str], depth: int) -> Dict:
+        """Snapshot the frontier, visited URLs and stats for the crawl of seeds.
+
+        The snapshot shares no mutable state with the crawl, so it can be
+        written from another thread while the crawl goes on.
+        """
+        return {
+            'seed': {'urls': seeds, 'depth': depth},
+            'saved_at': time.time(),
+            'frontier': self.frontier.snapshot(),
+            'visited': self.visited_urls.to_state(),
+            # Pages still in progress are retried on resume
+            'active': list(self.frontier.active_urls()),
+            'stats': dict(self.stats)
+        }
+
+    def _restore_checkpoint(self, seeds: List[str], depth: int, frontier: CrawlFrontier) -> bool:
+        """Load the last checkpoint for this crawl. Returns False if there is none."""
+        state = self.checkpoint.load()
+        if not state:
+            logging.info("No checkpoint found; starting a new crawl")
+            return False
+        if state.get('seed') != {'urls': seeds, 'depth': depth}:
+            logging.warning(f"Checkpoint in {self.checkpoint.state_dir} is for a different crawl; starting over")
             return False
 
+        self.visited_urls = load_visited_set(state.get('visited', {}))
+        for active_url in state.get('active', []):
+            self.visited_urls.discard(self._url_key(active_url))
+        start_time = self.stats['start_time']
+        self.stats.update(state.get('stats', {}))
+        self.stats['start_time'] = start_time
+        frontier.restore(state.get('frontier', {}))
+        self.checkpoint.start(resume=True)
+        logging.info(
+            f"Resuming crawl of {', '.join(seeds)}: {self.stats['pages_crawled']} pages done, "
+            f"{len(frontier)} pending"
+        )
         return True
 
-    async def crawl(self, url: str, depth: int = 1, cleanup_interval: int = 100, **kwargs) -> Optional[Dict]:
-        try:
-            # Initialize stats if this is the first crawl
-            if not self.stats['start_time']:
-                self.stats['start_time'] = time.time()
+    def _url_key(self, url: str) -> str:
+        """Canonical form of url used for the visited set, frontier and caches."""
+        return self.canonicalizer.canonicalize(url)
 
-            current_time = time.time()
-            if url in self.visited_urls and current_time - self.visited_urls[url] < 3600:
-                return None
+    @asynccontextmanager
+    async def _host_slot(self, url: str):
+        """Limit the number of simultaneous fetches to a single host."""
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            self._host_semaphores[host] = semaphore
+        async with semaphore:
+            yield
 
-            # Check cache with timestamp
-            if url in self.cache:
-                cache_age = current_time - self.cache_timestamps[url]
-                if cache_age < 3600:  # Cache valid for 1 hour
-                    return self.cache[url]
-                else:
-                    # Remove old cache entry
-                    del self.cache[url]
-                    del self.cache_timestamps[url]
+    async def _crawl_page(self, url: str, cleanup_interval: int = 100) -> Optional[Dict]:
+        """Fetch and process a single page without following its links."""
+        current_time = time.time()
+        key = self._url_key(url)
+        if self.visited_urls.seen(key, max_age=3600):
+            return None
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
 
-            start_time = time.time()
-            base_domain = urlparse(url).netloc
+        start_time = time.time()
+        base_domain = urlparse(url).netloc
 
-            if not self.should_crawl_url(url, base_domain):
-                logging.info(f"Skipping URL (pattern/domain mismatch): {url}")
+        if not self.should_crawl_url(url, base_domain):
+            logging.info(f"Skipping URL (pattern/domain mismatch): {url}")
+            return None
+
+        if self.respect_robots:
+            allowed = await self.check_robots_txt(url)
+            if not allowed:
+                logging.warning(f"URL {url} is not allowed by robots.txt")
                 return None
 
-            if self.respect_robots:
-                allowed = await self.check_robots_txt(url)
-                if not allowed:
-                    logging.warning(f"URL {url} is not allowed by robots.txt")
-                    return None
+        if self.budget is not None and not self.budget.acquire(url):
+            logging.debug(f"Skipping URL (crawl budget): {url}")
+            self.stats['budget_skipped'] += 1
+            return None
 
-            # Periodic cleanup
-            if self.stats['pages_crawled'] % cleanup_interval == 0:
-                self._cleanup_cache()
-                self._cleanup_visited_urls()
-
-            self.visited_urls[url] = current_time
-            self.stats['pages_crawled'] += 1
-            # Enhanced result structure
-            result = {
-                'url': url,
-                'timestamp': time.time(),
-                'content': {},
-                'links': [],
-                'media': {}
-            }
+        # Periodic cleanup
+        if self.stats['pages_crawled'] % cleanup_interval == 0:
+            self._cleanup_cache()
+            self._cleanup_visited_urls()
 
+        self.visited_urls.add(key, current_time)
+        self.stats['pages_crawled'] += 1
+        # Enhanced result structure
+        result = {
+            'url': url,
+            'timestamp': time.time(),
+            'content': {},
+            'links': [],
+            'media': {}
+        }
+
+        async with self._host_slot(url):
             html_content = await self._fetch_content(url)
-            if not html_content:
-                self.stats['errors'] += 1
-                return None
+        fetch_info = self._fetch_info.pop(url, {})
+        if self.budget is not None:
+            if fetch_info.get('cached'):
+                self.budget.record(url, cached=True)
+            else:
+                size = fetch_info.get('bytes')
+                if size is None:
+                    size = len((html_content or '').encode('utf-8'))
+                self.budget.record(url, size=size, error=html_content is None)
+        if html_content is None:
+            self.stats['errors'] += 1
+            return None
+        if not html_content:
+            # Skipped for its size or content type
+            return None
+        result['size'] = len(html_content)
 
-            try:
-                extracted_content = await self.data_extractor.extract_all(html_content)
-                
-                # Include text and HTML content from extract_main_content
-                main_content = self.data_extractor.extract_main_content(html_content)
-                if main_content:
-                  extracted_content['text'] = main_content.get('text', '')
-                  extracted_content['html'] = main_content.get('html', '')
-                
-                result['content'] = extracted_content
-                result['media'] = await self._extract_media(html_content, url)
-                result['links'] = await self._extract_links(html_content, url)
-
-                # Set titles for article links
-                for link in result['links']:
-                    if link['url'].endswith('/'):
-                        link['url'] = link['url'][:-1]
-                    if '/blog/' in link['url']:
-                        title = link['url'].split('/')[-1].replace('-', ' ').title()
-                        link['text'] = title
-
-                # Filter links based on patterns
-                result['links'] = [
-                    link for link in result['links'] 
-                    if self.should_crawl_url(link['url'], base_domain)
-                ]
-
-                # Add load time
-                result['load_time'] = time.time() - start_time
+        try:
+            # Relative links resolve against the final URL after redirects
+            page = await self._process_page(html_content, fetch_info.get('url') or url)
+            result['content'] = page['content']
+            result['media'] = page['media']
+            result['links'] = page['links']
+            canonical_url = page['canonical_url']
+            if canonical_url:
+                # The page is the same as its declared canonical URL; don't
+                # crawl that one separately
+                result['canonical_url'] = canonical_url
+                canonical_key = self._url_key(canonical_url)
+                if canonical_key not in self.visited_urls:
+                    self.visited_urls.add(canonical_key, current_time)
 
-            except Exception as e:
-                logging.error(f"Error processing {url}: {str(e)}")
+            if self.near_duplicates is not None and page.get('simhash') is not None:
+                original = self.near_duplicates.add(url, page['simhash'])
+                if original is not None:
+                    if self.duplicate_action == 'skip':
+                        logging.info(f"Skipping {url}: near-duplicate of {original}")
+                        return None
+                    result['duplicate_of'] = original
 
-            # Update cache with timestamp
-            self.cache[url] = result
-            self.cache_timestamps[url] = time.time()
+            # Set titles for article links
+            for link in result['links']:
+                if '/blog/' in link['url']:
+                    title = link['url'].split('/')[-1].replace('-', ' ').title()
+                    link['text'] = title
 
-            # Update stats
-            if 'size' in result:
-                self.stats['total_bytes'] += result['size']
+            # Filter links based on patterns
+            result['links'] = self.url_filter.filter_links(result['links'], base_domain)
 
-            if depth > 1:
-                child_tasks = [
-                    self.crawl(link['url'], depth - 1, **kwargs)
-                    for link in result['links'] if link['url'] not in self.visited_urls
-                ]
+            # Add load time
+            result['load_time'] = time.time() - start_time
 
-                if child_tasks:
-                    child_results = await asyncio.gather(*child_tasks)
-                    for i, child_result in enumerate(child_results):
-                        if child_result:
-                            result['links'][i]['content'] = child_result
+        except Exception as e:
+            logging.error(f"Error processing {url}: {str(e)}")
 
-            return result
+        self.cache.set(key, result, size=result['size'])
 
-        except asyncio.CancelledError:
-            raise
-        except Exception as e:
-            logging.error(f"Error crawling {url}: {str(e)}")
-            return None
+        # Update stats
+        if 'size' in result:
+            self.stats['total_bytes'] += result['size']
+
+        return result
+
+    async def _process_page(self, html_content: str, url: str) -> Dict:
+        """Parse and extract a page, in the process pool when one is configured.
+
+        Offloading keeps the event loop fetching while pages are parsed on
+        other cores; only the HTML and the extracted results cross processes.
+        """
+        if self._process_pool is None:
+            return self.page_processor.process(html_content, url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._process_pool, process_in_worker, html_content, url)
 
     async def _fetch_content(self, url: str, retries: int = 3) -> Optional[str]:
-        """Fetch content with retries and error handling"""
+        """Fetch content with retries and error handling.
+
+        Fresh cache entries are returned directly. Stale entries that carry an
+        ETag or Last-Modified validator are revalidated with a conditional
+        request, and a 304 response reuses the cached body.
+
+        Returns None if the fetch failed and an empty string if the response
+        was skipped for its size or content type. The final URL after
+        redirects, the response size in bytes and whether the page came from
+        the cache are left in _fetch_info[url] for _crawl_page.
+        """
+        stale = None
+        key = self._url_key(url)
+        if self.cache_manager:
+            cached = self.cache_manager.get(key)
+            if cached is not None:
+                self._fetch_info[url] = {'url': cached.get('url'), 'cached': True}
+                return cached['content']
+            stale = self.cache_manager.get_stale(key)
+
+        response = await self._fetch_uncached(url, retries, stale)
+        if not response:
+            return None
+        self._fetch_info[url] = {'url': response.get('url') or (stale or {}).get('url')}
+        if 'bytes' in response:
+            self._fetch_info[url]['bytes'] = response['bytes']
+
+        if response.get('skipped'):
+            return ''
+
+        if response['status'] == 304 and stale:
+            self.stats['revalidated'] += 1
+            await self._cache_store(key, {
+                **stale,
+                'etag': response.get('etag') or stale.get('etag'),
+                'last_modified': response.get('last_modified') or stale.get('last_modified')
+            })
+            return stale['content']
+
+        content = response.get('content')
+        if content and self.cache_manager:
+            await self._cache_store(key, {
+                'content': content,
+                'url': response.get('url'),
+                'etag': response.get('etag'),
+                'last_modified': response.get('last_modified')
+            })
+        return content
+
+    async def _cache_store(self, key: str, value: Dict) -> None:
+        """Write a response to the HTTP cache in a thread.
+
+        Encoding, compressing and committing a page would otherwise block
+        every worker; CacheManager serializes access with its own lock.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.cache_manager.set, key, value)
+
+    async def _fetch_uncached(self, url: str, retries: int = 3, stale: Optional[Dict] = None) -> Optional[Dict]:
+        """Fetch content from the network (or arXiv API), bypassing the cache"""
         # Check if URL is from arXiv
         if 'arxiv.org' in url:
             metadata = await self.arxiv_handler.get_paper_metadata(url)
             if metadata:
                 # Convert metadata to HTML for consistent processing
                 html_content = self._convert_arxiv_metadata_to_html(metadata)
-                return html_content
+                return {'status': 200, 'content': html_content}
             
         # If not arXiv or metadata fetch failed, proceed with normal fetching
         for attempt in range(retries):
             try:
                 if self.browser and self.browser.driver:
-                    return await self._fetch_with_browser(url)
+                    return {'status': 200, 'content': await self._fetch_with_browser(url)}
                 else:
-                    return await self._fetch_with_requests(url)
+                    return await self._fetch_with_requests(url, stale)
             except aiohttp.ClientError as e:
                 if attempt == retries - 1:
                     logging.error(f"Error fetching {url} after {retries} attempts: {str(e)}")
@@ -397,83 +968,106 @@ class WebCrawler:
                     raise
                 await asyncio.sleep(1 * (attempt + 1))
 
-    async def _fetch_with_requests(self, url: str) -> str:
-        """Fetch content using aiohttp with improved error handling"""
+    async def _fetch_with_requests(self, url: str, stale: Optional[Dict] = None) -> Dict:
+        """Fetch content using aiohttp with improved error handling.
+
+        Returns a dict with the response status, body and cache validators.
+        When stale carries validators the request is conditional, and a 304
+        response is returned with no content. Oversized or unsupported
+        responses are returned with 'skipped' set; see _read_body.
+        """
         await self.rate_limiter.wait(url)
         
         proxy = None
         if self.proxy_manager:
             proxy = await self.proxy_manager.get_next_proxy()
 
+        headers = {}
+        if stale:
+            if stale.get('etag'):
+                headers['If-None-Match'] = stale['etag']
+            if stale.get('last_modified'):
+                headers['If-Modified-Since'] = stale['last_modified']
+
         try:
-            async with self.session.get(url, proxy=proxy, timeout=30) as response:
-                response.raise_for_status()
-                content = await response.text()
+            request_start = time.monotonic()
+            async with self.session.get(url, proxy=proxy, timeout=30, headers=headers) as response:
+                self.rate_limiter.record_response(
+                    url, response.status,
+                    latency=time.monotonic() - request_start,
+                    retry_after=response.headers.get('Retry-After')
+                )
+                if response.status == 304:
+                    content, size = None, 0
+                else:
+                    response.raise_for_status()
+                    content, size = await self._read_body(url, response)
                 
                 if proxy:
                     await self.proxy_manager.mark_proxy_success(proxy)
                     
-                return content
+                return {
+                    'status': response.status,
+                    'url': str(response.url),
+                    'content': content,
+                    'bytes': size,
+                    'skipped': content is None and response.status != 304,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
         except Exception as e:
             if proxy:
                 await self.proxy_manager.mark_proxy_failed(proxy)
             raise e
 
-    async def _extract_media(self, html: str, base_url: str) -> Dict:
-        """Extract media elements from HTML"""
-        soup = BeautifulSoup(html, 'html.parser')
-        media = {
-            'images': [],
-            'videos': [],
-            'documents': []
-        }
+    async def _read_body(self, url: str, response: aiohttp.ClientResponse) -> Tuple[Optional[str], int]:
+        """Read a response body as HTML, or None to skip it, with the bytes read.
 
-        # Extract images
-        for img in soup.find_all('img', src=True):
-            if any(x in img['src'].lower() for x in ['tracking', 'analytics', 'pixel', 'facebook.com/tr']):
-                continue
-            media['images'].append({
-                'url': urljoin(base_url, img['src']),
-                'alt': img.get('alt', ''),
-                'title': img.get('title', '')
-            })
+        Content-Type and Content-Length are checked before any of the body is
+        read; the body is then streamed in chunks and abandoned as soon as it
+        exceeds max_file_size. Non-HTML types go to content_handlers.
+        """
+        has_type = 'Content-Type' in response.headers
+        content_type = response.content_type if has_type else 'text/html'
+        handler = None
+        if content_type not in HTML_CONTENT_TYPES:
+            handler = self.content_handlers.get(content_type)
+            if handler is None:
+                logging.info(f"Skipping {url}: unsupported content type {content_type}")
+                self.stats['skipped_content'] += 1
+                return None, 0
 
-        # Extract videos
-        video_patterns = [
-            ('youtube', r'(?:youtube\.com|youtu\.be)'),
-            ('vimeo', r'vimeo\.com'),
-            ('default', r'\.(?:mp4|webm|ogg)$')
-        ]
+        if self.max_file_size and (response.content_length or 0) > self.max_file_size:
+            logging.warning(f"Skipping {url}: {response.content_length} bytes exceeds max_file_size")
+            self.stats['skipped_content'] += 1
+            return None, 0
 
-        for video in soup.find_all(['video', 'iframe', 'source']):
-            src = video.get('src', '')
-            if not src or any(x in src.lower() for x in ['gtm', 'analytics', 'tracking', 'pixel']):
-                continue
-                
-            video_type = 'default'
-            for vtype, pattern in video_patterns:
-                if re.search(pattern, src, re.I):
-                    video_type = vtype
-                    break
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body.extend(chunk)
+            if self.max_file_size and len(body) > self.max_file_size:
+                logging.warning(f"Skipping {url}: body exceeds max_file_size ({self.max_file_size} bytes)")
+                self.stats['skipped_content'] += 1
+                return None, len(body)
 
-            media['videos'].append({
-                'url': urljoin(base_url, src),
-                'type': video_type,
-                'title': video.get('title', '')
-            })
+        charset = response.charset or self._sniff_charset(body) or 'utf-8'
+        try:
+            if handler is not None:
+                return handler(url, bytes(body), charset), len(body)
+            return body.decode(charset, errors='replace'), len(body)
+        except LookupError:
+            # Unknown charset name
+            return body.decode('utf-8', errors='replace'), len(body)
 
-        # Extract documents
-        doc_extensions = ['.pdf', '.doc', '.docx', '.xls', '.xlsx']
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if any(href.lower().endswith(ext) for ext in doc_extensions):
-                media['documents'].append({
-                    'url': urljoin(base_url, href),
-                    'text': link.get_text(strip=True),
-                    'type': href.split('.')[-1].lower()
-                })
+    @staticmethod
+    def _sniff_charset(body: bytes) -> Optional[str]:
+        """Charset declared in a <meta> tag near the start of an HTML body."""
+        match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', body[:2048], re.I)
+        return match.group(1).decode('ascii') if match else None
 
-        return media
+    async def _extract_media(self, html: Union[str, ParsedDocument], base_url: str) -> Dict:
+        """Extract media elements from HTML"""
+        return self.page_processor.extract_media(html, base_url)
 
     def _convert_arxiv_metadata_to_html(self, metadata: Dict) -> str:
         """Convert arXiv metadata to HTML format for consistent processing"""
@@ -531,55 +1125,13 @@ class WebCrawler:
         html.append('</body></html>')
         return '\n'.join(html)
 
-    async def _extract_links(self, html: str, base_url: str) -> List[Dict]:
+    async def _extract_links(self, html: Union[str, ParsedDocument], base_url: str) -> List[Dict]:
         """Extract links from HTML with special handling for GitHub pages and arXiv links"""
-        soup = BeautifulSoup(html, 'html.parser')
-        links = []
-        base_domain = urlparse(base_url).netloc
-        is_github = 'github.com' in base_domain
-        is_arxiv = 'arxiv.org' in base_domain
-
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
-                continue
-
-            abs_url = urljoin(base_url, href)
-            if not abs_url.startswith(('http://', 'https://')):
-                continue
-
-            domain = urlparse(abs_url).netloc
-            link_type = 'internal' if domain == base_domain else 'external'
-
-            # Handle arXiv-specific links
-            if 'arxiv.org' in domain:
-                link_type = 'arxiv'
-
-            # Special handling for GitHub links
-            if is_github:
-                path = urlparse(abs_url).path
-                
-                # Determine GitHub-specific link type
-                for path_type, pattern in self.github_base_paths.items():
-                    if re.search(pattern, path):
-                        link_type = f'github_{path_type}'
-                        break
-
-                # Skip certain GitHub links
-                if any(segment in path for segment in [
-                    '/search', '/marketplace', '/sponsors', '/settings',
-                    '/notifications', '/explore', '/topics'
-                ]):
-                    continue
-
-            links.append({
-                'url': abs_url,
-                'text': a.get_text(strip=True),
-                'type': link_type,
-                'title': a.get('title', '')
-            })
+        return self.page_processor.extract_links(html, base_url)
 
-        return links
+    def _find_canonical_url(self, document: ParsedDocument, url: str) -> Optional[str]:
+        """Return the page's rel=canonical URL if it names a different page on the same host."""
+        return self.page_processor.find_canonical_url(document, url)
 
     async def check_robots_txt(self, url: str) -> bool:
         """Check if URL is allowed by robots.txt with caching and proper parsing."""
@@ -587,119 +1139,244 @@ class WebCrawler:
             return True
 
         parsed = urlparse(url)
-        domain = parsed.netloc
-        robots_url = f"{parsed.scheme}://{domain}/robots.txt"
-        
-        current_time = time.time()
-        
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+
+        rules = await self._get_robots_rules(parsed.scheme, parsed.netloc)
+        return self._check_cached_rules(rules, self.robots_user_agent, path)
+
+    async def _get_robots_rules(self, scheme: str, domain: str) -> RobotsRules:
+        """Return compiled robots.txt rules for a host.
+
+        Concurrent callers for the same host share a single in-flight fetch.
+        """
         # Check cache
         if domain in self.robots_cache:
             cache_entry = self.robots_cache[domain]
-            if current_time - cache_entry['timestamp'] < self.robots_cache_ttl:
-                return self._check_cached_rules(cache_entry['rules'], 'CrewZombitX64', parsed.path)
+            if time.time() - cache_entry['timestamp'] < self.robots_cache_ttl:
+                return cache_entry['rules']
             else:
                 # Cache expired, remove it
                 del self.robots_cache[domain]
-        
+
+        pending = self._robots_inflight.get(domain)
+        if pending is not None:
+            rules = await asyncio.shield(pending)
+            if rules is None:
+                # The fetching task was cancelled; try again ourselves
+                return await self._get_robots_rules(scheme, domain)
+            return rules
+
+        pending = asyncio.get_running_loop().create_future()
+        self._robots_inflight[domain] = pending
+        rules = None
+        try:
+            rules = await self._fetch_robots_rules(scheme, domain)
+            return rules
+        finally:
+            pending.set_result(rules)
+            del self._robots_inflight[domain]
+
+    async def _fetch_robots_rules(self, scheme: str, domain: str) -> RobotsRules:
+        """Fetch, parse and cache robots.txt for a host."""
+        robots_url = f"{scheme}://{domain}/robots.txt"
+        current_time = time.time()
         try:
+            self.stats['robots_fetches'] += 1
             async with self.session.get(robots_url, timeout=10) as response:
                 if response.status != 200:
                     # Cache the "allow all" result
-                    self.robots_cache[domain] = {
-                        'timestamp': current_time,
-                        'rules': {'*': {'allow': ['*'], 'disallow': []}}
-                    }
-                    return True
-                
-                robots_content = await response.text()
-                rules = self._parse_robots_txt(robots_content)
-                
-                # Cache the parsed rules
+                    rules = RobotsRules({'*': {'allow': ['*'], 'disallow': []}})
+                else:
+                    robots_content = await response.text()
+                    rules = RobotsRules(self._parse_robots_txt(robots_content),
+                                        self._parse_robots_sitemaps(robots_content, robots_url))
+
+                # Cache the compiled rules
                 self.robots_cache[domain] = {
                     'timestamp': current_time,
                     'rules': rules
                 }
-                
-                return self._check_cached_rules(rules, 'CrewZombitX64', parsed.path)
+                self._apply_crawl_delay(domain, rules)
+                return rules
                 
         except Exception as e:
             logging.warning(f"Error fetching robots.txt for {domain}: {str(e)}")
             # Cache the error state (allow all) for a shorter time
+            rules = RobotsRules({'*': {'allow': ['*'], 'disallow': []}})
             self.robots_cache[domain] = {
                 'timestamp': current_time,
-                'rules': {'*': {'allow': ['*'], 'disallow': []}},
+                'rules': rules,
                 'error': str(e)
             }
-            return True
+            return rules
 
-    def _check_cached_rules(self, rules: Dict, user_agent: str, path: str) -> bool:
-        """Check if path is allowed using cached robots.txt rules."""
-        # First try to match the specific user agent
-        if user_agent in rules:
-            agent_rules = rules[user_agent]
-        # Then try the wildcard rules
-        elif '*' in rules:
-            agent_rules = rules['*']
-        else:
-            return True  # No applicable rules found
-        
-        # Check if path matches any allow rule first
-        for allow_pattern in agent_rules.get('allow', []):
-            if self._matches_pattern(path, allow_pattern):
-                return True
-                
-        # Then check if it matches any disallow rule
-        for disallow_pattern in agent_rules.get('disallow', []):
-            if self._matches_pattern(path, disallow_pattern):
-                return False
-                
-        return True  # Allowed by default
+    def save_robots_cache(self, filename: str) -> None:
+        """Save fetched robots.txt rules so later runs can skip refetching them."""
+        state = {
+            domain: {
+                'timestamp': entry['timestamp'],
+                'rules': entry['rules'].rules,
+                'sitemaps': entry['rules'].sitemaps
+            }
+            for domain, entry in self.robots_cache.items()
+            if 'error' not in entry
+        }
+        try:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(filename, 'w') as f:
+                json.dump(state, f)
+        except Exception as e:
+            logging.error(f"Failed to save robots cache: {e}")
 
-    def _matches_pattern(self, path: str, pattern: str) -> bool:
-        """Check if a path matches a robots.txt pattern."""
-        if pattern == '*':
-            return True
-            
-        # Convert robots.txt pattern to regex
-        pattern = pattern.replace('.', r'\.')
-        pattern = pattern.replace('*', '.*')
-        pattern = pattern.replace('$', r'\$')
-        pattern = f'^{pattern}'
-        
+    def load_robots_cache(self, filename: str) -> None:
+        """Load robots.txt rules saved by save_robots_cache, skipping expired ones."""
+        if not os.path.exists(filename):
+            return
         try:
-            return bool(re.match(pattern, path))
-        except re.error:
-            return False
+            with open(filename, 'r') as f:
+                state = json.load(f)
+        except Exception as e:
+            logging.error(f"Failed to load robots cache: {e}")
+            return
+
+        current_time = time.time()
+        for domain, entry in state.items():
+            if current_time - entry['timestamp'] < self.robots_cache_ttl:
+                rules = RobotsRules(entry['rules'], entry.get('sitemaps'))
+                self.robots_cache[domain] = {
+                    'timestamp': entry['timestamp'],
+                    'rules': rules
+                }
+                self._apply_crawl_delay(domain, rules)
+
+    def _apply_crawl_delay(self, domain: str, rules: RobotsRules) -> None:
+        """Feed the robots.txt Crawl-delay for our user agent into the rate limiter."""
+        if self.respect_robots:
+            self.rate_limiter.set_crawl_delay(domain, rules.crawl_delay(self.robots_user_agent))
+
+    def _check_cached_rules(self, rules: Union[Dict, RobotsRules], user_agent: str, path: str) -> bool:
+        """Check if path is allowed using cached robots.txt rules."""
+        if not isinstance(rules, RobotsRules):
+            rules = RobotsRules(rules)
+        return rules.is_allowed(path, user_agent)
 
     def _parse_robots_txt(self, content: str) -> Dict:
-        """Parse robots.txt content into structured rules."""
+        """Parse robots.txt content into structured rules.
+
+        Consecutive User-agent lines share the rules that follow them. Field
+        names and agents are case-insensitive, paths are not.
+        """
         rules = {}
-        current_agent = '*'
+        current_agents: List[str] = []
+        in_agent_block = False
         
-        for line in content.split('\n'):
+        for line in content.splitlines():
             # Remove comments and whitespace
-            line = line.split('#')[0].strip().lower()
-            if not line:
+            line = line.split('#')[0].strip()
+            if not line or ':' not in line:
                 continue
                 
             # Split into fields
-            if ':' in line:
-                field, value = line.split(':', 1)
-                field = field.strip()
-                value = value.strip()
-                
-                if field == 'user-agent':
-                    current_agent = value
-                    if current_agent not in rules:
-                        rules[current_agent] = {'allow': [], 'disallow': []}
-                elif field == 'allow' and value:
-                    rules[current_agent]['allow'].append(value)
+            field, value = line.split(':', 1)
+            field = field.strip().lower()
+            value = value.strip()
+
+            if field == 'sitemap':
+                # Not part of any group; see _parse_robots_sitemaps
+                continue
+            
+            if field == 'user-agent':
+                if not in_agent_block:
+                    current_agents = []
+                    in_agent_block = True
+                agent = value.lower()
+                current_agents.append(agent)
+                rules.setdefault(agent, {'allow': [], 'disallow': []})
+                continue
+
+            in_agent_block = False
+            if not current_agents:
+                # Rules before any User-agent line apply to everyone
+                current_agents = ['*']
+                rules.setdefault('*', {'allow': [], 'disallow': []})
+
+            for agent in current_agents:
+                if field == 'allow' and value:
+                    rules[agent]['allow'].append(value)
                 elif field == 'disallow' and value:
-                    rules[current_agent]['disallow'].append(value)
+                    rules[agent]['disallow'].append(value)
                 elif field == 'crawl-delay':
                     try:
-                        rules[current_agent]['crawl-delay'] = float(value)
+                        rules[agent]['crawl-delay'] = float(value)
                     except ValueError:
                         pass
                         
         return rules
+
+    @staticmethod
+    def _parse_robots_sitemaps(content: str, robots_url: str = '') -> List[str]:
+        """Sitemap URLs declared in robots.txt, resolved against robots_url."""
+        sitemaps = []
+        for line in content.splitlines():
+            field, _, value = line.partition(':')
+            if _ and field.strip().lower() == 'sitemap':
+                value = value.strip()
+                if value:
+                    sitemaps.append(urljoin(robots_url, value))
+        return list(dict.fromkeys(sitemaps))
+
+    async def discover_sitemaps(self, url: str) -> List[str]:
+        """Sitemap URLs for url's host: robots.txt Sitemap lines, else /sitemap.xml."""
+        parsed = urlparse(url)
+        rules = await self._get_robots_rules(parsed.scheme, parsed.netloc)
+        if rules.sitemaps:
+            return list(rules.sitemaps)
+        return [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+
+    async def iter_sitemap(self, url: str) -> AsyncIterator[SitemapEntry]:
+        """Yield the page entries of url's host sitemaps as they are parsed.
+
+        Sitemap indexes are followed (up to max_sitemaps files in total) and
+        each file is streamed through a SitemapParser, so neither a sitemap
+        nor the list of URLs it holds is ever loaded whole.
+        """
+        pending = deque(await self.discover_sitemaps(url))
+        queued = set(pending)
+        fetched = 0
+        while pending and fetched < self.max_sitemaps and not self.terminate_crawl:
+            sitemap_url = pending.popleft()
+            fetched += 1
+            sitemap = self._fetch_sitemap(sitemap_url)
+            try:
+                async for entry in sitemap:
+                    if not entry.is_index:
+                        yield entry
+                    elif entry.loc not in queued:
+                        queued.add(entry.loc)
+                        pending.append(entry.loc)
+            finally:
+                await sitemap.aclose()
+
+    async def _fetch_sitemap(self, url: str) -> AsyncIterator[SitemapEntry]:
+        """Stream one (possibly gzipped) sitemap, yielding entries as they parse."""
+        parser = SitemapParser()
+        await self.rate_limiter.wait(url)
+        try:
+            async with self._host_slot(url):
+                async with self.session.get(url, timeout=60) as response:
+                    if response.status != 200:
+                        logging.info(f"No sitemap at {url} (HTTP {response.status})")
+                        return
+                    self.stats['sitemaps_fetched'] += 1
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        for entry in parser.feed(chunk):
+                            yield entry
+            for entry in parser.close():
+                yield entry
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, SyntaxError) as e:
+            # SyntaxError covers xml.etree's ParseError
+            logging.warning(f"Error reading sitemap {url}: {str(e)}")